@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from backend.api import chat, roadmap, resources, productivity
+from backend.api import chat, roadmap, resources, productivity, metrics
 
 router = APIRouter()
 
@@ -7,3 +7,4 @@ router.include_router(chat.router, prefix="/chat", tags=["Chat"])
 router.include_router(roadmap.router, prefix="/roadmap", tags=["Roadmap"])
 router.include_router(resources.router, prefix="/resources", tags=["Resources"])
 router.include_router(productivity.router, prefix="/productivity", tags=["Productivity"])
+router.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
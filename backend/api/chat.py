@@ -1,4 +1,8 @@
-from fastapi import APIRouter, HTTPException
+import json
+import time
+from contextlib import aclosing
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from backend.rag.engine import rag_engine
 
@@ -8,20 +12,57 @@ class ChatRequest(BaseModel):
     message: str
     department: str = "General"
     session_id: str = None  # Optional session ID for context memory
+    use_cache: bool = True  # Set False to bypass the semantic answer cache
 
 @router.post("/query")
 async def query_chat(request: ChatRequest):
     try:
-        response = await rag_engine.process_query(request.message, request.department, request.session_id)
+        response = await rag_engine.process_query(request.message, request.department, request.session_id, request.use_cache)
         return {"response": response}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/stream")
+async def stream_chat(request: ChatRequest, http_request: Request):
+    """
+    Server-Sent Events variant of /query.
+    Emits one `token` event per model delta, then a `done` event carrying
+    time-to-first-token (ttft_ms) and total generation time.
+    """
+    async def event_stream():
+        start = time.perf_counter()
+        ttft_ms = None
+        tokens = rag_engine.stream_query(request.message, request.department, request.session_id, request.use_cache)
+        async with aclosing(tokens):
+            try:
+                async for token in tokens:
+                    if await http_request.is_disconnected():
+                        print("🔌 Client disconnected, cancelling stream")
+                        return
+                    if ttft_ms is None:
+                        ttft_ms = round((time.perf_counter() - start) * 1000, 1)
+                        print(f"⏱️ TTFT: {ttft_ms} ms")
+                    yield _sse("token", {"token": token})
+            except Exception as e:
+                yield _sse("error", {"detail": str(e)})
+                return
+        total_ms = round((time.perf_counter() - start) * 1000, 1)
+        yield _sse("done", {"ttft_ms": ttft_ms, "total_ms": total_ms})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/history/{session_id}")
 async def get_chat_history(session_id: str):
     try:
         # We can access redis_client from rag_engine since it's already initialized there
-        history = rag_engine.redis.get_chat_history(session_id)
+        history = await rag_engine.redis.get_chat_history(session_id)
         return {"history": history}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -29,7 +70,8 @@ async def get_chat_history(session_id: str):
 @router.delete("/session/{session_id}")
 async def delete_session(session_id: str):
     try:
-        rag_engine.redis.delete_session_data(session_id)
+        await rag_engine.redis.delete_session_data(session_id)
+        rag_engine.retrieval_cache.invalidate_session(session_id)
         return {"message": "Session deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,72 @@
+from fastapi import APIRouter, HTTPException
+from backend.rag.engine import rag_engine
+from backend.rag.hedging import LLM_HEDGING
+from backend.storage.local_cache import get_local_cache
+from backend.rag.loop_monitor import loop_monitor
+
+router = APIRouter()
+
+@router.get("/cache")
+async def get_cache_stats():
+    """Semantic answer cache hit/miss counters."""
+    if not rag_engine.semantic_cache:
+        return {"enabled": False}
+    try:
+        return {"enabled": True, **(await rag_engine.semantic_cache.stats())}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/singleflight")
+async def get_singleflight_stats():
+    """How much identical in-flight LLM work was coalesced."""
+    return {
+        "distributed": rag_engine.singleflight.distributed,
+        "in_flight": len(rag_engine.singleflight._inflight),
+        **rag_engine.singleflight.stats
+    }
+
+@router.get("/models")
+async def get_model_stats():
+    """Per-model rolling latency/error statistics and circuit breaker state, best model first."""
+    return {
+        "selection_order": rag_engine.health.candidates(),
+        "models": rag_engine.health.snapshot()
+    }
+
+@router.get("/hedging")
+async def get_hedging_stats():
+    """Hedged request volume against its budget."""
+    return {"enabled": LLM_HEDGING, **rag_engine.hedge_budget.stats()}
+
+@router.get("/redis-cache")
+async def get_local_cache_stats():
+    """In-process cache of session reads: hit rate and Redis round-trips saved."""
+    cache = get_local_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@router.get("/embeddings")
+async def get_embedding_cache_stats():
+    """Query-embedding cache hits (in-process and Redis) versus transformer forward passes."""
+    if not rag_engine.embedding_cache:
+        return {"enabled": False}
+    batcher = rag_engine.embedding_cache.batcher
+    return {
+        "enabled": True,
+        **rag_engine.embedding_cache.snapshot(),
+        "batching": batcher.snapshot() if batcher else None,
+    }
+
+@router.get("/event-loop")
+async def get_event_loop_stats():
+    """Event-loop lag on this worker and the CPU pools that keep retrieval and embedding off the loop."""
+    embed_pool = rag_engine.embed_pool
+    return {"lag": loop_monitor.snapshot(), "cpu_pool": rag_engine.cpu_pool.snapshot(),
+            "embed_pool": embed_pool.snapshot() if embed_pool is not rag_engine.cpu_pool else None}
+
+@router.get("/retrieval")
+async def get_retrieval_cache_stats():
+    """Vector search backend, and the per-session retrieval cache (turns served without a lookup)."""
+    retriever = rag_engine.retriever.snapshot() if rag_engine.retriever else None
+    return {"retriever": retriever, "cache": rag_engine.retrieval_cache.snapshot()}
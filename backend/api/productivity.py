@@ -1,12 +1,16 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+from typing import List, Optional, Union
+import os
 import uuid
 from backend.storage.redis_client import RedisClient
 
 router = APIRouter()
 redis_client = RedisClient()
 
+# Upper bound on items per bulk request (each batch is a single Redis pipeline)
+MAX_BULK_TASKS = int(os.getenv('MAX_BULK_TASKS', 500))
+
 # Models
 class Task(BaseModel):
     id: Optional[str] = None
@@ -18,6 +22,40 @@ class TaskUpdate(BaseModel):
     completed: Optional[bool] = None
     title: Optional[str] = None
 
+class NewTask(BaseModel):
+    id: Optional[str] = None
+    title: str
+    completed: bool = False
+
+class TaskPatch(TaskUpdate):
+    id: str
+
+class BulkTaskCreate(BaseModel):
+    session_id: str
+    tasks: List[NewTask] = Field(..., max_length=MAX_BULK_TASKS)
+
+class BulkTaskUpdate(BaseModel):
+    session_id: str
+    updates: List[TaskPatch] = Field(..., max_length=MAX_BULK_TASKS)
+
+class BulkTaskDelete(BaseModel):
+    session_id: str
+    ids: List[str] = Field(..., max_length=MAX_BULK_TASKS)
+
+class RoadmapModule(BaseModel):
+    week: Union[int, str]
+    topic: str
+    description: Optional[str] = None
+
+class Roadmap(BaseModel):
+    # as returned by /api/roadmap/generate; fields not needed for the import are ignored
+    title: Optional[str] = None
+    modules: List[RoadmapModule] = []
+
+class RoadmapImport(BaseModel):
+    session_id: str
+    roadmap: Roadmap
+
 class StudySession(BaseModel):
     session_id: str
     minutes: int
@@ -25,7 +63,7 @@ class StudySession(BaseModel):
 # Routes
 @router.get("/tasks/{session_id}", response_model=List[Task])
 async def get_tasks(session_id: str):
-    return redis_client.get_tasks(session_id)
+    return await redis_client.get_tasks(session_id)
 
 @router.post("/tasks", response_model=Task)
 async def add_task(task: Task):
@@ -34,35 +72,66 @@ async def add_task(task: Task):
         
     if not task.id:
         task.id = str(uuid.uuid4())
-    redis_client.add_task(task.session_id, task.dict())
+    await redis_client.add_task(task.session_id, task.dict())
     return task
 
+@router.post("/tasks/bulk")
+async def add_tasks(batch: BulkTaskCreate):
+    tasks = [Task(**t.dict(), session_id=batch.session_id) for t in batch.tasks]
+    for task in tasks:
+        task.id = task.id or str(uuid.uuid4())
+    await redis_client.add_tasks(batch.session_id, [t.dict() for t in tasks])
+    return {"results": [{"id": t.id, "status": "created"} for t in tasks]}
+
+@router.put("/tasks/bulk")
+async def update_tasks(batch: BulkTaskUpdate):
+    updates = [(u.id, u.dict(exclude_unset=True, exclude={"id"})) for u in batch.updates]
+    found = await redis_client.update_tasks(batch.session_id, updates)
+    return {"results": [{"id": task_id, "status": "updated" if ok else "not_found"}
+                        for (task_id, _), ok in zip(updates, found)]}
+
+@router.post("/tasks/bulk-delete")
+async def delete_tasks(batch: BulkTaskDelete):
+    found = await redis_client.delete_tasks(batch.session_id, batch.ids)
+    return {"results": [{"id": task_id, "status": "deleted" if ok else "not_found"}
+                        for task_id, ok in zip(batch.ids, found)]}
+
+@router.post("/tasks/import-roadmap")
+async def import_roadmap(request: RoadmapImport):
+    """
+    Turns each roadmap module into a task. Ids are derived from the module, so
+    re-importing the same roadmap skips tasks that already exist (keeping their progress).
+    """
+    modules = request.roadmap.modules[:MAX_BULK_TASKS]
+    tasks = []
+    for module in modules:
+        title = f"Week {module.week}: {module.topic}"
+        task_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{request.session_id}/{request.roadmap.title}/{title}"))
+        tasks.append(Task(id=task_id, title=title, session_id=request.session_id).dict())
+    created = await redis_client.add_tasks(request.session_id, tasks, overwrite=False)
+    return {"results": [{"id": t["id"], "title": t["title"], "status": "created" if ok else "exists"}
+                        for t, ok in zip(tasks, created)]}
+
 @router.put("/tasks/{session_id}/{task_id}")
 async def update_task(session_id: str, task_id: str, update: TaskUpdate):
-    redis_client.update_task(session_id, task_id, update.dict(exclude_unset=True))
+    await redis_client.update_task(session_id, task_id, update.dict(exclude_unset=True))
     return {"status": "updated"}
 
 @router.delete("/tasks/{session_id}/{task_id}")
 async def delete_task(session_id: str, task_id: str):
-    redis_client.delete_task(session_id, task_id)
+    await redis_client.delete_task(session_id, task_id)
     return {"status": "deleted"}
 
 @router.post("/timer/log")
 async def log_study(session: StudySession):
-    redis_client.log_study_session(session.session_id, session.minutes)
+    await redis_client.log_study_session(session.session_id, session.minutes)
     return {"status": "logged"}
 
 @router.get("/analytics/{session_id}")
 async def get_analytics(session_id: str):
-    stats = redis_client.get_study_stats(session_id)
-    tasks = redis_client.get_tasks(session_id)
-    completed_tasks = len([t for t in tasks if t.get("completed")])
-    
-    return {
-        "study_stats": stats,
-        "task_stats": {
-            "total": len(tasks),
-            "completed": completed_tasks,
-            "pending": len(tasks) - completed_tasks
-        }
-    }
+    return await redis_client.get_analytics(session_id)
+
+@router.get("/analytics/{session_id}/rollup")
+async def get_study_rollup(session_id: str, days: int = Query(365, ge=1, le=366)):
+    """Daily and weekly study minutes for the last `days` days."""
+    return await redis_client.get_study_rollups(session_id, days)
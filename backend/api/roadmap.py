@@ -16,5 +16,5 @@ async def generate_roadmap(request: RoadmapRequest):
     # For the prototype, we can check for cached roadmaps or generate one.
     
     from backend.rag.engine import rag_engine
-    roadmap_data = await rag_engine.generate_roadmap(request.department, request.level)
+    roadmap_data = await rag_engine.generate_roadmap(request.department, request.level, request.goals)
     return roadmap_data
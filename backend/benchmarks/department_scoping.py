@@ -0,0 +1,92 @@
+"""
+Benchmark: vector search latency and recall@k with and without department scoping.
+
+Builds an in-memory Chroma collection of synthetic 384-d chunks tagged like ingest.py does
+("source" = roadmap id). Roadmaps share topics (e.g. security shows up in backend and devops),
+so an unscoped search returns chunks from roadmaps outside the department.
+
+  unscoped    top-k over the whole collection
+  filter      top-k with the department_filter() where-clause on the whole collection
+  collection  top-k over the department's own collection (ingest.build_department_indexes)
+
+Recall@k is measured against the exact top-k among the department's own chunks (brute force).
+
+Usage (from repo root):
+    python -m backend.benchmarks.department_scoping
+"""
+import time
+import numpy as np
+import chromadb
+from backend.rag.departments import DEPARTMENT_ROADMAPS, ROADMAP_IDS, department_collection, department_filter
+
+CHUNKS_PER_ROADMAP = 3000
+TOPICS = 24
+TOPICS_PER_ROADMAP = 8
+QUERIES_PER_DEPARTMENT = 50
+K = 3
+DIM = 384
+
+def unit(x):
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+def build_corpus(rng):
+    centers = unit(rng.standard_normal((TOPICS, DIM)))
+    vectors, sources = [], []
+    for i, roadmap in enumerate(ROADMAP_IDS):
+        # Neighbouring roadmaps overlap in topics
+        topics = [(i * 3 + t) % TOPICS for t in range(TOPICS_PER_ROADMAP)]
+        picks = rng.choice(topics, CHUNKS_PER_ROADMAP)
+        vectors.append(unit(centers[picks] + 0.08 * rng.standard_normal((CHUNKS_PER_ROADMAP, DIM))))
+        sources += [roadmap] * CHUNKS_PER_ROADMAP
+    return centers, np.vstack(vectors).astype(np.float32), np.array(sources)
+
+MODES = ("unscoped", "filter", "collection")
+
+def main():
+    rng = np.random.default_rng(0)
+    centers, vectors, sources = build_corpus(rng)
+    client = chromadb.EphemeralClient()
+    ids = np.array([str(i) for i in range(len(vectors))])
+
+    def make_collection(name, rows):
+        collection = client.create_collection(name, embedding_function=None)
+        for start in range(0, len(rows), 5000):
+            batch = rows[start:start + 5000]
+            collection.add(ids=list(ids[batch]), embeddings=vectors[batch],
+                           metadatas=[{"source": s} for s in sources[batch]])
+        return collection
+
+    main_collection = make_collection("langchain", np.arange(len(vectors)))
+    print(f"{len(vectors)} chunks in {len(ROADMAP_IDS)} roadmaps, k={K}, {QUERIES_PER_DEPARTMENT} queries per department")
+    print(f"{'department':>24} {'share':>6} " + " ".join(f"{m + ' ms':>13}" for m in MODES)
+          + " " + " ".join(f"{'recall ' + m:>17}" for m in MODES))
+
+    totals = {m: ([], []) for m in MODES}
+    for department, roadmaps in DEPARTMENT_ROADMAPS.items():
+        in_scope = np.flatnonzero(np.isin(sources, roadmaps))
+        targets = {
+            "unscoped": (main_collection, {}),
+            "filter": (main_collection, {"where": department_filter(department)}),
+            "collection": (make_collection(department_collection(department), in_scope), {}),
+        }
+        results = {m: ([], []) for m in MODES}
+        for _ in range(QUERIES_PER_DEPARTMENT):
+            # A query about a topic that one of the department's chunks covers
+            query = unit(vectors[rng.choice(in_scope)] + 0.05 * rng.standard_normal(DIM)).astype(np.float32)
+            truth = set(ids[in_scope[np.argsort(-(vectors[in_scope] @ query))[:K]]])
+            for mode, (collection, kwargs) in targets.items():
+                start = time.perf_counter()
+                found = collection.query(query_embeddings=[query], n_results=K, **kwargs)["ids"][0]
+                results[mode][0].append((time.perf_counter() - start) * 1000)
+                results[mode][1].append(len(truth & set(found)) / K)
+        share = len(in_scope) / len(vectors)
+        print(f"{department:>24} {share:>6.0%} " + " ".join(f"{np.median(results[m][0]):>13.2f}" for m in MODES)
+              + " " + " ".join(f"{np.mean(results[m][1]):>17.3f}" for m in MODES))
+        for m in MODES:
+            totals[m][0].extend(results[m][0])
+            totals[m][1].extend(results[m][1])
+    print(f"{'all':>24} {'':>6} " + " ".join(f"{np.median(totals[m][0]):>13.2f}" for m in MODES)
+          + " " + " ".join(f"{np.mean(totals[m][1]):>17.3f}" for m in MODES))
+
+if __name__ == "__main__":
+    main()
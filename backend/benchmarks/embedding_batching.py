@@ -0,0 +1,66 @@
+"""
+Benchmark: query embeddings/sec with and without micro-batching, at 1, 8 and 32 concurrent clients.
+
+  unbatched  every request embeds its own text on a worker thread (embed_query via asyncio.to_thread)
+  batched    requests go through EmbeddingBatcher (one embed_documents call per micro-batch)
+
+Uses all-MiniLM-L6-v2 if it can be loaded (cached weights or network); otherwise a stand-in
+encoder with the same shape of cost: a fixed per-call overhead plus 6 dense layers over
+16 tokens per text, so batching amortizes the same things it does for the transformer.
+
+Usage (from repo root; EMBED_BATCH_WINDOW_MS / EMBED_BATCH_MAX apply):
+    python -m backend.benchmarks.embedding_batching
+"""
+import time
+import asyncio
+import numpy as np
+from backend.rag.embedding_batcher import EmbeddingBatcher, EMBED_BATCH_WINDOW_MS
+
+CLIENTS = (1, 8, 32)
+REQUESTS_PER_CLIENT = 40
+
+class StandInEncoder:
+    """CPU-bound numpy encoder: per-call overhead + per-token dense layers (384-d)."""
+    def __init__(self, dim: int = 384, layers: int = 6, tokens: int = 16, call_overhead: float = 0.002):
+        rng = np.random.default_rng(0)
+        self.weights = [rng.standard_normal((dim, dim)).astype(np.float32) / np.sqrt(dim) for _ in range(layers)]
+        self.dim, self.tokens, self.call_overhead = dim, tokens, call_overhead
+
+    def embed_documents(self, texts):
+        time.sleep(self.call_overhead)  # tokenizer / framework dispatch per call
+        h = np.random.default_rng(len(texts)).standard_normal((len(texts) * self.tokens, self.dim)).astype(np.float32)
+        for w in self.weights:
+            h = np.tanh(h @ w)
+        return h.reshape(len(texts), self.tokens, self.dim).mean(axis=1).tolist()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+def load_encoder():
+    try:
+        from langchain_community.embeddings import SentenceTransformerEmbeddings
+        return SentenceTransformerEmbeddings(model_name="all-MiniLM-L6-v2"), "all-MiniLM-L6-v2"
+    except Exception:
+        return StandInEncoder(), "stand-in encoder (model unavailable)"
+
+async def run(clients: int, embed) -> float:
+    async def client(c):
+        for i in range(REQUESTS_PER_CLIENT):
+            await embed(f"client {c} question {i} about learning python")
+    start = time.perf_counter()
+    await asyncio.gather(*[client(c) for c in range(clients)])
+    return clients * REQUESTS_PER_CLIENT / (time.perf_counter() - start)
+
+async def main():
+    encoder, name = load_encoder()
+    print(f"Encoder: {name}, {REQUESTS_PER_CLIENT} requests per client, window {EMBED_BATCH_WINDOW_MS} ms")
+    print(f"{'clients':>8} {'unbatched emb/s':>16} {'batched emb/s':>14} {'mean batch':>11}")
+    for clients in CLIENTS:
+        unbatched = await run(clients, lambda t: asyncio.to_thread(encoder.embed_query, t))
+        batcher = EmbeddingBatcher(encoder)
+        batched = await run(clients, batcher.embed)
+        print(f"{clients:>8} {unbatched:>16.0f} {batched:>14.0f} {batcher.snapshot()['mean_batch_size']:>11.1f}")
+        batcher.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
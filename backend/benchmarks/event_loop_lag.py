@@ -0,0 +1,75 @@
+"""
+Benchmark: event-loop lag while concurrent chat turns run their vector search.
+
+  inline   search called directly in the coroutine (blocks the loop for its whole duration)
+  thread   CPUPool("thread"): numpy releases the GIL during the matmul, the loop stays responsive
+  process  CPUPool("process"): search runs in spawned workers, nothing but pickling on the loop
+
+The search is a stand-in for the Chroma query: brute-force cosine top-k over a fixed corpus of
+384-d vectors, built once per process. LoopLagMonitor samples every 10 ms during the run.
+
+Usage (from repo root):
+    python -m backend.benchmarks.event_loop_lag
+"""
+import time
+import asyncio
+import numpy as np
+from backend.rag.cpu_pool import CPUPool
+from backend.rag.loop_monitor import LoopLagMonitor
+
+CLIENTS = 16
+TURNS_PER_CLIENT = 10
+CORPUS_SIZE = 50_000
+DIM = 384
+
+_corpus = None
+
+def search(vector, k: int = 4):
+    """Top-k by cosine over the stand-in corpus (module-level so process workers can run it)."""
+    global _corpus
+    if _corpus is None:
+        rng = np.random.default_rng(0)
+        _corpus = rng.standard_normal((CORPUS_SIZE, DIM)).astype(np.float32)
+        _corpus /= np.linalg.norm(_corpus, axis=1, keepdims=True)
+    scores = _corpus @ np.asarray(vector, dtype=np.float32)
+    top = np.argpartition(-scores, k)[:k]
+    return top[np.argsort(-scores[top])].tolist()
+
+async def run(mode: str):
+    pool = None if mode == "inline" else CPUPool(mode, queue_depth=CLIENTS * 2)
+    rng = np.random.default_rng(1)
+    queries = rng.standard_normal((CLIENTS * TURNS_PER_CLIENT, DIM)).astype(np.float32).tolist()
+    if pool:
+        # Warm-up: start the workers and build their corpus outside the measured window
+        await asyncio.gather(*[pool.run(search, queries[0]) for _ in range(pool.workers)])
+    else:
+        search(queries[0])
+
+    async def client(c):
+        for i in range(TURNS_PER_CLIENT):
+            vector = queries[c * TURNS_PER_CLIENT + i]
+            if pool:
+                await pool.run(search, vector)
+            else:
+                search(vector)
+            await asyncio.sleep(0)  # rest of the turn (LLM streaming) yields to the loop
+
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    start = time.perf_counter()
+    await asyncio.gather(*[client(c) for c in range(CLIENTS)])
+    elapsed = time.perf_counter() - start
+    await monitor.stop()
+    if pool:
+        pool.shutdown()
+    return CLIENTS * TURNS_PER_CLIENT / elapsed, monitor.snapshot()
+
+async def main():
+    print(f"{CLIENTS} clients x {TURNS_PER_CLIENT} turns, corpus {CORPUS_SIZE} x {DIM}")
+    print(f"{'mode':>8} {'searches/s':>11} {'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}")
+    for mode in ("inline", "thread", "process"):
+        throughput, lag = await run(mode)
+        print(f"{mode:>8} {throughput:>11.0f} {lag['p50_ms']:>11.1f} {lag['p99_ms']:>11.1f} {lag['max_ms']:>11.1f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
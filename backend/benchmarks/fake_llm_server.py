@@ -0,0 +1,65 @@
+"""
+Minimal OpenAI-compatible server for benchmarks.
+Every /v1/chat/completions call sleeps FAKE_LLM_LATENCY seconds and returns a canned reply.
+With "stream": true the first chunk arrives after FAKE_LLM_LATENCY and the rest follow
+FAKE_LLM_TOKEN_DELAY apart.
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+LATENCY = float(os.getenv("FAKE_LLM_LATENCY", 0.5))
+TOKEN_DELAY = float(os.getenv("FAKE_LLM_TOKEN_DELAY", 0.02))
+REPLY = '{"title": "Fake Roadmap", "modules": [{"week": 1, "topic": "Basics", "description": "...", "resources": []}]}'
+
+app = FastAPI()
+
+@app.post("/v1/chat/completions")
+async def chat_completions(body: dict):
+    if body.get("stream"):
+        return StreamingResponse(_stream(body.get("model", "fake")), media_type="text/event-stream")
+    await asyncio.sleep(LATENCY)
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": REPLY},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+    }
+
+async def _stream(model: str):
+    await asyncio.sleep(LATENCY)
+    for i, token in enumerate(REPLY.split(" ")):
+        if i:
+            await asyncio.sleep(TOKEN_DELAY)
+        chunk = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": token + " "}, "finish_reason": None}]
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+def start_in_thread(port: int = 8765) -> str:
+    """Starts the server on a daemon thread and returns its base URL."""
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/v1"
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="127.0.0.1", port=8765)
@@ -0,0 +1,63 @@
+"""
+Load test: LLM throughput of RAGEngine roadmap generation against a local fake server.
+
+Compares the async pooled client with the old blocking OpenAI client at several
+concurrency levels. With the async client, throughput should grow with concurrency;
+with the blocking client it stays flat at ~1/latency.
+
+Calls go straight to the LLM step (_generate_roadmap_llm), each with different goals, so the
+roadmap cache and single-flight coalescing do not hide the client's own concurrency.
+
+Usage (from repo root):
+    python -m backend.benchmarks.llm_load_test
+"""
+import os
+import time
+import asyncio
+
+os.environ.setdefault("OPENROUTER_API_KEY", "fake-key")
+
+from openai import OpenAI
+from backend.benchmarks import fake_llm_server
+
+CONCURRENCY_LEVELS = [1, 8, 32, 64]
+
+class BlockingCompletions:
+    """Mimics the previous behaviour: a sync client called from inside async code."""
+    def __init__(self, base_url):
+        self._client = OpenAI(base_url=base_url, api_key="fake-key")
+
+    async def create(self, **kwargs):
+        return self._client.chat.completions.create(**kwargs)
+
+async def run_level(engine, concurrency: int, rounds: int = 2) -> float:
+    total = concurrency * rounds
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*[engine._generate_roadmap_llm("Cyber Security", "Beginner", goals=f"goal {i}")
+                               for i in range(concurrency)])
+    return total / (time.perf_counter() - start)
+
+async def main():
+    base_url = fake_llm_server.start_in_thread()
+    os.environ["OPENROUTER_BASE_URL"] = base_url
+
+    from backend.rag.engine import RAGEngine, create_llm_client
+    engine = RAGEngine()
+    engine.client = create_llm_client(base_url, "fake-key")
+    async_completions = engine.client.chat.completions
+    blocking_completions = BlockingCompletions(base_url)
+
+    print(f"Fake LLM latency: {fake_llm_server.LATENCY:.2f}s")
+    print(f"{'concurrency':>12} {'blocking req/s':>16} {'async req/s':>13}")
+    for concurrency in CONCURRENCY_LEVELS:
+        engine.client.chat.completions = blocking_completions
+        blocking = await run_level(engine, concurrency, rounds=1 if concurrency > 8 else 2)
+        engine.client.chat.completions = async_completions
+        non_blocking = await run_level(engine, concurrency)
+        print(f"{concurrency:>12} {blocking:>16.1f} {non_blocking:>13.1f}")
+
+    await engine.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
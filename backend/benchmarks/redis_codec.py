@@ -0,0 +1,77 @@
+"""
+Microbenchmark: Redis payload size and encode/decode time per chat codec.
+
+Builds a full chat session (20 messages: short user questions, long markdown
+assistant replies) and compares the legacy JSON format against msgpack, each
+with and without zlib compression of payloads >= 1 KiB.
+
+Bytes are the encoded payload sizes; if a Redis is reachable at REDIS_HOST/REDIS_PORT
+the session list's MEMORY USAGE is reported as well.
+
+Usage (from repo root):
+    python -m backend.benchmarks.redis_codec
+"""
+import os
+import time
+import redis
+from backend.storage.codec import Codec
+
+ROUNDS = 2000
+
+REPLY = (
+    "## Week 1: Web Security Fundamentals\n\n"
+    "- **HTTP basics**: methods, headers, cookies and the same-origin policy.\n"
+    "- **OWASP Top 10**: start with injection, broken access control and XSS.\n"
+    "- Practice on [PortSwigger Web Security Academy](https://portswigger.net/web-security).\n\n"
+    "Cross-site scripting (XSS) happens when untrusted input is rendered as HTML or JavaScript "
+    "without escaping. Reflected XSS comes from the request, stored XSS from the database, and "
+    "DOM-based XSS from client-side code. Defend with context-aware output encoding, a strict "
+    "Content-Security-Policy and HttpOnly cookies.\n"
+) * 2
+
+SESSION = [
+    msg for i in range(10) for msg in (
+        {"role": "user", "content": f"Can you explain topic {i} from my cyber security roadmap?"},
+        {"role": "assistant", "content": REPLY},
+    )
+]
+
+CODECS = {
+    "json (legacy)": Codec("json", 0),
+    "json+zlib": Codec("json", 1024),
+    "msgpack": Codec("msgpack", 0),
+    "msgpack+zlib": Codec("msgpack", 1024),
+}
+
+def time_per_message(fn, items) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS // len(items)):
+        for item in items:
+            fn(item)
+    return (time.perf_counter() - start) * 1e6 / (ROUNDS // len(items) * len(items))
+
+def redis_memory(codec: Codec):
+    host, port = os.getenv("REDIS_HOST", "localhost"), int(os.getenv("REDIS_PORT", 6379))
+    try:
+        client = redis.Redis(host=host, port=port, socket_connect_timeout=0.5)
+        client.delete("bench:codec")
+        client.rpush("bench:codec", *[codec.encode(m) for m in SESSION])
+        usage = client.memory_usage("bench:codec")
+        client.delete("bench:codec")
+        return usage
+    except redis.ConnectionError:
+        return None
+
+def main():
+    print(f"Session: {len(SESSION)} messages, assistant replies {len(REPLY)} chars")
+    print(f"{'codec':>14} {'bytes/session':>14} {'redis mem':>10} {'encode µs':>10} {'decode µs':>10}")
+    for name, codec in CODECS.items():
+        encoded = [codec.encode(m) for m in SESSION]
+        size = sum(len(e.encode("utf-8") if isinstance(e, str) else e) for e in encoded)
+        encode_us = time_per_message(codec.encode, SESSION)
+        decode_us = time_per_message(Codec.decode, encoded)
+        memory = redis_memory(codec)
+        print(f"{name:>14} {size:>14} {memory if memory is not None else 'n/a':>10} {encode_us:>10.2f} {decode_us:>10.2f}")
+
+if __name__ == "__main__":
+    main()
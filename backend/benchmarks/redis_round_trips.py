@@ -0,0 +1,100 @@
+"""
+Microbenchmark: Redis round-trips and latency per chat turn.
+
+"legacy" replays the previous storage pattern: a sync client and separate
+RPUSH/LTRIM/EXPIRE calls for each of the two messages, plus the context read.
+"async" uses RedisClient: one LRANGE for context and one pipelined transaction for both messages.
+
+Uses the Redis at REDIS_HOST/REDIS_PORT if reachable, otherwise fakeredis (counts only).
+
+Usage (from repo root):
+    python -m backend.benchmarks.redis_round_trips
+"""
+import os
+import json
+import time
+import asyncio
+import redis
+import redis.asyncio as aioredis
+from backend.storage.redis_client import RedisClient
+
+TURNS = 200
+
+class RoundTripCounter:
+    """Counts network round-trips: one per plain command, one per pipeline execute."""
+    def __init__(self):
+        self.count = 0
+
+    def wrap(self, client):
+        counter = self
+        original_execute_command = client.execute_command
+        original_pipeline = client.pipeline
+
+        def execute_command(*args, **kwargs):
+            counter.count += 1
+            return original_execute_command(*args, **kwargs)
+
+        def pipeline(*args, **kwargs):
+            pipe = original_pipeline(*args, **kwargs)
+            original_execute = pipe.execute
+            def execute(*a, **k):
+                counter.count += 1
+                return original_execute(*a, **k)
+            pipe.execute = execute
+            return pipe
+
+        client.execute_command = execute_command
+        client.pipeline = pipeline
+        return client
+
+def make_clients():
+    host, port = os.getenv("REDIS_HOST", "localhost"), int(os.getenv("REDIS_PORT", 6379))
+    try:
+        redis.Redis(host=host, port=port, socket_connect_timeout=0.5).ping()
+        return (redis.Redis(host=host, port=port, decode_responses=True),
+                aioredis.Redis(host=host, port=port, decode_responses=True), "redis")
+    except redis.ConnectionError:
+        import fakeredis
+        server = fakeredis.FakeServer()
+        return (fakeredis.FakeRedis(server=server, decode_responses=True),
+                fakeredis.FakeAsyncRedis(server=server, decode_responses=True), "fakeredis")
+
+def legacy_turn(client, session_id):
+    key = f"chat:{session_id}"
+    [json.loads(m) for m in client.lrange(key, -10, -1)]
+    for role, content in [("user", "what is xss?"), ("assistant", "Cross-site scripting is ...")]:
+        client.rpush(key, json.dumps({"role": role, "content": content}))
+        client.ltrim(key, -20, -1)
+        client.expire(key, 86400)
+
+async def async_turn(store, session_id):
+    await store.get_context(session_id)
+    await store.add_messages(session_id, [("user", "what is xss?"), ("assistant", "Cross-site scripting is ...")])
+
+async def main():
+    sync_client, async_client, backend = make_clients()
+
+    legacy_counter = RoundTripCounter()
+    legacy_counter.wrap(sync_client)
+    start = time.perf_counter()
+    for _ in range(TURNS):
+        legacy_turn(sync_client, "bench-legacy")
+    legacy_ms = (time.perf_counter() - start) * 1000 / TURNS
+
+    async_counter = RoundTripCounter()
+    store = RedisClient(client=async_counter.wrap(async_client))
+    start = time.perf_counter()
+    for _ in range(TURNS):
+        await async_turn(store, "bench-async")
+    async_ms = (time.perf_counter() - start) * 1000 / TURNS
+
+    sync_client.delete("chat:bench-legacy", "chat:bench-async")
+    print(f"Backend: {backend}, {TURNS} chat turns")
+    print(f"{'':>8} {'round-trips/turn':>17} {'writes/turn':>12} {'ms/turn':>8}")
+    print(f"{'legacy':>8} {legacy_counter.count / TURNS:>17.1f} {legacy_counter.count / TURNS - 1:>12.1f} {legacy_ms:>8.3f}")
+    print(f"{'async':>8} {async_counter.count / TURNS:>17.1f} {async_counter.count / TURNS - 1:>12.1f} {async_ms:>8.3f}")
+    if backend == "fakeredis":
+        print("(fakeredis: round-trip counts are exact, timings are not representative)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""
+Benchmark: top-k latency of the Chroma and NumPy retrievers at growing corpus sizes.
+
+  chroma  ChromaRetriever.search (langchain -> chromadb client -> HNSW, plus metadata/document fetch)
+  numpy   NumpyRetriever.search (one float32 matrix-vector product + argpartition), loaded from the
+          same Chroma collection with NumpyRetriever.from_chroma
+
+Synthetic 384-d vectors clustered around topics and tagged with roadmap ids like ingest.py does.
+Recall@k is Chroma's overlap with the exact top-k (the NumPy retriever is exact by construction).
+
+Usage (from repo root):
+    python -m backend.benchmarks.retriever_backends
+"""
+import time
+import numpy as np
+import chromadb
+from langchain_community.vectorstores import Chroma
+from backend.rag.departments import ROADMAP_IDS
+from backend.rag.retrievers import ChromaRetriever, NumpyRetriever
+
+SIZES = (500, 2_000, 10_000, 50_000, 100_000)
+QUERIES = 200
+K = 3
+DIM = 384
+ADD_BATCH = 5000
+TOPICS = 64
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+def main():
+    rng = np.random.default_rng(0)
+    client = chromadb.EphemeralClient()
+    print(f"k={K}, {QUERIES} queries per size, {DIM}-d float32")
+    print(f"{'chunks':>8} {'chroma p50 ms':>14} {'chroma p99 ms':>14} {'numpy p50 ms':>13} {'numpy p99 ms':>13} "
+          f"{'speedup':>8} {'chroma recall':>14} {'numpy load s':>13}")
+    for size in SIZES:
+        centers = rng.standard_normal((TOPICS, DIM))
+        vectors = (centers[rng.integers(TOPICS, size=size)] + 0.5 * rng.standard_normal((size, DIM))).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        store = Chroma(collection_name=f"bench-{size}", client=client)
+        for start in range(0, size, ADD_BATCH):
+            end = min(start + ADD_BATCH, size)
+            store._collection.add(
+                ids=[str(i) for i in range(start, end)], embeddings=vectors[start:end],
+                documents=[f"chunk {i}" for i in range(start, end)],
+                metadatas=[{"source": ROADMAP_IDS[i % len(ROADMAP_IDS)]} for i in range(start, end)])
+
+        load_start = time.perf_counter()
+        numpy_retriever = NumpyRetriever.from_chroma(store)
+        load_seconds = time.perf_counter() - load_start
+        chroma_retriever = ChromaRetriever(store, db_dir="")
+
+        queries = vectors[rng.choice(size, QUERIES)] + 0.1 * rng.standard_normal((QUERIES, DIM)).astype(np.float32)
+        timings = {"chroma": [], "numpy": []}
+        recall = []
+        for query in queries:
+            for name, retriever in (("chroma", chroma_retriever), ("numpy", numpy_retriever)):
+                start = time.perf_counter()
+                results = retriever.search(query, K)
+                timings[name].append(time.perf_counter() - start)
+                if name == "chroma":
+                    found = {d.page_content for d, _ in results}
+                else:
+                    recall.append(len(found & {d.page_content for d, _ in results}) / K)
+
+        speedup = np.median(timings["chroma"]) / np.median(timings["numpy"])
+        print(f"{size:>8} {percentile_ms(timings['chroma'], 50):>14.2f} {percentile_ms(timings['chroma'], 99):>14.2f} "
+              f"{percentile_ms(timings['numpy'], 50):>13.2f} {percentile_ms(timings['numpy'], 99):>13.2f} "
+              f"{speedup:>7.1f}x {np.mean(recall):>14.3f} {load_seconds:>13.2f}")
+        store.delete_collection()
+
+if __name__ == "__main__":
+    main()
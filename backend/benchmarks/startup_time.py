@@ -0,0 +1,48 @@
+"""
+Benchmark: process start to first served request, eager vs background retrieval loading.
+
+Each mode runs in a fresh interpreter so import costs are measured cold:
+  eager       imports the app and loads the embedding model + Chroma before serving
+              (what importing backend.rag.engine used to do)
+  background  imports the app and serves immediately; loading runs on a worker thread
+
+Reports import time, time to the first successful GET /, and time until retrieval is ready.
+
+Usage (from repo root):
+    python -m backend.benchmarks.startup_time
+"""
+import sys
+import json
+import subprocess
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.rag.engine import rag_engine
+imported = time.perf_counter()
+if sys.argv[1] == "eager":
+    rag_engine.load_retrieval()
+with TestClient(app) as client:
+    assert client.get("/").status_code == 200
+    first_request = time.perf_counter()
+    while rag_engine.retrieval_status in ("not_loaded", "loading"):
+        time.sleep(0.01)
+    ready = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_request": first_request - start,
+                  "retrieval": ready - start, "status": rag_engine.retrieval_status}))
+"""
+
+def run(mode: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", CHILD, mode], capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    print(f"{'mode':>11} {'import s':>9} {'first request s':>16} {'retrieval ready s':>18}  status")
+    for mode in ("eager", "background"):
+        r = run(mode)
+        print(f"{mode:>11} {r['import']:>9.2f} {r['first_request']:>16.2f} {r['retrieval']:>18.2f}  {r['status']}")
+
+if __name__ == "__main__":
+    main()
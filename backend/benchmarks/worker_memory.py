@@ -0,0 +1,78 @@
+"""
+Benchmark: memory per worker process when N workers each open the vector index.
+
+  private  every worker reads the index into its own memory (what RAG_RETRIEVER=numpy does)
+  mmap     every worker memory-maps the index files (RAG_RETRIEVER=mmap)
+
+Workers are spawned like uvicorn workers, open a synthetic index (50k x 384 float32 chunks) and
+run searches touching every row, then all report /proc/self/smaps_rollup while still alive:
+
+  RSS      resident pages, counting shared page-cache pages in full in every process
+  PSS      shared pages divided by the number of processes mapping them (sums to real usage)
+  private  pages only this process holds
+
+Linux only. Usage (from repo root):
+    python -m backend.benchmarks.worker_memory
+"""
+import os
+import tempfile
+import multiprocessing
+import numpy as np
+from langchain_core.documents import Document
+from backend.rag.departments import ROADMAP_IDS
+from backend.rag.mmap_index import write_mmap_index
+from backend.rag.retrievers import NumpyRetriever, MmapRetriever
+
+WORKERS = (1, 4, 8)
+CHUNKS = 50_000
+DIM = 384
+
+def memory_mb():
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {"rss": fields.get("Rss", 0), "pss": fields.get("Pss", 0), "private": private}
+
+def worker(path, mmap_mode, barrier, results):
+    retriever = MmapRetriever(path, mmap_mode=mmap_mode)
+    rng = np.random.default_rng(os.getpid())
+    for _ in range(5):
+        retriever.search(rng.standard_normal(DIM).astype(np.float32), 3)
+    barrier.wait()  # everyone has the index resident
+    results.put(memory_mb())
+    barrier.wait()  # stay alive until everyone has measured
+
+def run(path, mmap_mode, workers):
+    ctx = multiprocessing.get_context("spawn")
+    barrier, results = ctx.Barrier(workers), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(path, mmap_mode, barrier, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    samples = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return {key: np.mean([s[key] for s in samples]) for key in samples[0]}, sum(s["pss"] for s in samples)
+
+def main():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((CHUNKS, DIM)).astype(np.float32)
+    sources = [ROADMAP_IDS[i % len(ROADMAP_IDS)] for i in range(CHUNKS)]
+    documents = [Document(page_content=f"Roadmap chunk {i} " + "x" * 800, metadata={"source": s})
+                 for i, s in enumerate(sources)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_mmap_index(os.path.join(tmp, "mmap_index"), NumpyRetriever(vectors, documents, sources))
+        del vectors, documents
+        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 2**20
+        print(f"Index: {CHUNKS} chunks x {DIM}-d, {size:.0f} MB on disk")
+        print(f"{'mode':>8} {'workers':>8} {'RSS/worker MB':>14} {'PSS/worker MB':>14} {'private/worker MB':>18} {'total PSS MB':>13}")
+        for mode, mmap_mode in (("private", None), ("mmap", "r")):
+            for workers in WORKERS:
+                mean, total = run(path, mmap_mode, workers)
+                print(f"{mode:>8} {workers:>8} {mean['rss']:>14.0f} {mean['pss']:>14.0f} {mean['private']:>18.0f} {total:>13.0f}")
+
+if __name__ == "__main__":
+    main()
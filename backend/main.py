@@ -1,8 +1,13 @@
 import os
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from backend.api import router as api_router
 from backend.scheduler.tasks import start_scheduler
+from backend.storage.redis_client import RedisClient, close_connection_pools
+from backend.storage.local_cache import start_invalidation_listener, stop_invalidation_listener
+from backend.rag.loop_monitor import loop_monitor
 
 app = FastAPI(
     title="AI Learning Roadmap Assistant",
@@ -25,9 +30,42 @@ app.include_router(api_router, prefix="/api")
 @app.on_event("startup")
 async def startup_event():
     print("🚀 System Starting Up...")
-    start_scheduler()
+    start_scheduler(asyncio.get_running_loop())
     print("⏰ Scheduler Started")
+    try:
+        await RedisClient().load_scripts()
+        print("📜 Redis scripts loaded")
+    except Exception as e:
+        # Scripts are loaded lazily on first use if Redis is not up yet
+        print(f"⚠️ Could not preload Redis scripts: {e}")
+    start_invalidation_listener(os.getenv('REDIS_HOST', 'localhost'), int(os.getenv('REDIS_PORT', 6379)))
+    # Embedding model and vector DB load in the background; requests skip retrieval until ready
+    from backend.rag.engine import rag_engine
+    rag_engine.start_retrieval_loading()
+    loop_monitor.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    from backend.rag.engine import rag_engine
+    await rag_engine.aclose()
+    await loop_monitor.stop()
+    await stop_invalidation_listener()
+    await close_connection_pools()
+    print("🔌 LLM and Redis connections closed")
 
 @app.get("/")
 def read_root():
     return {"status": "active", "message": "AI Roadmap Assistant Backend is Running"}
+
+@app.get("/ready")
+def readiness(require_retrieval: bool = False):
+    """
+    Serving is possible as soon as the app is up; retrieval (vector DB, local intent
+    classifier, semantic cache) once background loading finishes. With
+    require_retrieval=true, returns 503 until then.
+    """
+    from backend.rag.engine import rag_engine
+    body = {"status": "ready" if rag_engine.retrieval_ready else "degraded", "retrieval": rag_engine.retrieval_status}
+    if require_retrieval and not rag_engine.retrieval_ready:
+        return JSONResponse(status_code=503, content=body)
+    return body
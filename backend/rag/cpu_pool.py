@@ -0,0 +1,65 @@
+import os
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+# Where CPU-bound retrieval work (vector index search) runs: "thread" or "process" pool
+RAG_CPU_EXECUTOR = os.getenv("RAG_CPU_EXECUTOR", "thread")
+RAG_CPU_WORKERS = int(os.getenv("RAG_CPU_WORKERS", min(4, os.cpu_count() or 1)))
+# Jobs allowed to wait for a worker; beyond that new jobs are rejected instead of piling up
+RAG_CPU_QUEUE_DEPTH = int(os.getenv("RAG_CPU_QUEUE_DEPTH", 32))
+
+class CPUPoolSaturated(Exception):
+    """All workers are busy and the wait queue is full."""
+
+class CPUPool:
+    """
+    Bounded executor for CPU-bound work called from async code, so it never runs on the event loop.
+    At most `workers + queue_depth` jobs are outstanding; run() raises CPUPoolSaturated beyond that,
+    which pipeline stages treat like any other stage failure (the query proceeds without that stage).
+
+    In "process" mode, `fn` and its arguments must be picklable (module-level functions).
+    """
+    def __init__(self, kind: str = RAG_CPU_EXECUTOR, workers: int = RAG_CPU_WORKERS,
+                 queue_depth: int = RAG_CPU_QUEUE_DEPTH):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown CPU executor: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self._executor: Executor = None
+        self._in_flight = 0
+        self.stats = {"submitted": 0, "rejected": 0, "max_in_flight": 0}
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # spawn: forking a process that already runs threads (Redis, HTTP pools) is unsafe
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="rag-cpu")
+        return self._executor
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        if self._in_flight >= self.workers + self.queue_depth:
+            self.stats["rejected"] += 1
+            raise CPUPoolSaturated(f"{self._in_flight} CPU jobs outstanding")
+        self._in_flight += 1
+        self.stats["submitted"] += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self._in_flight)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), functools.partial(fn, *args, **kwargs))
+        finally:
+            self._in_flight -= 1
+
+    def snapshot(self) -> Dict:
+        return {"kind": self.kind, "workers": self.workers, "queue_depth": self.queue_depth,
+                "in_flight": self._in_flight, **self.stats}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
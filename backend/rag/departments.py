@@ -0,0 +1,32 @@
+from typing import Dict, List, Optional
+
+# roadmap.sh roadmaps fetched at ingest; the id is stored as chunk metadata "source"
+ROADMAP_IDS = ["cyber-security", "frontend", "backend", "devops", "python", "javascript", "react"]
+
+# Roadmaps (ROADMAP_IDS) searched for each department.
+# After remapping, rebuild the department collections: python -m backend.rag.ingest --department-indexes
+DEPARTMENT_ROADMAPS: Dict[str, List[str]] = {
+    "Cyber Security": ["cyber-security", "devops", "backend"],
+    "Computer Science": ["python", "javascript", "backend", "frontend"],
+    "Artificial Intelligence": ["python"],
+    "IoT": ["python", "cyber-security", "devops"],
+    "Data Science": ["python"],
+    "Software Engineering": ["frontend", "backend", "devops", "javascript", "react", "python"],
+}
+
+def roadmaps_for(department: Optional[str]) -> Optional[List[str]]:
+    """Roadmap ids in scope for `department`, or None to search the whole knowledge base."""
+    return DEPARTMENT_ROADMAPS.get(department or "")
+
+def department_collection(department: str) -> str:
+    """Name of the department's own Chroma collection (a copy of its roadmaps' chunks, built at ingest)."""
+    return "dept-" + "-".join(department.lower().split())
+
+def department_filter(department: Optional[str]) -> Optional[Dict]:
+    """Chroma `where` filter restricting a search to the department's roadmaps (None: unscoped)."""
+    roadmaps = roadmaps_for(department)
+    if not roadmaps:
+        return None
+    if len(roadmaps) == 1:
+        return {"source": roadmaps[0]}
+    return {"source": {"$in": roadmaps}}
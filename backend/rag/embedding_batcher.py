@@ -0,0 +1,92 @@
+import os
+import asyncio
+from typing import List, Optional, Tuple
+import numpy as np
+from backend.rag.cpu_pool import CPUPool, CPUPoolSaturated
+
+# Group query embeddings from concurrent requests into one batched forward pass
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "true").lower() == "true"
+# Max time the first text of a batch waits for company, and max texts per forward pass.
+# With 0, a batch is whatever arrived in the same event-loop turn or while the previous batch ran:
+# no added latency at low load, and batches still fill up under load.
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", 0))
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", 32))
+# Texts allowed to wait for a batch; beyond that embed() is rejected instead of piling up
+EMBED_QUEUE_MAX = int(os.getenv("EMBED_QUEUE_MAX", 256))
+
+class EmbeddingBatcher:
+    """
+    Micro-batching front end for an embedding model.
+
+    Texts passed to embed() are queued; the queue is flushed as one embed_documents() call when
+    it reaches `max_batch` texts or `window` seconds after its first text, whichever comes first.
+    Batches run one at a time on `pool` (a CPUPool; by default a private single thread); texts
+    arriving while one runs simply join the next batch, so batches grow with load and a lone
+    request only waits `window`. At most `max_queue` texts wait; embed() raises CPUPoolSaturated
+    beyond that, like the pool itself when it is full.
+    """
+    def __init__(self, embeddings, window: float = EMBED_BATCH_WINDOW_MS / 1000, max_batch: int = EMBED_BATCH_MAX,
+                 pool: Optional[CPUPool] = None, max_queue: int = EMBED_QUEUE_MAX):
+        self.embeddings = embeddings
+        self.window = window
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self._owns_pool = pool is None
+        self.pool = pool or CPUPool("thread", workers=1, queue_depth=0)
+        self._queue: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running = False
+        self.stats = {"batches": 0, "texts": 0, "max_batch_size": 0, "rejected": 0}
+
+    async def embed(self, text: str) -> np.ndarray:
+        if len(self._queue) >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise CPUPoolSaturated(f"{len(self._queue)} texts waiting for an embedding batch")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((text, future))
+        if len(self._queue) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._running or not self._queue:
+            # The running batch dispatches the queue when it finishes
+            return
+        batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+        self._running = True
+        asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        # Identical texts in one batch (e.g. the same query from intent + retrieval) are embedded once
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = await self.pool.run(self.embeddings.embed_documents, texts)
+            by_text = {t: np.asarray(v, dtype=np.float32) for t, v in zip(texts, vectors)}
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(by_text[text])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.stats["batches"] += 1
+            self.stats["texts"] += len(batch)
+            self.stats["max_batch_size"] = max(self.stats["max_batch_size"], len(batch))
+            self._running = False
+            if self._queue:
+                self._flush()
+
+    def snapshot(self):
+        batches = self.stats["batches"]
+        return {**self.stats, "mean_batch_size": round(self.stats["texts"] / batches, 2) if batches else 0.0}
+
+    def close(self):
+        if self._owns_pool:
+            self.pool.shutdown()
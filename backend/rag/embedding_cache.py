@@ -0,0 +1,112 @@
+import os
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional
+import numpy as np
+from backend.rag.cpu_pool import CPUPool
+from backend.rag.semantic_cache import decode_vector
+
+# Query embeddings kept in-process (384 float32 = 1.5 KB each for all-MiniLM-L6-v2)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 2048))
+# Also share embeddings between workers/restarts through Redis (packed float32 bytes)
+EMBEDDING_CACHE_REDIS = os.getenv("EMBEDDING_CACHE_REDIS", "false").lower() == "true"
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", 7 * 86400))
+
+def normalize_query(text: str) -> str:
+    """Cache key text: case and whitespace do not change the (uncased) MiniLM embedding."""
+    return " ".join(text.lower().split())
+
+class EmbeddingCache:
+    """
+    LRU of normalized query text -> raw query embedding (float32), shared by every retrieval
+    path (vector search, intent classification, semantic cache), so a query is embedded at most
+    once per turn and repeated questions skip the transformer forward pass entirely.
+
+    Concurrent misses for the same text share one computation, run as its own shielded task
+    so a caller being cancelled (timeout, client disconnect) does not fail the others. With a Redis `client`, misses
+    are looked up in / written to `embcache:{model}:{sha256}` before computing. With a
+    `batcher` (EmbeddingBatcher), computations are micro-batched with other requests' misses;
+    without one, each runs on `pool` (a CPUPool; by default a private one).
+    """
+    def __init__(self, embeddings, model_name: str = "all-MiniLM-L6-v2", max_entries: int = EMBEDDING_CACHE_SIZE,
+                 client=None, ttl: int = EMBEDDING_CACHE_TTL, batcher=None, pool: Optional[CPUPool] = None):
+        self.embeddings = embeddings
+        self.batcher = batcher
+        self.pool = pool or CPUPool("thread")
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.client = client
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.stats = {"hits": 0, "redis_hits": 0, "misses": 0}
+
+    def _redis_key(self, text: str) -> str:
+        return f"embcache:{self.model_name}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    async def embed(self, query: str) -> np.ndarray:
+        """Embedding of `query` (treat as read-only: it is shared with the cache)."""
+        text = normalize_query(query)
+        vector = self._entries.get(text)
+        if vector is not None:
+            self._entries.move_to_end(text)
+            self.stats["hits"] += 1
+            return vector
+
+        task = self._pending.get(text)
+        if task is not None:
+            self.stats["hits"] += 1
+        else:
+            task = asyncio.create_task(self._load_and_put(text))
+            self._pending[text] = task
+            task.add_done_callback(lambda t: self._finish(text, t))
+        return await asyncio.shield(task)
+
+    def _finish(self, text: str, task: asyncio.Task):
+        self._pending.pop(text, None)
+        if not task.cancelled():
+            task.exception()  # mark retrieved: waiters re-raise it, nobody else needs to
+
+    async def _load_and_put(self, text: str) -> np.ndarray:
+        vector = await self._load(text)
+        self._put(text, vector)
+        return vector
+
+    async def _load(self, text: str) -> np.ndarray:
+        if self.client is not None:
+            try:
+                data = await self.client.get(self._redis_key(text))
+                if data is not None:
+                    self.stats["redis_hits"] += 1
+                    return decode_vector(data)
+            except Exception as e:
+                print(f"⚠️ Embedding Cache Redis Error: {e}")
+
+        self.stats["misses"] += 1
+        if self.batcher is not None:
+            vector = await self.batcher.embed(text)
+        else:
+            vector = np.asarray(await self.pool.run(self.embeddings.embed_query, text), dtype=np.float32)
+        if self.client is not None:
+            try:
+                await self.client.set(self._redis_key(text), vector.tobytes(), ex=self.ttl)
+            except Exception as e:
+                print(f"⚠️ Embedding Cache Redis Error: {e}")
+        return vector
+
+    def _put(self, text: str, vector: np.ndarray):
+        vector.flags.writeable = False
+        self._entries[text] = vector
+        self._entries.move_to_end(text)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def snapshot(self) -> Dict:
+        lookups = self.stats["hits"] + self.stats["redis_hits"] + self.stats["misses"]
+        return {
+            "entries": len(self._entries),
+            "redis": self.client is not None,
+            **self.stats,
+            "hit_rate": round((self.stats["hits"] + self.stats["redis_hits"]) / lookups, 4) if lookups else 0.0,
+        }
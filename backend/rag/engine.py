@@ -7,33 +7,90 @@ from typing import List, Dict, Any
 
 import os
 import json
-from typing import List, Dict, Any, Optional
+import asyncio
+import hashlib
+import time
+from contextlib import aclosing
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
 from duckduckgo_search import DDGS
-from openai import OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DEFAULT_CONNECTION_LIMITS
 from dotenv import load_dotenv
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import SentenceTransformerEmbeddings
 
 load_dotenv()
 
 from backend.storage.redis_client import RedisClient
+from backend.rag.intent import IntentClassifier
+from backend.rag.semantic_cache import SemanticCache, normalize, SEMANTIC_CACHE_HISTORY_RELEVANCE
+from backend.rag.embedding_cache import EmbeddingCache, EMBEDDING_CACHE_REDIS
+from backend.rag.embedding_batcher import EmbeddingBatcher, EMBED_BATCHING
+from backend.rag.cpu_pool import CPUPool
+from backend.rag.retrieval_cache import RetrievalCache
+from backend.rag.retrievers import load_retriever
+from backend.rag.roadmap_cache import RoadmapCache, KNOWN_DEPARTMENTS, ROADMAP_LEVELS
+from backend.rag.singleflight import SingleFlight
+from backend.rag.model_health import ModelHealthRegistry
+from backend.rag.hedging import HedgeBudget, hedge_delay, LLM_HEDGING, HEDGE_PERCENTILE
+
+# Size of the shared HTTP connection pool used for all LLM calls
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 100))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", 20))
+
+def create_llm_client(base_url: str, api_key: str) -> AsyncOpenAI:
+    """Async OpenAI-compatible client backed by one pooled HTTP connection pool."""
+    # Limits class comes from whichever httpx flavour the installed openai release uses
+    limits = type(DEFAULT_CONNECTION_LIMITS)(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE,
+    )
+    http_client = DefaultAsyncHttpxClient(limits=limits)
+    return AsyncOpenAI(base_url=base_url, api_key=api_key, http_client=http_client)
+
+# Query pipeline: "concurrent" overlaps history/classify/retrieval, "sequential" runs them in order
+PIPELINE_MODE = os.getenv("RAG_PIPELINE_MODE", "concurrent")
+# Start the web search before the intent is known (costs a DDG call per query)
+SPECULATIVE_SEARCH = os.getenv("RAG_SPECULATIVE_SEARCH", "false").lower() == "true"
+# Documents fetched by the single retrieval stage of a query; roadmap prompts use all of them,
+# chat prompts the top CHAT_RETRIEVAL_K (so RETRIEVAL_K should be the larger of the two)
+RETRIEVAL_K = int(os.getenv("RAG_RETRIEVAL_K", 3))
+CHAT_RETRIEVAL_K = int(os.getenv("RAG_CHAT_RETRIEVAL_K", 2))
+
+# Per-stage timeouts (seconds); a timed-out stage falls back to an empty/default result
+STAGE_TIMEOUTS = {
+    "history": float(os.getenv("RAG_TIMEOUT_HISTORY", 1.0)),
+    "classify": float(os.getenv("RAG_TIMEOUT_CLASSIFY", 10.0)),
+    "retrieval": float(os.getenv("RAG_TIMEOUT_RETRIEVAL", 5.0)),
+    "search": float(os.getenv("RAG_TIMEOUT_SEARCH", 8.0)),
+}
+
+class AllModelsFailed(Exception):
+    """No model in the priority list produced a response."""
 
 class RAGEngine:
     def __init__(self):
         self.api_key = os.getenv("OPENROUTER_API_KEY")
-        self.base_url = "https://openrouter.ai/api/v1"
-        self.client = OpenAI(base_url=self.base_url, api_key=self.api_key)
+        self.base_url = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+        self.client = create_llm_client(self.base_url, self.api_key)
         self.redis = RedisClient()
+        self.roadmap_cache = RoadmapCache(self.redis.client)
+        self._roadmap_refreshes: Dict[str, asyncio.Task] = {}
+        # Identical in-flight LLM work (roadmaps, classifications, prompts) is shared between callers
+        self.singleflight = SingleFlight(self.redis.client)
         
-        # Initialize Vector DB for Retrieval
+        # Vector DB, embedding model and the features built on them are loaded by load_retrieval(),
+        # in the background after startup. Until then they are None and requests skip retrieval.
         self.db_dir = "./backend/vector_db"
-        try:
-            self.embeddings = SentenceTransformerEmbeddings(model_name="all-MiniLM-L6-v2")
-            self.vector_db = Chroma(persist_directory=self.db_dir, embedding_function=self.embeddings)
-            print("✅ Vector DB Loaded.")
-        except Exception as e:
-            print(f"⚠️ Vector DB Load Error: {e}")
-            self.vector_db = None
+        self.embeddings = None
+        self.embedding_cache = None
+        self.retriever = None  # retrievers.Retriever selected by RAG_RETRIEVER
+        self.intent_classifier = None
+        self.semantic_cache = None
+        self.retrieval_status = "not_loaded"  # -> loading -> ready | failed
+        self._retrieval_task: Optional[asyncio.Task] = None
+        # Vector index searches run here, never on the event loop (bounded thread or process pool)
+        self.cpu_pool = CPUPool()
+        # Query embeddings too; the model lives in this process, so in process mode they get their own threads
+        self.embed_pool = self.cpu_pool if self.cpu_pool.kind == "thread" else CPUPool("thread")
+        self.retrieval_cache = RetrievalCache()
         
         # Priority list of free models to try
         self.models = [
@@ -44,8 +101,67 @@ class RAGEngine:
             "microsoft/phi-3-medium-128k-instruct:free",
             "openrouter/auto:free"
         ]
-        self.current_model_index = 0
-        self.model = self.models[0]
+        # Per-model latency/error stats and circuit breakers decide which model serves each call
+        self.health = ModelHealthRegistry(self.models)
+        self.hedge_budget = HedgeBudget()
+
+    def load_retrieval(self):
+        """
+        Loads the embedding model and vector index (blocking, seconds on a cold start), then the
+        intent classifier and semantic cache that reuse them. Each attribute is published only once
+        fully built, so concurrent requests see either nothing or a working component.
+        """
+        self.retrieval_status = "loading"
+        try:
+            # Imported here: langchain/chromadb alone take seconds to import
+            from langchain_community.embeddings import SentenceTransformerEmbeddings
+
+            embeddings = SentenceTransformerEmbeddings(model_name="all-MiniLM-L6-v2")
+            retriever = load_retriever(self.db_dir, embeddings)
+            self.embeddings = embeddings
+            # Every query embedding (retrieval, intent, semantic cache) goes through this cache;
+            # misses from concurrent requests are embedded together in micro-batches
+            self.embedding_cache = EmbeddingCache(
+                embeddings,
+                client=self.redis.client if EMBEDDING_CACHE_REDIS else None,
+                batcher=EmbeddingBatcher(embeddings, pool=self.embed_pool) if EMBED_BATCHING else None,
+                pool=self.embed_pool,
+            )
+            self.retriever = retriever
+            print(f"✅ Vector DB Loaded ({retriever.name} retriever).")
+        except Exception as e:
+            print(f"⚠️ Vector DB Load Error: {e}")
+            self.retrieval_status = "failed"
+            return
+
+        # Local intent classifier reuses the loaded embedding model
+        try:
+            self.intent_classifier = IntentClassifier(self.embeddings)
+            print("✅ Intent Classifier Ready.")
+        except Exception as e:
+            print(f"⚠️ Intent Classifier Error: {e}")
+
+        # Semantic answer cache needs query embeddings, so it is only enabled with the vector DB
+        self.semantic_cache = SemanticCache(self.redis.client)
+        self.retrieval_status = "ready"
+
+    def start_retrieval_loading(self) -> Optional[asyncio.Task]:
+        """Runs load_retrieval() on a worker thread (called on app startup); no-op if already loading or loaded."""
+        if self._retrieval_task is None and self.retrieval_status == "not_loaded":
+            self._retrieval_task = asyncio.create_task(asyncio.to_thread(self.load_retrieval))
+        return self._retrieval_task
+
+    @property
+    def retrieval_ready(self) -> bool:
+        return self.retrieval_status == "ready"
+
+    async def aclose(self):
+        """Closes the pooled LLM connections and the CPU pools (called on app shutdown)."""
+        await self.client.close()
+        if self.embedding_cache and self.embedding_cache.batcher:
+            self.embedding_cache.batcher.close()
+        self.cpu_pool.shutdown()
+        self.embed_pool.shutdown()
 
     def search_web(self, query: str, max_results: int = 3) -> List[Dict[str, str]]:
         """Tool: Real-time Web Search"""
@@ -70,11 +186,25 @@ class RAGEngine:
             })
         return results
 
-    def _classify_intent(self, user_query: str) -> str:
-        """Step 1: Identify/Classify Intent"""
+    async def _classify_intent(self, user_query: str) -> str:
+        """Step 1: Identify/Classify Intent (locally first, LLM only for ambiguous queries)"""
+        if self.intent_classifier:
+            try:
+                vector = await self.embedding_cache.embed(user_query)
+                intent, confident = self.intent_classifier.classify(user_query, vector)
+                if confident:
+                    return intent
+                print(f"🤔 Ambiguous intent (local guess: {intent}), asking LLM...")
+            except Exception as e:
+                print(f"⚠️ Local Classification Error: {e}")
+
         if not self.api_key:
             return "chat"
-            
+
+        key = "intent:" + hashlib.sha256(user_query.strip().lower().encode("utf-8")).hexdigest()
+        return await self.singleflight.do(key, lambda: self._classify_intent_llm(user_query))
+
+    async def _classify_intent_llm(self, user_query: str) -> str:
         system_prompt = (
             "You are the 'Brain' of an educational chatbot. "
             "Classify the user's input into exactly one of these categories:\n"
@@ -84,9 +214,13 @@ class RAGEngine:
             "Output ONLY the category name."
         )
         
+        model = self._pick_model()
+        if model is None:
+            return self._keyword_intent(user_query)
+
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response = await self._create_completion(
+                model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_query}
@@ -98,36 +232,145 @@ class RAGEngine:
             return "chat"
         except Exception as e:
             print(f"Classification Error: {e}")
-            # Fallback Logic
-            q = user_query.lower()
-            if "roadmap" in q or "plan" in q or "path" in q: return "roadmap"
-            if "find" in q or "search" in q or "tutorial" in q or "resource" in q: return "search"
-            return "chat"
+            return self._keyword_intent(user_query)
+
+    @staticmethod
+    def _keyword_intent(user_query: str) -> str:
+        """Fallback Logic: crude keyword classification."""
+        q = user_query.lower()
+        if "roadmap" in q or "plan" in q or "path" in q: return "roadmap"
+        if "find" in q or "search" in q or "tutorial" in q or "resource" in q: return "search"
+        return "chat"
 
-    async def process_query(self, query: str, department: str, session_id: str = None) -> str:
+    async def _run_stage(self, name: str, coro, default):
+        """Awaits one pipeline stage under its timeout, returning `default` on timeout or error."""
+        try:
+            return await asyncio.wait_for(coro, timeout=STAGE_TIMEOUTS[name])
+        except asyncio.TimeoutError:
+            print(f"⏱️ Stage '{name}' timed out after {STAGE_TIMEOUTS[name]}s")
+        except Exception as e:
+            print(f"⚠️ Stage '{name}' failed: {e}")
+        return default
+
+    async def _retrieve(self, query: str, session_id: str = None, department: str = None) -> List[Tuple[Any, float]]:
         """
-        Pipeline: Input -> Context -> Classify -> Function Call -> Response
+        RAG Retrieval from the vector DB: the query's top RETRIEVAL_K (document, distance) pairs,
+        best first (empty if unavailable), restricted to the department's roadmaps when it has any.
+        Runs once per query; repeats within a session are served from the retrieval cache.
         """
-        if not self.api_key:
-             return "⚠️ API Key missing. Please check .env file."
+        if not self.retriever:
+            return []
+        scope = self.retriever.scope(department)
+        cached = self.retrieval_cache.get(session_id, query, scope)
+        if cached is not None:
+            return cached
+        print(f"🔍 Searching Vector DB ({scope or 'all roadmaps'})...")
+        vector = await self.embedding_cache.embed(query)
+        if self.cpu_pool.kind == "process":
+            search, args = self.retriever.remote_call(vector.tolist(), RETRIEVAL_K, department)
+            scored = await self.cpu_pool.run(search, *args)
+        else:
+            scored = await self.cpu_pool.run(self.retriever.search, vector, RETRIEVAL_K, department)
+        self.retrieval_cache.set(session_id, query, scored, scope)
+        return scored
+
+    async def _get_history(self, session_id: str) -> List[Dict[str, str]]:
+        if not session_id:
+            return []
+        return await self.redis.get_context(session_id)
+
+    async def _gather_sequential(self, query: str, department: str, session_id: str, history=None, intent=None):
+        """Original ordering: history -> classify -> search/retrieval for the detected intent only."""
+        if history is None:
+            history = await self._run_stage("history", self._get_history(session_id), [])
+        if intent is None:
+            intent = await self._run_stage("classify", self._classify_intent(query), self._keyword_intent(query))
+        results, docs = [], []
+        if intent == "search":
+            results = await self._run_stage("search", asyncio.to_thread(self.search_web, f"{department} {query}"), [])
+        else:
+            docs = await self._run_stage("retrieval", self._retrieve(query, session_id, department), [])
+        return history, intent, docs, results
+
+    async def _gather_concurrent(self, query: str, department: str, session_id: str, history=None, intent=None,
+                                 retrieval_task: Optional[asyncio.Task] = None):
+        """
+        Starts history, classification, retrieval (and optionally web search) together.
+        Once the intent is known, the branch it does not need is cancelled and discarded,
+        so the critical path is the slowest needed stage rather than the sum of all stages.
+        Stages whose result or task is passed in (history, intent, retrieval) are not started again;
+        a passed-in task is owned from then on. Stages still running when this returns or is
+        cancelled (client disconnect, stage timeout) are cancelled.
+        """
+        history_task = intent_task = search_task = None
+        try:
+            if history is None:
+                history_task = asyncio.create_task(self._run_stage("history", self._get_history(session_id), []))
+            if intent is None:
+                intent_task = asyncio.create_task(self._run_stage("classify", self._classify_intent(query), self._keyword_intent(query)))
+            if retrieval_task is None:
+                retrieval_task = self._start_retrieval(query, department, session_id)
+            if SPECULATIVE_SEARCH:
+                search_task = asyncio.create_task(self._run_stage("search", asyncio.to_thread(self.search_web, f"{department} {query}"), []))
+
+            if intent_task is not None:
+                intent = await intent_task
+            results, docs = [], []
+            if intent == "search":
+                retrieval_task.cancel()
+                if search_task is None:
+                    search_task = asyncio.create_task(self._run_stage("search", asyncio.to_thread(self.search_web, f"{department} {query}"), []))
+                results = await search_task
+            else:
+                if search_task is not None:
+                    search_task.cancel()
+                docs = await retrieval_task
+            if history_task is not None:
+                history = await history_task
+            return history, intent, docs, results
+        finally:
+            for task in (history_task, intent_task, retrieval_task, search_task):
+                if task is not None and not task.done():
+                    task.cancel()
 
+    def _start_retrieval(self, query: str, department: str, session_id: str) -> asyncio.Task:
+        return asyncio.create_task(self._run_stage("retrieval", self._retrieve(query, session_id, department), []))
+
+    def _start_early_retrieval(self, query: str, department: str, session_id: str, use_cache: bool) -> Optional[asyncio.Task]:
+        """
+        With a semantic cache probe ahead of the pipeline, retrieval starts alongside the probe
+        (concurrent mode), so a cache miss costs no more than running the pipeline directly.
+        """
+        if use_cache and self.semantic_cache and PIPELINE_MODE == "concurrent":
+            return self._start_retrieval(query, department, session_id)
+        return None
+
+    async def _build_prompt(self, query: str, department: str, session_id: str = None,
+                            probe: Optional[Dict[str, Any]] = None,
+                            retrieval_task: Optional[asyncio.Task] = None) -> Tuple[str, str, str]:
+        """
+        Pipeline: Input -> Context -> Classify -> Function Call
+        Returns (system_instruction, full_prompt, external_context) for the final LLM call.
+        History and intent already fetched by a semantic cache probe, and a retrieval already
+        started next to it, are reused.
+        """
         print(f"🧠 Processing: '{query}' for {department} (Session: {session_id})")
-        
-        # 0. Retrieve Context
-        history = self.redis.get_context(session_id) if session_id else []
-        context_block = "\n".join([f"{msg['role']}: {msg['content']}" for msg in history])
-        
-        # 1. Classify
-        intent = self._classify_intent(query)
+        known = {"history": probe["history"], "intent": probe["intent"]} if probe else {}
+
+        # 0-1. Retrieve Context, Classify and fetch external data
+        if PIPELINE_MODE == "concurrent":
+            history, intent, docs, results = await self._gather_concurrent(query, department, session_id, **known,
+                                                                            retrieval_task=retrieval_task)
+        else:
+            history, intent, docs, results = await self._gather_sequential(query, department, session_id, **known)
         print(f"👉 Intent Detected: {intent}")
-        
-        external_context = ""
-        system_instruction = ""
+        # One scored retrieval per query; each branch takes the slice it needs
+        docs = [doc for doc, _ in docs]
+        context_block = "\n".join([f"{msg['role']}: {msg['content']}" for msg in history])
         
         # 2. Function Call logic
         if intent == "search":
             # Web Search
-            results = self.search_web(f"{department} {query}")
             external_context = "Web Search Results:\n" + "\n".join([f"- {r['title']}: {r['snippet']} ({r['link']})" for r in results])
             system_instruction = "You are a helpful assistant. Use the provided Search Results to answer the user."
             
@@ -135,71 +378,386 @@ class RAGEngine:
             # RAG Retrieval
             system_instruction = "You are a mentor. Use the provided Roadmap Context to outline a learning path."
             external_context = f"User wants a roadmap for {department}."
-            
-            if self.vector_db:
-                try:
-                    print("🔍 Searching Vector DB...")
-                    docs = self.vector_db.similarity_search(query, k=3)
-                    retrieved_text = "\n\n".join([f"[Source: {d.metadata.get('source', 'Unknown')}]\n{d.page_content}" for d in docs])
-                    external_context += f"\n\nRoadmap Context (Retrieved):\n{retrieved_text}"
-                except Exception as e:
-                    print(f"⚠️ Retrieval Error: {e}")
+            if docs:
+                retrieved_text = "\n\n".join([f"[Source: {d.metadata.get('source', 'Unknown')}]\n{d.page_content}" for d in docs])
+                external_context += f"\n\nRoadmap Context (Retrieved):\n{retrieved_text}"
             
         else: # Chat
             system_instruction = "You are a friendly AI mentor. Answer directly, using the conversation history for context."
             external_context = "General conversation."
             
-            # Optional: Also try retrieval for chat if it seems technical
-            if self.vector_db:
-                 try:
-                    docs = self.vector_db.similarity_search(query, k=2)
-                    retrieved_text = "\n".join([d.page_content for d in docs])
-                    external_context += f"\n\nRelevant Context:\n{retrieved_text}"
-                 except: pass
-
-        # 3. Final Response Generation
+            # Optional: Also use retrieval for chat if it seems technical
+            if docs:
+                retrieved_text = "\n".join([d.page_content for d in docs[:CHAT_RETRIEVAL_K]])
+                external_context += f"\n\nRelevant Context:\n{retrieved_text}"
+
         full_prompt = f"History:\n{context_block}\n\nContext:\n{external_context}\n\nUser Query: {query}"
-        
-        for attempt in range(len(self.models)):
-            try:
-                print(f"🤖 Using Model: {self.model}")
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": system_instruction},
-                        {"role": "user", "content": full_prompt}
-                    ]
-                )
-                ai_response = response.choices[0].message.content
-                
-                # 4. Save to Redis
-                if session_id:
-                    self.redis.add_message(session_id, "user", query)
-                    self.redis.add_message(session_id, "assistant", ai_response)
-                    
-                return ai_response
+        return system_instruction, full_prompt, external_context
 
-            except Exception as e:
-                print(f"⚠️ Error with {self.model}: {e}")
-                # Switch to next model
-                self.current_model_index = (self.current_model_index + 1) % len(self.models)
-                self.model = self.models[self.current_model_index]
-                continue
+    async def _semantic_cache_probe(self, query: str, department: str, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetches history, intent and the query embedding, then looks for a cached answer.
+        The cache is only consulted when history is empty or unrelated to the new query
+        (last user message below SEMANTIC_CACHE_HISTORY_RELEVANCE similarity).
+        Returns None if the cache is unavailable, so the caller falls back to the normal pipeline.
+        """
+        try:
+            history, intent, vector = await asyncio.gather(
+                self._run_stage("history", self._get_history(session_id), []),
+                self._run_stage("classify", self._classify_intent(query), self._keyword_intent(query)),
+                self.embedding_cache.embed(query)
+            )
+            vector = normalize(vector)
+
+            last_user = next((m["content"] for m in reversed(history) if m["role"] == "user"), None)
+            cacheable = True
+            if last_user:
+                last_vector = normalize(await self.embedding_cache.embed(last_user))
+                cacheable = float(vector @ last_vector) < SEMANTIC_CACHE_HISTORY_RELEVANCE
+
+            hit = None
+            if cacheable:
+                hit = await self.semantic_cache.lookup(department, intent, vector)
+            return {"history": history, "intent": intent, "vector": vector, "cacheable": cacheable, "hit": hit}
+        except Exception as e:
+            print(f"⚠️ Semantic Cache Error: {e}")
+            return None
+
+    async def _check_semantic_cache(self, query: str, department: str, session_id: str,
+                                    use_cache: bool) -> Tuple[Optional[Dict[str, Any]], Optional[asyncio.Task]]:
+        """
+        Runs the semantic cache probe (when enabled) with retrieval already started next to it.
+        Returns (probe, retrieval task); the task must be passed on to _build_prompt, which owns it
+        from then on. It is cancelled here on a cache hit or if the probe is interrupted.
+        """
+        retrieval_task = self._start_early_retrieval(query, department, session_id, use_cache)
+        if not (use_cache and self.semantic_cache):
+            return None, retrieval_task
+        try:
+            probe = await self._semantic_cache_probe(query, department, session_id)
+        except BaseException:
+            if retrieval_task:
+                retrieval_task.cancel()
+            raise
+        if probe and probe["hit"] and retrieval_task:
+            retrieval_task.cancel()
+            retrieval_task = None
+        return probe, retrieval_task
+
+    async def _semantic_cache_store(self, probe: Optional[Dict[str, Any]], department: str, query: str, ai_response: str):
+        if not probe or not probe["cacheable"]:
+            return
+        try:
+            await self.semantic_cache.store(department, probe["intent"], query, probe["vector"], ai_response)
+        except Exception as e:
+            print(f"⚠️ Semantic Cache Store Error: {e}")
+
+    async def _save_turn(self, session_id: str, query: str, ai_response: str):
+        """Persists one user/assistant exchange to Redis in a single round-trip."""
+        if session_id:
+            await self.redis.add_messages(session_id, [("user", query), ("assistant", ai_response)])
+
+    def _pick_model(self) -> Optional[str]:
+        """Best model whose circuit breaker currently lets a request through."""
+        return next((m for m in self.health.candidates() if self.health.acquire(m)), None)
+
+    def _usable_models(self):
+        """Yields models best-first, claiming each one's breaker slot just before it is tried."""
+        for model in self.health.candidates():
+            if self.health.acquire(model):
+                yield model
+
+    async def _create_completion(self, model: str, **kwargs):
+        """One non-streaming chat completion, recorded in the model health registry."""
+        start = time.perf_counter()
+        try:
+            response = await self.client.chat.completions.create(model=model, **kwargs)
+        except Exception:
+            self.health.record_failure(model)
+            raise
+        except BaseException:
+            self.health.release(model)
+            raise
+        self.health.record_success(model, time.perf_counter() - start)
+        return response
+
+    async def process_query(self, query: str, department: str, session_id: str = None, use_cache: bool = True) -> str:
+        """
+        Pipeline: Input -> Context -> Classify -> (Cache) -> Function Call -> Response
+        """
+        if not self.api_key:
+             return "⚠️ API Key missing. Please check .env file."
+
+        probe, retrieval_task = await self._check_semantic_cache(query, department, session_id, use_cache)
+        if probe and probe["hit"]:
+            ai_response, similarity = probe["hit"]
+            print(f"⚡ Semantic Cache Hit (similarity {similarity:.3f})")
+            await self._save_turn(session_id, query, ai_response)
+            return ai_response
+
+        system_instruction, full_prompt, external_context = await self._build_prompt(query, department, session_id, probe, retrieval_task)
+
+        # 3. Final Response Generation (identical prompts, e.g. same query without history, share one call)
+        key = "prompt:" + hashlib.sha256(f"{system_instruction}\n{full_prompt}".encode("utf-8")).hexdigest()
+        ai_response = await self.singleflight.do(key, lambda: self._generate_response(system_instruction, full_prompt))
+
+        if ai_response is not None:
+            # 4. Save to Redis
+            await self._save_turn(session_id, query, ai_response)
+            await self._semantic_cache_store(probe, department, query, ai_response)
+            return ai_response
         
         # Fallback if all models fail
         fallback = f"AI Error: All models failed. Please try again later.\n\nBased on my search:\n\n{external_context}"
-        if session_id:
-            self.redis.add_message(session_id, "user", query)
-            self.redis.add_message(session_id, "assistant", fallback)
+        await self._save_turn(session_id, query, fallback)
         return fallback
 
-    async def generate_roadmap(self, department: str, level: str) -> Dict[str, Any]:
+    async def _generate_response(self, system_instruction: str, full_prompt: str) -> Optional[str]:
+        """Runs the final prompt through the model list. Returns None if all models fail."""
+        messages = [
+            {"role": "system", "content": system_instruction},
+            {"role": "user", "content": full_prompt}
+        ]
+        if LLM_HEDGING:
+            try:
+                async with aclosing(self._stream_tokens(messages)) as tokens:
+                    return "".join([token async for token in tokens])
+            except AllModelsFailed:
+                return None
+            except Exception as e:
+                print(f"⚠️ Stream Error: {e}")
+                return None
+
+        for model in self._usable_models():
+            try:
+                print(f"🤖 Using Model: {model}")
+                response = await self._create_completion(model, messages=messages)
+                return response.choices[0].message.content
+
+            except Exception as e:
+                print(f"⚠️ Error with {model}: {e}")
+                continue
+        return None
+
+    async def _open_stream(self, model: str, messages: List[Dict[str, str]]):
         """
-        Generates structured JSON roadmap using LLM.
+        Starts a streaming completion on `model` and waits for its first token.
+        Returns (stream, chunk iterator, first token, start time); the stream is closed on failure or cancellation.
+        """
+        start = time.perf_counter()
+        stream = None
+        try:
+            print(f"🤖 Streaming with Model: {model}")
+            stream = await self.client.chat.completions.create(model=model, messages=messages, stream=True)
+            chunks = stream.__aiter__()
+            async for chunk in chunks:
+                token = chunk.choices[0].delta.content if chunk.choices else None
+                if token:
+                    self.health.record_ttft(model, time.perf_counter() - start)
+                    return stream, chunks, token, start
+            return stream, chunks, "", start
+        except Exception:
+            self.health.record_failure(model)
+            if stream is not None:
+                await stream.close()
+            raise
+        except BaseException:
+            # Cancelled (hedge lost or client went away): no verdict on the model
+            self.health.release(model)
+            if stream is not None:
+                await stream.close()
+            raise
+
+    async def _start_stream(self, messages: List[Dict[str, str]]):
+        """
+        Opens a stream on the best usable model, failing over on errors before the first token.
+        With LLM_HEDGING, if the primary has not produced a first token within its percentile
+        deadline (and the hedge budget allows), the same request goes to the next model and
+        whichever streams first wins; the loser is cancelled.
+        Returns (model, stream, chunks, first token, start) or None if every model fails.
+        """
+        models = self._usable_models()
+        self.hedge_budget.on_request()
+        model = next(models, None)
+        while model is not None:
+            contenders = {asyncio.create_task(self._open_stream(model, messages)): model}
+            # Backup that was not hedged for lack of budget: still the next failover candidate
+            deferred = None
+            try:
+                if LLM_HEDGING:
+                    delay = hedge_delay(self.health.ttft_percentile(model, HEDGE_PERCENTILE))
+                    done, _ = await asyncio.wait(contenders, timeout=delay)
+                    backup = next(models, None) if not done else None
+                    if backup is not None and self.hedge_budget.try_spend():
+                        print(f"🏁 {model} slow (> {delay:.2f}s to first token), hedging with {backup}")
+                        contenders[asyncio.create_task(self._open_stream(backup, messages))] = backup
+                    elif backup is not None:
+                        # Don't hold its breaker slot while waiting on the primary
+                        self.health.release(backup)
+                        deferred = backup
+
+                pending = set(contenders)
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    winners = [t for t in done if t.exception() is None]
+                    for task in done:
+                        if task.exception() is not None:
+                            print(f"⚠️ Stream Error with {contenders[task]}: {task.exception()}")
+                    if winners:
+                        winner = winners[0]
+                        for task in pending:
+                            task.cancel()
+                        for task in winners[1:]:
+                            # Opened too but not used: close it and give back its breaker slot
+                            self.health.release(contenders[task])
+                            await task.result()[0].close()
+                        if contenders[winner] != model:
+                            self.hedge_budget.hedge_wins += 1
+                        return (contenders[winner],) + winner.result()
+            except BaseException:
+                for task in contenders:
+                    task.cancel()
+                raise
+            if deferred is not None and self.health.acquire(deferred):
+                model = deferred
+            else:
+                model = next(models, None)
+        return None
+
+    async def _stream_tokens(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Yields response tokens from the winning model. Raises AllModelsFailed if no model starts."""
+        opened = await self._start_stream(messages)
+        if opened is None:
+            raise AllModelsFailed()
+        model, stream, chunks, first_token, start = opened
+        try:
+            if first_token:
+                yield first_token
+            async for chunk in chunks:
+                token = chunk.choices[0].delta.content if chunk.choices else None
+                if token:
+                    yield token
+            self.health.record_success(model, time.perf_counter() - start)
+        except Exception:
+            self.health.record_failure(model)
+            raise
+        except BaseException:
+            # Consumer went away mid-stream (GeneratorExit / cancelled): no verdict on the model,
+            # but a half-open probe slot must be given back or the model is never tried again
+            self.health.release(model)
+            raise
+        finally:
+            # Stops upstream generation when the consumer goes away
+            await stream.close()
+
+    async def stream_query(self, query: str, department: str, session_id: str = None, use_cache: bool = True) -> AsyncIterator[str]:
+        """
+        Same pipeline as process_query, but yields response tokens as the model produces them.
+        The assembled reply is saved to Redis only once the stream completes; closing the
+        generator early (client disconnect) closes the upstream stream and saves nothing.
+        """
+        if not self.api_key:
+            yield "⚠️ API Key missing. Please check .env file."
+            return
+
+        probe, retrieval_task = await self._check_semantic_cache(query, department, session_id, use_cache)
+        if probe and probe["hit"]:
+            ai_response, similarity = probe["hit"]
+            print(f"⚡ Semantic Cache Hit (similarity {similarity:.3f})")
+            await self._save_turn(session_id, query, ai_response)
+            yield ai_response
+            return
+
+        system_instruction, full_prompt, external_context = await self._build_prompt(query, department, session_id, probe, retrieval_task)
+        messages = [
+            {"role": "system", "content": system_instruction},
+            {"role": "user", "content": full_prompt}
+        ]
+
+        parts = []
+        try:
+            async with aclosing(self._stream_tokens(messages)) as tokens:
+                async for token in tokens:
+                    parts.append(token)
+                    yield token
+        except AllModelsFailed:
+            fallback = f"AI Error: All models failed. Please try again later.\n\nBased on my search:\n\n{external_context}"
+            await self._save_turn(session_id, query, fallback)
+            yield fallback
+            return
+
+        ai_response = "".join(parts)
+        await self._save_turn(session_id, query, ai_response)
+        await self._semantic_cache_store(probe, department, query, ai_response)
+
+    async def generate_roadmap(self, department: str, level: str, goals: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Returns a structured JSON roadmap, served from the Redis roadmap cache when possible.
+        Stale entries are returned immediately and regenerated in the background.
         """
         if not self.api_key:
             return {"title": "Error", "modules": []}
 
+        try:
+            cached = await self.roadmap_cache.get(department, level, goals)
+        except Exception as e:
+            print(f"⚠️ Roadmap Cache Error: {e}")
+            cached = None
+
+        if cached:
+            roadmap, stale = cached
+            if stale:
+                self._schedule_roadmap_refresh(department, level, goals)
+            return roadmap
+
+        # Many students requesting the same roadmap at once share one generation
+        key = RoadmapCache.key(department, level, goals)
+        roadmap = await self.singleflight.do(key, lambda: self._generate_and_cache_roadmap(department, level, goals))
+        if roadmap is None:
+            # Fallback if all models fail
+            return {
+                "title": f"{department} (Fallback)",
+                "modules": [{"week": 1, "topic": "Basics", "description": "AI generation failed, please try again.", "resources": []}]
+            }
+        return roadmap
+
+    def _schedule_roadmap_refresh(self, department: str, level: str, goals: Optional[str]):
+        """Regenerates a stale roadmap in the background, at most once per key at a time."""
+        key = RoadmapCache.key(department, level, goals)
+        if key in self._roadmap_refreshes:
+            return
+        print(f"♻️ Revalidating stale roadmap: {key}")
+        task = asyncio.create_task(self._generate_and_cache_roadmap(department, level, goals))
+        self._roadmap_refreshes[key] = task
+        task.add_done_callback(lambda _: self._roadmap_refreshes.pop(key, None))
+
+    async def _generate_and_cache_roadmap(self, department: str, level: str, goals: Optional[str]) -> Optional[Dict[str, Any]]:
+        roadmap = await self._generate_roadmap_llm(department, level, goals)
+        if roadmap is not None:
+            try:
+                await self.roadmap_cache.set(department, level, goals, roadmap)
+            except Exception as e:
+                print(f"⚠️ Roadmap Cache Error: {e}")
+        return roadmap
+
+    async def warm_roadmaps(self):
+        """Pre-generates every known department/level roadmap that is missing or stale."""
+        for department in KNOWN_DEPARTMENTS:
+            for level in ROADMAP_LEVELS:
+                try:
+                    cached = await self.roadmap_cache.get(department, level, None)
+                    if cached and not cached[1]:
+                        continue
+                    print(f"🔥 Pre-warming roadmap: {department} / {level}")
+                    key = RoadmapCache.key(department, level, None)
+                    await self.singleflight.do(key, lambda: self._generate_and_cache_roadmap(department, level, None))
+                except Exception as e:
+                    print(f"⚠️ Roadmap Warm Error ({department} / {level}): {e}")
+
+    async def _generate_roadmap_llm(self, department: str, level: str, goals: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Generates structured JSON roadmap using LLM. Returns None if all models fail.
+        """
         prompt = (
             f"Generate a detailed 4-week structured learning roadmap for {department} at {level} level. "
             "Ensure you provide content for ALL 4 WEEKS. "
@@ -210,12 +768,14 @@ class RAGEngine:
             "{'title': '...', 'modules': [{'week': 1, 'topic': '...', 'description': '...', 'resources': [{'title': '...', 'link': '...'}]}]}. "
             "Do not add markdown formatting like ```json, just return the raw JSON object."
         )
+        if goals:
+            prompt += f" Tailor the roadmap to the student's goals: {goals}"
 
-        for attempt in range(len(self.models)):
+        for model in self._usable_models():
             try:
-                print(f"🗺️  Generating Roadmap with {self.model}...")
-                response = self.client.chat.completions.create(
-                    model=self.model,
+                print(f"🗺️  Generating Roadmap with {model}...")
+                response = await self._create_completion(
+                    model,
                     messages=[{"role": "user", "content": prompt}]
                 )
                 content = response.choices[0].message.content.strip()
@@ -232,16 +792,9 @@ class RAGEngine:
                 return json.loads(content)
             
             except Exception as e:
-                print(f"⚠️ Roadmap Gen Error ({self.model}): {e}")
-                # Switch to next model
-                self.current_model_index = (self.current_model_index + 1) % len(self.models)
-                self.model = self.models[self.current_model_index]
+                print(f"⚠️ Roadmap Gen Error ({model}): {e}")
                 continue
 
-        # Fallback if all models fail
-        return {
-            "title": f"{department} (Fallback)",
-            "modules": [{"week": 1, "topic": "Basics", "description": "AI generation failed, please try again.", "resources": []}]
-        }
+        return None
 
 rag_engine = RAGEngine()
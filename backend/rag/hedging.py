@@ -0,0 +1,56 @@
+import os
+import threading
+from typing import Optional
+
+# Opt-in: race a backup model when the primary is slow to produce its first token
+LLM_HEDGING = os.getenv("LLM_HEDGING", "false").lower() == "true"
+# Hedge once the primary is slower than this percentile of its own recent time-to-first-token
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", 0.9))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", 0.5))
+# Used until a model has time-to-first-token samples
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", 4.0))
+# At most this fraction of requests may send a hedge (e.g. 0.1 => <= ~10% extra LLM calls)
+HEDGE_BUDGET_RATIO = float(os.getenv("HEDGE_BUDGET_RATIO", 0.1))
+HEDGE_BUDGET_BURST = float(os.getenv("HEDGE_BUDGET_BURST", 5))
+
+def hedge_delay(ttft_percentile: Optional[float]) -> float:
+    """Seconds to wait for the primary's first token before hedging."""
+    if ttft_percentile is None:
+        return HEDGE_DEFAULT_DELAY
+    return max(ttft_percentile, HEDGE_MIN_DELAY)
+
+class HedgeBudget:
+    """
+    Token bucket that caps hedged requests to a fraction of all requests.
+    Every primary request deposits `ratio` tokens (up to `burst`); a hedge spends one.
+    """
+    def __init__(self, ratio: float = HEDGE_BUDGET_RATIO, burst: float = HEDGE_BUDGET_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+
+    def on_request(self):
+        with self._lock:
+            self.requests += 1
+            self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.tokens < 1 - 1e-9:  # tolerate float drift from repeated += ratio
+                return False
+            self.tokens -= 1
+            self.hedges += 1
+            return True
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": round(self.hedges / self.requests, 3) if self.requests else 0.0,
+            "tokens": round(self.tokens, 2),
+        }
@@ -5,11 +5,18 @@ from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import SentenceTransformerEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+from backend.storage.redis_client import SyncRedisClient
+from backend.rag.semantic_cache import SemanticCache
+from backend.rag.departments import DEPARTMENT_ROADMAPS, ROADMAP_IDS, department_collection
+from backend.rag.mmap_index import mmap_index_path, write_mmap_index
+from backend.rag.retrievers import NumpyRetriever
 
 # Configuration
 GITHUB_RAW_BASE = "https://raw.githubusercontent.com/kamranahmedse/developer-roadmap/master/src/data/roadmaps"
-TARGET_ROADMAPS = ["cyber-security", "frontend", "backend", "devops", "python", "javascript", "react"]
+TARGET_ROADMAPS = ROADMAP_IDS
 DB_DIR = "./backend/vector_db"
+# Rows per Chroma add() call when copying chunks into department collections
+DEPARTMENT_INDEX_BATCH = 5000
 
 def fetch_roadmap_data(roadmap_id):
     """Fetches key topics from a specific roadmap JSON."""
@@ -45,6 +52,42 @@ def process_node(node, roadmap_title, documents):
     for child in children:
         process_node(child, roadmap_title, documents)
 
+def chunk_metadata(roadmap_id):
+    """
+    Metadata carried by every chunk of a roadmap. `source` (the roadmap id) is what department-scoped
+    retrieval filters on; `departments` records which departments currently search this roadmap.
+    """
+    departments = [d for d, roadmaps in DEPARTMENT_ROADMAPS.items() if roadmap_id in roadmaps]
+    return {"source": roadmap_id, "roadmap": roadmap_id.replace('-', ' ').title(), "departments": ",".join(departments)}
+
+def build_department_indexes(db, embeddings):
+    """
+    Copies each department's chunks (by `source`) from the main collection into the department's
+    own collection, reusing the stored vectors. Department searches then scan only these chunks,
+    which is much faster than a metadata-filtered search over the whole collection.
+    """
+    data = db.get(include=["embeddings", "documents", "metadatas"])
+    for department, roadmaps in DEPARTMENT_ROADMAPS.items():
+        name = department_collection(department)
+        # Rebuilt from scratch so chunks from a previous ingest do not linger
+        Chroma(collection_name=name, embedding_function=embeddings, persist_directory=DB_DIR).delete_collection()
+        store = Chroma(collection_name=name, embedding_function=embeddings, persist_directory=DB_DIR)
+        rows = [i for i, m in enumerate(data["metadatas"]) if (m or {}).get("source") in roadmaps]
+        for start in range(0, len(rows), DEPARTMENT_INDEX_BATCH):
+            batch = rows[start:start + DEPARTMENT_INDEX_BATCH]
+            store._collection.add(
+                ids=[data["ids"][i] for i in batch],
+                embeddings=[data["embeddings"][i] for i in batch],
+                documents=[data["documents"][i] for i in batch],
+                metadatas=[data["metadatas"][i] for i in batch],
+            )
+        print(f"🗂️ {department}: {len(rows)} chunks in '{name}'.")
+
+def build_mmap_index(db):
+    """Writes the read-only index that RAG_RETRIEVER=mmap workers memory-map (see mmap_index.py)."""
+    path = write_mmap_index(mmap_index_path(DB_DIR), NumpyRetriever.from_chroma(db))
+    print(f"🗺️ Mmap index written to {path}.")
+
 def ingest_data():
     """
     1. Read Roadmaps from GitHub.
@@ -82,8 +125,8 @@ def ingest_data():
         
         text_content += json.dumps(data, indent=2)
         
-        metadata = {"source": roadmap_id}
-        doc = Document(page_content=text_content, metadata=metadata)
+        # Split chunks inherit this metadata, so each one can be filtered by department
+        doc = Document(page_content=text_content, metadata=chunk_metadata(roadmap_id))
         all_documents.append(doc)
 
     if not all_documents:
@@ -108,7 +151,28 @@ def ingest_data():
         persist_directory=DB_DIR
     )
     db.persist()
+    build_department_indexes(db, embeddings)
+    build_mmap_index(db)
+
+    # Cached answers were generated from the old knowledge base
+    try:
+        redis_client = SyncRedisClient()
+        redis_client.run(SemanticCache(redis_client.client).invalidate())
+        redis_client.close()
+        print("🧹 Semantic cache invalidated.")
+    except Exception as e:
+        print(f"⚠️ Could not invalidate semantic cache: {e}")
     print("✅ Ingestion Complete!")
 
 if __name__ == "__main__":
-    ingest_data()
+    import sys
+    if "--department-indexes" in sys.argv or "--mmap-index" in sys.argv:
+        # Only rebuild derived indexes from an existing store, e.g. after remapping departments
+        embeddings = SentenceTransformerEmbeddings(model_name="all-MiniLM-L6-v2")
+        db = Chroma(persist_directory=DB_DIR, embedding_function=embeddings)
+        if "--department-indexes" in sys.argv:
+            build_department_indexes(db, embeddings)
+        if "--mmap-index" in sys.argv:
+            build_mmap_index(db)
+    else:
+        ingest_data()
@@ -0,0 +1,54 @@
+import os
+import json
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+EXAMPLES_PATH = os.path.join(os.path.dirname(__file__), "intent_examples.json")
+
+# A prediction is trusted only if it is both close to its centroid and clearly ahead of the runner-up
+INTENT_MIN_SIMILARITY = float(os.getenv("INTENT_MIN_SIMILARITY", 0.35))
+INTENT_MIN_MARGIN = float(os.getenv("INTENT_MIN_MARGIN", 0.05))
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+class IntentClassifier:
+    """
+    Zero-LLM intent classifier: nearest centroid over embedded example prompts.
+    Uses the same SentenceTransformer embeddings as the vector DB, so classifying
+    a query costs one local forward pass instead of an LLM round-trip.
+    """
+    def __init__(self, embeddings, examples_path: str = EXAMPLES_PATH,
+                 min_similarity: float = INTENT_MIN_SIMILARITY, min_margin: float = INTENT_MIN_MARGIN):
+        self.embeddings = embeddings
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+
+        with open(examples_path) as f:
+            examples: Dict[str, List[str]] = json.load(f)
+
+        self.labels = list(examples.keys())
+        centroids = []
+        for label in self.labels:
+            vectors = _normalize(np.asarray(embeddings.embed_documents(examples[label]), dtype=np.float32))
+            centroids.append(vectors.mean(axis=0))
+        self.centroids = _normalize(np.stack(centroids))
+
+    def predict(self, query: str, vector: Optional[np.ndarray] = None) -> Tuple[str, float, float]:
+        """
+        Returns (label, cosine similarity to its centroid, margin over the runner-up).
+        Pass the query's embedding as `vector` if already computed to skip the forward pass.
+        """
+        if vector is None:
+            vector = self.embeddings.embed_query(query)
+        vector = _normalize(np.asarray(vector, dtype=np.float32))
+        sims = self.centroids @ vector
+        order = np.argsort(sims)[::-1]
+        best, second = sims[order[0]], sims[order[1]]
+        return self.labels[order[0]], float(best), float(best - second)
+
+    def classify(self, query: str, vector: Optional[np.ndarray] = None) -> Tuple[str, bool]:
+        """Returns (label, confident). Callers should escalate when confident is False."""
+        label, similarity, margin = self.predict(query, vector)
+        return label, similarity >= self.min_similarity and margin >= self.min_margin
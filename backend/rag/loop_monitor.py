@@ -0,0 +1,50 @@
+import time
+import asyncio
+from collections import deque
+from typing import Dict, Optional
+import numpy as np
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag: a task asks to wake up every `interval` seconds and records how late
+    it actually ran. Lag is time during which no other coroutine on this worker could make progress.
+    """
+    def __init__(self, interval: float = 0.05, samples: int = 1200):
+        self.interval = interval
+        self._lags = deque(maxlen=samples)  # seconds, most recent last
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self._lags.append(max(0.0, time.perf_counter() - expected))
+
+    def reset(self):
+        self._lags.clear()
+
+    def snapshot(self) -> Dict:
+        if not self._lags:
+            return {"samples": 0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        lags = np.asarray(self._lags) * 1000
+        return {
+            "samples": len(lags),
+            "p50_ms": round(float(np.percentile(lags, 50)), 2),
+            "p99_ms": round(float(np.percentile(lags, 99)), 2),
+            "max_ms": round(float(lags.max()), 2),
+        }
+
+loop_monitor = LoopLagMonitor()
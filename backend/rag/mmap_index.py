@@ -0,0 +1,104 @@
+import os
+import json
+import shutil
+import time
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+
+# Bump when the on-disk layout changes; workers refuse to open other versions
+MMAP_INDEX_VERSION = 1
+
+def mmap_index_path(db_dir: str) -> str:
+    return os.path.join(db_dir, "mmap_index")
+
+class MmapDocuments:
+    """
+    Read-only sequence of chunk documents decoded on access from `records` (concatenated UTF-8 JSON)
+    at `offsets` (n + 1 byte positions). Only the top-k of a search are ever decoded.
+    """
+    def __init__(self, records: np.ndarray, offsets: np.ndarray):
+        self.records = records
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int):
+        from langchain_core.documents import Document
+        record = json.loads(self.records[self.offsets[i]:self.offsets[i + 1]].tobytes())
+        return Document(page_content=record["page_content"], metadata=record["metadata"])
+
+def write_mmap_index(path: str, retriever) -> str:
+    """
+    Writes a NumpyRetriever's contents as an index directory:
+      vectors.npy   float32 (n, dim), rows grouped by roadmap
+      sq_norms.npy  float32 (n,) squared row norms
+      records.bin   chunk text + metadata, one JSON record per row
+      offsets.npy   int64 (n + 1,) byte offsets of the records
+      index.json    version, shape and per-roadmap row ranges
+    Each write goes to a new versioned directory next to `path`, and `path` is a symlink that is
+    atomically replaced to point at it: workers opening the index always find a complete version.
+    The version it replaced is kept for workers that resolved the link just before the swap; older
+    ones are removed (workers that still map their files keep reading them until they reopen).
+    """
+    staging = f"{path}.v{time.time_ns()}-{os.getpid()}"
+    os.makedirs(staging)
+
+    np.save(os.path.join(staging, "vectors.npy"), np.ascontiguousarray(retriever.vectors, dtype=np.float32))
+    np.save(os.path.join(staging, "sq_norms.npy"), np.asarray(retriever.sq_norms, dtype=np.float32))
+    offsets = np.zeros(len(retriever.documents) + 1, dtype=np.int64)
+    with open(os.path.join(staging, "records.bin"), "wb") as f:
+        for i, doc in enumerate(retriever.documents):
+            record = json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}).encode("utf-8")
+            f.write(record)
+            offsets[i + 1] = offsets[i] + len(record)
+    np.save(os.path.join(staging, "offsets.npy"), offsets)
+    with open(os.path.join(staging, "index.json"), "w") as f:
+        json.dump({"version": MMAP_INDEX_VERSION, "count": len(retriever.documents),
+                   "dim": int(retriever.vectors.shape[1]) if retriever.vectors.ndim == 2 else 0,
+                   "slices": {source: list(bounds) for source, bounds in retriever.slices.items()}}, f)
+
+    previous = os.path.realpath(path) if os.path.islink(path) else None
+    if os.path.isdir(path) and not os.path.islink(path):
+        # Index written before versioned directories: a plain directory can't be replaced by a link
+        shutil.rmtree(path)
+    link = f"{path}.link-{os.getpid()}"
+    if os.path.lexists(link):
+        os.remove(link)
+    # Relative target, so the database directory can be moved or mounted elsewhere
+    os.symlink(os.path.basename(staging), link)
+    os.replace(link, path)
+
+    keep = {os.path.realpath(staging), previous}
+    prefix = os.path.basename(path) + ".v"
+    parent = os.path.dirname(os.path.abspath(path))
+    for name in os.listdir(parent):
+        version = os.path.join(parent, name)
+        if name.startswith(prefix) and os.path.realpath(version) not in keep:
+            shutil.rmtree(version, ignore_errors=True)
+    return path
+
+def open_mmap_index(path: str, mmap_mode: Optional[str] = "r") -> Tuple[np.ndarray, np.ndarray, MmapDocuments, Dict[str, Tuple[int, int]]]:
+    """
+    (vectors, sq_norms, documents, slices) of an index written by write_mmap_index. With mmap_mode "r"
+    the arrays are read-only views of the files, so every process opening the index shares the same
+    page-cache pages; with None they are read into private memory.
+    """
+    # Resolve the link once so every file comes from the same version even if it is swapped meanwhile
+    path = os.path.realpath(path)
+    with open(os.path.join(path, "index.json")) as f:
+        header: Dict[str, Any] = json.load(f)
+    if header.get("version") != MMAP_INDEX_VERSION:
+        raise ValueError(f"Unsupported mmap index version {header.get('version')} at {path}; re-run ingest")
+    vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode=mmap_mode)
+    sq_norms = np.load(os.path.join(path, "sq_norms.npy"), mmap_mode=mmap_mode)
+    offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode=mmap_mode)
+    records_path = os.path.join(path, "records.bin")
+    if os.path.getsize(records_path) == 0:
+        records = np.zeros(0, dtype=np.uint8)
+    elif mmap_mode:
+        records = np.memmap(records_path, dtype=np.uint8, mode="r")
+    else:
+        records = np.fromfile(records_path, dtype=np.uint8)
+    slices = {source: tuple(bounds) for source, bounds in header["slices"].items()}
+    return vectors, sq_norms, MmapDocuments(records, offsets), slices
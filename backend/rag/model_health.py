@@ -0,0 +1,143 @@
+import os
+import time
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+# Rolling window of recent calls kept per model
+MODEL_HEALTH_WINDOW = int(os.getenv("MODEL_HEALTH_WINDOW", 50))
+# Consecutive failures that open a model's circuit breaker
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 3))
+# Seconds an open breaker waits before letting a single half-open probe through
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", 30))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class ModelHealth:
+    """Rolling latency/error statistics and circuit breaker state for one model."""
+    def __init__(self, name: str, priority: int, window: int):
+        self.name = name
+        self.priority = priority
+        self.latencies = deque(maxlen=window)  # seconds, successful calls only
+        self.ttfts = deque(maxlen=window)      # seconds to first streamed token
+        self.outcomes = deque(maxlen=window)   # True = success
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    @property
+    def success_rate(self) -> float:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 1.0
+
+    def expected_cost(self) -> float:
+        """Median latency divided by success rate; untried models score 0 so each gets explored once."""
+        p50 = _percentile(list(self.latencies), 0.5)
+        if p50 is None:
+            return float("inf") if self.outcomes else 0.0
+        return p50 / max(self.success_rate, 0.05)
+
+    def snapshot(self) -> Dict:
+        latencies = list(self.latencies)
+        return {
+            "model": self.name,
+            "state": self.state,
+            "calls": len(self.outcomes),
+            "success_rate": round(self.success_rate, 3),
+            "consecutive_failures": self.consecutive_failures,
+            "p50_latency_ms": round(_percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+            "p95_latency_ms": round(_percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+            "p50_ttft_ms": round(_percentile(list(self.ttfts), 0.5) * 1000, 1) if self.ttfts else None,
+            "p95_ttft_ms": round(_percentile(list(self.ttfts), 0.95) * 1000, 1) if self.ttfts else None,
+        }
+
+class ModelHealthRegistry:
+    """
+    Tracks every model in the priority list and decides which to try, fastest healthy first.
+
+    Breaker lifecycle: CLOSED --(N consecutive failures)--> OPEN --(cooldown)--> HALF_OPEN,
+    where exactly one probe request is let through; its success closes the breaker and its
+    failure re-opens it for another cooldown.
+    """
+    def __init__(self, models: List[str], failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 cooldown: float = BREAKER_COOLDOWN, window: int = MODEL_HEALTH_WINDOW,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.models = {m: ModelHealth(m, i, window) for i, m in enumerate(models)}
+        self._lock = threading.Lock()
+
+    def candidates(self) -> List[str]:
+        """Models worth trying for a new request, best first. Open breakers still cooling down are skipped."""
+        now = self.clock()
+        with self._lock:
+            usable = [
+                h for h in self.models.values()
+                if h.state == CLOSED or (not h.probe_in_flight and now - h.opened_at >= self.cooldown)
+            ]
+            # Healthy models by expected cost, then models waiting for a half-open probe
+            usable.sort(key=lambda h: (h.state != CLOSED, h.expected_cost(), h.priority))
+            return [h.name for h in usable]
+
+    def acquire(self, model: str) -> bool:
+        """Must be called right before using a model; claims the half-open probe slot if needed."""
+        now = self.clock()
+        with self._lock:
+            h = self.models[model]
+            if h.state == CLOSED:
+                return True
+            if h.probe_in_flight or now - h.opened_at < self.cooldown:
+                return False
+            h.state = HALF_OPEN
+            h.probe_in_flight = True
+            return True
+
+    def release(self, model: str):
+        """Gives back a probe slot when the call was abandoned without an outcome (cancelled)."""
+        with self._lock:
+            h = self.models[model]
+            if h.probe_in_flight:
+                h.probe_in_flight = False
+                h.state = OPEN
+
+    def record_success(self, model: str, latency: float):
+        with self._lock:
+            h = self.models[model]
+            h.latencies.append(latency)
+            h.outcomes.append(True)
+            h.consecutive_failures = 0
+            h.probe_in_flight = False
+            if h.state != CLOSED:
+                print(f"✅ Circuit closed for {model}")
+            h.state = CLOSED
+
+    def record_ttft(self, model: str, ttft: float):
+        with self._lock:
+            self.models[model].ttfts.append(ttft)
+
+    def ttft_percentile(self, model: str, q: float) -> Optional[float]:
+        with self._lock:
+            return _percentile(list(self.models[model].ttfts), q)
+
+    def record_failure(self, model: str):
+        with self._lock:
+            h = self.models[model]
+            h.outcomes.append(False)
+            h.consecutive_failures += 1
+            h.probe_in_flight = False
+            if h.state == HALF_OPEN or h.consecutive_failures >= self.failure_threshold:
+                if h.state != OPEN:
+                    print(f"🚫 Circuit opened for {model}")
+                h.state = OPEN
+                h.opened_at = self.clock()
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            return [h.snapshot() for h in self.models.values()]
@@ -0,0 +1,53 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+from backend.rag.embedding_cache import normalize_query
+
+# Scored retrieval results kept per (session, scope, normalized query) so follow-up turns skip the index
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", 1024))
+# Entries older than this are re-fetched, so re-ingested documents show up without a restart
+RETRIEVAL_CACHE_TTL = float(os.getenv("RETRIEVAL_CACHE_TTL", 600))
+
+class RetrievalCache:
+    """
+    In-process LRU of (session id, scope, normalized query) -> [(document, score), ...] for one
+    retrieval stage (scope: the department the search was restricted to, "" if unscoped).
+    Results are stored at the full retrieval k; pipeline branches slice what they need.
+    """
+    def __init__(self, max_entries: int = RETRIEVAL_CACHE_SIZE, ttl: float = RETRIEVAL_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, List[Tuple[Any, float]]]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def key(session_id: Optional[str], query: str, scope: str = "") -> Tuple[str, str, str]:
+        return session_id or "", scope, normalize_query(query)
+
+    def get(self, session_id: Optional[str], query: str, scope: str = "") -> Optional[List[Tuple[Any, float]]]:
+        key = self.key(session_id, query, scope)
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[1]
+
+    def set(self, session_id: Optional[str], query: str, results: List[Tuple[Any, float]], scope: str = ""):
+        key = self.key(session_id, query, scope)
+        self._entries[key] = (time.monotonic(), results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_session(self, session_id: str):
+        for key in [k for k in self._entries if k[0] == session_id]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def snapshot(self):
+        return {"entries": len(self._entries), **self.stats}
@@ -0,0 +1,227 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from backend.rag.departments import DEPARTMENT_ROADMAPS, department_collection, department_filter, roadmaps_for
+from backend.rag.mmap_index import mmap_index_path, open_mmap_index
+
+# Vector search backend: "chroma" (persistent HNSW store), "numpy" (all chunk vectors in one
+# in-memory float32 matrix, exact top-k by one matrix-vector product; faster below ~10k chunks,
+# where a scan costs less than Chroma's per-query overhead) or "mmap" (the same search over the
+# index files written at ingest, memory-mapped so all uvicorn workers share one copy)
+RAG_RETRIEVER = os.getenv("RAG_RETRIEVER", "chroma")
+# Search only the chosen department's roadmaps (see departments.py). For Chroma, "collections" uses the
+# per-department collections built at ingest (falling back to "filter" for departments without one),
+# "filter" a metadata filter on the main collection (much slower in Chroma). NumPy scans the department's
+# rows either way. "off" always searches everything.
+DEPARTMENT_SCOPE = os.getenv("RAG_DEPARTMENT_SCOPE", "collections")
+
+# Chunks read per Chroma get() when loading the NumPy matrix
+FROM_CHROMA_PAGE = 5000
+
+Scored = List[Tuple[Any, float]]
+
+class Retriever(ABC):
+    """
+    Common interface of the vector search backends. Vectors are raw query embeddings;
+    results are (document, squared L2 distance) pairs, best first.
+    """
+    name = "base"
+
+    def scope(self, department: Optional[str]) -> str:
+        """The department a search is actually restricted to ("" if unscoped); part of cache keys."""
+        if DEPARTMENT_SCOPE != "off" and roadmaps_for(department):
+            return department
+        return ""
+
+    @abstractmethod
+    def search(self, vector, k: int, department: Optional[str] = None) -> Scored:
+        ...
+
+    @abstractmethod
+    def remote_call(self, vector: List[float], k: int, department: Optional[str] = None) -> Tuple[Callable, tuple]:
+        """(picklable function, args) performing the same search in a pool process."""
+
+    def snapshot(self) -> Dict:
+        return {"backend": self.name}
+
+class ChromaRetriever(Retriever):
+    """Searches the Chroma store, or a department's own collection when one was built at ingest."""
+    name = "chroma"
+
+    def __init__(self, vector_db, db_dir: str, department_dbs: Optional[Dict[str, Any]] = None):
+        self.vector_db = vector_db
+        self.db_dir = db_dir
+        self.department_dbs = department_dbs or {}
+
+    @classmethod
+    def load(cls, db_dir: str, embeddings) -> "ChromaRetriever":
+        from langchain_community.vectorstores import Chroma
+        vector_db = Chroma(persist_directory=db_dir, embedding_function=embeddings)
+        department_dbs = {}
+        if DEPARTMENT_SCOPE == "collections":
+            # Only non-empty collections; departments without one are searched by filter
+            for department in DEPARTMENT_ROADMAPS:
+                db = Chroma(collection_name=department_collection(department), persist_directory=db_dir,
+                            embedding_function=embeddings)
+                if db._collection.count():
+                    department_dbs[department] = db
+        return cls(vector_db, db_dir, department_dbs)
+
+    def _target(self, department: Optional[str]) -> Tuple[Any, Optional[str], Optional[Dict]]:
+        """(store, department collection name or None, where filter or None) for a department's searches."""
+        if DEPARTMENT_SCOPE == "collections" and department in self.department_dbs:
+            return self.department_dbs[department], department_collection(department), None
+        if DEPARTMENT_SCOPE != "off":
+            where = department_filter(department)
+            if where:
+                return self.vector_db, None, where
+        return self.vector_db, None, None
+
+    def search(self, vector, k: int, department: Optional[str] = None) -> Scored:
+        db, _, where = self._target(department)
+        return db.similarity_search_by_vector_with_relevance_scores(np.asarray(vector).tolist(), k=k, filter=where)
+
+    def remote_call(self, vector: List[float], k: int, department: Optional[str] = None) -> Tuple[Callable, tuple]:
+        _, collection, where = self._target(department)
+        return search_chroma, (self.db_dir, vector, k, where, collection)
+
+    def snapshot(self) -> Dict:
+        return {"backend": self.name, "department_collections": sorted(self.department_dbs)}
+
+class NumpyRetriever(Retriever):
+    """
+    Exact top-k over an in-memory float32 matrix of all chunk vectors. Rows are grouped by roadmap,
+    so a department search is a matrix-vector product over a few contiguous slices (views, no copies).
+    """
+    name = "numpy"
+
+    def __init__(self, vectors: np.ndarray, documents: List[Any], sources: List[str], db_dir: Optional[str] = None):
+        self.db_dir = db_dir
+        order = np.argsort(np.asarray(sources, dtype=object).astype(str), kind="stable")
+        self.vectors = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32)[order])
+        self.documents = [documents[i] for i in order]
+        self.sq_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+        self.slices: Dict[str, Tuple[int, int]] = {}
+        sorted_sources = [str(sources[i]) for i in order]
+        for i, source in enumerate(sorted_sources):
+            start, _ = self.slices.get(source, (i, i))
+            self.slices[source] = (start, i + 1)
+
+    @classmethod
+    def from_chroma(cls, vector_db, db_dir: Optional[str] = None) -> "NumpyRetriever":
+        """Copies every chunk (vector, text, metadata) out of a Chroma store."""
+        from langchain_core.documents import Document
+        vectors, documents, metadatas = [], [], []
+        # Paged: a single get() of a large collection exceeds SQLite's variable limit
+        while True:
+            page = vector_db.get(include=["embeddings", "documents", "metadatas"],
+                                 limit=FROM_CHROMA_PAGE, offset=len(documents))
+            if not page["ids"]:
+                break
+            vectors.append(np.asarray(page["embeddings"], dtype=np.float32))
+            page_metadatas = [m or {} for m in page["metadatas"]]
+            metadatas += page_metadatas
+            documents += [Document(page_content=text, metadata=m) for text, m in zip(page["documents"], page_metadatas)]
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        return cls(matrix, documents, [m.get("source", "") for m in metadatas], db_dir)
+
+    @classmethod
+    def load(cls, db_dir: str, embeddings) -> "NumpyRetriever":
+        from langchain_community.vectorstores import Chroma
+        return cls.from_chroma(Chroma(persist_directory=db_dir, embedding_function=embeddings), db_dir)
+
+    def _ranges(self, department: Optional[str]) -> List[Tuple[int, int]]:
+        roadmaps = roadmaps_for(department) if DEPARTMENT_SCOPE != "off" else None
+        if not roadmaps:
+            # No range at all for an empty corpus: a (0, 0) matrix can't be multiplied with the query
+            return [(0, len(self.documents))] if len(self.documents) else []
+        return sorted(self.slices[r] for r in roadmaps if r in self.slices)
+
+    def search(self, vector, k: int, department: Optional[str] = None) -> Scored:
+        query = np.asarray(vector, dtype=np.float32)
+        ranges = self._ranges(department)
+        if not ranges:
+            return []
+        rows = np.concatenate([np.arange(start, end) for start, end in ranges]) if len(ranges) > 1 else None
+        # Squared L2 like Chroma's default space: |x|^2 - 2 x.q + |q|^2
+        distances = np.concatenate([self.sq_norms[start:end] - 2 * (self.vectors[start:end] @ query)
+                                    for start, end in ranges]) + float(query @ query)
+        if len(distances) > k:
+            top = np.argpartition(distances, k)[:k]
+        else:
+            top = np.arange(len(distances))
+        top = top[np.argsort(distances[top])]
+        index = rows[top] if rows is not None else top + ranges[0][0]
+        return [(self.documents[i], float(distances[j])) for i, j in zip(index, top)]
+
+    def remote_call(self, vector: List[float], k: int, department: Optional[str] = None) -> Tuple[Callable, tuple]:
+        return search_numpy, (self.db_dir, vector, k, department)
+
+    def snapshot(self) -> Dict:
+        return {"backend": self.name, "chunks": len(self.documents), "bytes": int(self.vectors.nbytes)}
+
+class MmapRetriever(NumpyRetriever):
+    """
+    NumpyRetriever over the on-disk index written at ingest (mmap_index.py). Vectors, norms and chunk
+    records are read-only memory maps: searches are zero-copy views, and the pages live once in the OS
+    page cache no matter how many worker processes open the index.
+    """
+    name = "mmap"
+
+    def __init__(self, path: str, db_dir: Optional[str] = None, mmap_mode: Optional[str] = "r"):
+        self.path = path
+        self.db_dir = db_dir
+        self.vectors, self.sq_norms, self.documents, self.slices = open_mmap_index(path, mmap_mode)
+
+    @classmethod
+    def load(cls, db_dir: str, embeddings) -> "MmapRetriever":
+        path = mmap_index_path(db_dir)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No mmap index at {path}; run python -m backend.rag.ingest --mmap-index")
+        return cls(path, db_dir)
+
+    def remote_call(self, vector: List[float], k: int, department: Optional[str] = None) -> Tuple[Callable, tuple]:
+        return search_mmap, (self.path, vector, k, department)
+
+    def snapshot(self) -> Dict:
+        return {"backend": self.name, "chunks": len(self.documents), "bytes": int(self.vectors.nbytes),
+                "path": self.path, "mapped": isinstance(self.vectors, np.memmap)}
+
+RETRIEVERS = {"chroma": ChromaRetriever, "numpy": NumpyRetriever, "mmap": MmapRetriever}
+
+def load_retriever(db_dir: str, embeddings, kind: str = RAG_RETRIEVER) -> Retriever:
+    if kind not in RETRIEVERS:
+        raise ValueError(f"Unknown retriever: {kind}")
+    return RETRIEVERS[kind].load(db_dir, embeddings)
+
+# --- Process-pool searches: each worker process opens its own handle on the store ---
+_worker_stores: Dict[Tuple[str, str, Optional[str]], Any] = {}
+
+def search_chroma(db_dir: str, vector: List[float], k: int, where: Optional[Dict] = None,
+                  collection: Optional[str] = None) -> Scored:
+    """
+    Scored vector search in a pool process, from the main or a named collection, optionally
+    restricted by a metadata filter (no embedding model needed: the query is already embedded).
+    """
+    store = _worker_stores.get(("chroma", db_dir, collection))
+    if store is None:
+        from langchain_community.vectorstores import Chroma
+        kwargs = {"collection_name": collection} if collection else {}
+        store = _worker_stores[("chroma", db_dir, collection)] = Chroma(persist_directory=db_dir, **kwargs)
+    return store.similarity_search_by_vector_with_relevance_scores(vector, k=k, filter=where)
+
+def search_numpy(db_dir: str, vector: List[float], k: int, department: Optional[str] = None) -> Scored:
+    """NumPy search in a pool process; the matrix is loaded from the Chroma store once per process."""
+    retriever = _worker_stores.get(("numpy", db_dir, None))
+    if retriever is None:
+        from langchain_community.vectorstores import Chroma
+        retriever = _worker_stores[("numpy", db_dir, None)] = NumpyRetriever.from_chroma(Chroma(persist_directory=db_dir))
+    return retriever.search(vector, k, department)
+
+def search_mmap(path: str, vector: List[float], k: int, department: Optional[str] = None) -> Scored:
+    """Mmap index search in a pool process; mapping the files again shares the pages with the parent."""
+    retriever = _worker_stores.get(("mmap", path, None))
+    if retriever is None:
+        retriever = _worker_stores[("mmap", path, None)] = MmapRetriever(path)
+    return retriever.search(vector, k, department)
@@ -0,0 +1,50 @@
+import os
+import json
+import time
+import hashlib
+from typing import Any, Dict, Optional, Tuple
+from backend.rag.departments import DEPARTMENT_ROADMAPS
+
+# Bump whenever the roadmap prompt changes so old generations are not served
+ROADMAP_PROMPT_VERSION = "v2"
+# After this many seconds a cached roadmap is served stale and regenerated in the background
+ROADMAP_CACHE_FRESH_TTL = int(os.getenv("ROADMAP_CACHE_FRESH_TTL", 7 * 86400))
+# Hard expiry of a cached roadmap in Redis
+ROADMAP_CACHE_MAX_AGE = int(os.getenv("ROADMAP_CACHE_MAX_AGE", 30 * 86400))
+
+# Combinations offered by the frontend, pre-warmed by the scheduler
+KNOWN_DEPARTMENTS = list(DEPARTMENT_ROADMAPS)
+ROADMAP_LEVELS = ["Beginner", "Intermediate", "Advanced"]
+
+def goals_hash(goals: Optional[str]) -> str:
+    normalized = " ".join((goals or "").lower().split())
+    if not normalized:
+        return "none"
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+class RoadmapCache:
+    """
+    Redis cache of generated roadmaps keyed by (prompt version, department, level, goals hash).
+    Entries older than the fresh TTL are still returned, flagged as stale, so callers can
+    serve them immediately and revalidate in the background.
+    """
+    def __init__(self, client, fresh_ttl: int = ROADMAP_CACHE_FRESH_TTL, max_age: int = ROADMAP_CACHE_MAX_AGE):
+        self.client = client
+        self.fresh_ttl = fresh_ttl
+        self.max_age = max_age
+
+    @staticmethod
+    def key(department: str, level: str, goals: Optional[str] = None) -> str:
+        return f"roadmap:{ROADMAP_PROMPT_VERSION}:{department}:{level}:{goals_hash(goals)}"
+
+    async def get(self, department: str, level: str, goals: Optional[str] = None) -> Optional[Tuple[Dict[str, Any], bool]]:
+        """Returns (roadmap, is_stale) or None on a miss."""
+        raw = await self.client.get(self.key(department, level, goals))
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        return entry["roadmap"], time.time() - entry["created_at"] > self.fresh_ttl
+
+    async def set(self, department: str, level: str, goals: Optional[str], roadmap: Dict[str, Any]):
+        entry = {"created_at": time.time(), "roadmap": roadmap}
+        await self.client.set(self.key(department, level, goals), json.dumps(entry), ex=self.max_age)
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import uuid
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+# Minimum cosine similarity between a new query and a cached one to reuse its answer
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", 86400))
+# Max cached answers per (department, intent) bucket; least recently used are evicted first
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 200))
+# History whose last user message is at least this similar to the query counts as a follow-up (no caching)
+SEMANTIC_CACHE_HISTORY_RELEVANCE = float(os.getenv("SEMANTIC_CACHE_HISTORY_RELEVANCE", 0.5))
+
+def decode_vector(data) -> np.ndarray:
+    """float32 vector from packed bytes read through Redis (also used by the embedding cache)."""
+    if isinstance(data, str):
+        # Text-mode connection: binary values come back surrogate-escaped
+        data = data.encode("utf-8", "surrogateescape")
+    return np.frombuffer(data, dtype=np.float32)
+
+def normalize(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+class SemanticCache:
+    """
+    Redis-backed cache of chat answers, looked up by query-embedding similarity.
+
+    Layout (all keys carry a generation number so re-ingestion can invalidate everything at once):
+      semcache:generation                          -> int, bumped by invalidate()
+      semcache:{gen}:index:{department}:{intent}   -> zset of entry ids scored by last access time (LRU)
+      semcache:{gen}:vectors:{department}:{intent} -> hash of entry id -> packed float32 query vector
+      semcache:{gen}:entry:{id}                    -> JSON {query, response}, expires after TTL
+      semcache:stats                               -> hash of hits / misses / evictions
+
+    A lookup reads only the bucket's vectors; the answer text is fetched for the winning entry alone.
+    """
+    def __init__(self, client, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 ttl: int = SEMANTIC_CACHE_TTL, max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.client = client
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    async def _prefix(self) -> str:
+        return f"semcache:{int(await self.client.get('semcache:generation') or 0)}"
+
+    async def lookup(self, department: str, intent: str, vector) -> Optional[Tuple[str, float]]:
+        """Returns (response, similarity) of the closest cached answer above threshold, else None."""
+        prefix = await self._prefix()
+        index_key = f"{prefix}:index:{department}:{intent}"
+        vectors_key = f"{prefix}:vectors:{department}:{intent}"
+        vectors = await self.client.hgetall(vectors_key)
+        if vectors:
+            entry_ids = list(vectors)
+            sims = np.stack([decode_vector(vectors[e]) for e in entry_ids]) @ normalize(vector)
+            i = int(np.argmax(sims))
+            if sims[i] >= self.threshold:
+                entry_id = entry_ids[i]
+                async with self.client.pipeline(transaction=False) as pipe:
+                    pipe.get(f"{prefix}:entry:{entry_id}")
+                    pipe.zadd(index_key, {entry_id: time.time()}, xx=True)
+                    pipe.hincrby("semcache:stats", "hits", 1)
+                    raw = (await pipe.execute())[0]
+                if raw is not None:
+                    return json.loads(raw)["response"], float(sims[i])
+                # Answer expired before its bucket: forget it and count the lookup as a miss
+                async with self.client.pipeline(transaction=False) as pipe:
+                    pipe.hdel(vectors_key, entry_id)
+                    pipe.zrem(index_key, entry_id)
+                    pipe.hincrby("semcache:stats", "hits", -1)
+                    pipe.hincrby("semcache:stats", "misses", 1)
+                    await pipe.execute()
+                return None
+
+        await self.client.hincrby("semcache:stats", "misses", 1)
+        return None
+
+    async def store(self, department: str, intent: str, query: str, vector, response: str):
+        prefix = await self._prefix()
+        index_key = f"{prefix}:index:{department}:{intent}"
+        vectors_key = f"{prefix}:vectors:{department}:{intent}"
+        entry_id = uuid.uuid4().hex
+        entry = {"query": query, "response": response}
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(f"{prefix}:entry:{entry_id}", json.dumps(entry), ex=self.ttl)
+            pipe.hset(vectors_key, entry_id, normalize(vector).tobytes())
+            pipe.expire(vectors_key, self.ttl)
+            pipe.zadd(index_key, {entry_id: time.time()})
+            pipe.expire(index_key, self.ttl)
+            pipe.zcard(index_key)
+            size = (await pipe.execute())[-1]
+
+        overflow = size - self.max_entries
+        if overflow > 0:
+            evicted = [e for e, _ in await self.client.zpopmin(index_key, overflow)]
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.delete(*[f"{prefix}:entry:{e}" for e in evicted])
+                pipe.hdel(vectors_key, *evicted)
+                pipe.hincrby("semcache:stats", "evictions", len(evicted))
+                await pipe.execute()
+
+    async def invalidate(self):
+        """Drops every cached answer by moving to a new generation (old keys expire on their own)."""
+        await self.client.incr("semcache:generation")
+
+    async def stats(self) -> Dict[str, float]:
+        raw = await self.client.hgetall("semcache:stats")
+        hits, misses = int(raw.get("hits", 0)), int(raw.get("misses", 0))
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": int(raw.get("evictions", 0)),
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        }
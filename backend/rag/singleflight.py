@@ -0,0 +1,93 @@
+import os
+import json
+import uuid
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+# Also coalesce across uvicorn workers through a Redis lock + result key
+SINGLEFLIGHT_DISTRIBUTED = os.getenv("SINGLEFLIGHT_DISTRIBUTED", "false").lower() == "true"
+# How long the leader may hold the lock, and how long followers wait for its result
+SINGLEFLIGHT_LOCK_TTL = float(os.getenv("SINGLEFLIGHT_LOCK_TTL", 120))
+SINGLEFLIGHT_RESULT_TTL = float(os.getenv("SINGLEFLIGHT_RESULT_TTL", 10))
+SINGLEFLIGHT_POLL_INTERVAL = 0.1
+
+# Deletes the lock only if we still own it
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class RedisUnavailable(Exception):
+    pass
+
+class SingleFlight:
+    """
+    Deduplicates identical in-flight async work: concurrent callers with the same key
+    await one shared task instead of each starting their own.
+
+    The shared task is shielded, so a caller being cancelled (e.g. client disconnect)
+    does not cancel the work for everybody else. With a Redis client and distributed=True,
+    the first worker to take `sf:lock:{key}` does the work and publishes the JSON result
+    under `sf:result:{key}`; other workers poll for it and fall back to doing the work
+    themselves if the leader disappears.
+    """
+    def __init__(self, client=None, distributed: bool = SINGLEFLIGHT_DISTRIBUTED):
+        self.client = client
+        self.distributed = distributed and client is not None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"executed": 0, "shared": 0, "remote": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run(key, fn))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats["shared"] += 1
+        return await asyncio.shield(task)
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.distributed:
+            self.stats["executed"] += 1
+            return await fn()
+        try:
+            return await self._run_distributed(key, fn)
+        except RedisUnavailable:
+            self.stats["executed"] += 1
+            return await fn()
+
+    async def _run_distributed(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        lock_key, result_key = f"sf:lock:{key}", f"sf:result:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.client.set(lock_key, token, nx=True, px=int(SINGLEFLIGHT_LOCK_TTL * 1000))
+        except Exception as e:
+            raise RedisUnavailable() from e
+
+        if acquired:
+            self.stats["executed"] += 1
+            try:
+                result = await fn()
+                await self.client.set(result_key, json.dumps(result), px=int(SINGLEFLIGHT_RESULT_TTL * 1000))
+                return result
+            finally:
+                await self.client.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+
+        # Another worker is leading: wait for its result while its lock is alive
+        while True:
+            await asyncio.sleep(SINGLEFLIGHT_POLL_INTERVAL)
+            # Check the lock before the result (one round-trip): the leader writes the result before releasing
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.exists(lock_key)
+                pipe.get(result_key)
+                lock_alive, raw = await pipe.execute()
+            if raw is not None:
+                self.stats["remote"] += 1
+                return json.loads(raw)
+            if not lock_alive:
+                # Leader finished without a result (failed or result expired): do it ourselves
+                self.stats["executed"] += 1
+                return await fn()
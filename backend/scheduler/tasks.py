@@ -1,12 +1,26 @@
 from apscheduler.schedulers.background import BackgroundScheduler
+import asyncio
 import datetime
+import os
 
 scheduler = BackgroundScheduler()
 
-def start_scheduler():
+# Hour of day (server time) for off-peak roadmap pre-generation
+ROADMAP_WARM_HOUR = int(os.getenv("ROADMAP_WARM_HOUR", 3))
+
+def start_scheduler(loop: asyncio.AbstractEventLoop = None):
     scheduler.add_job(check_reminders, 'interval', minutes=60)
+    if loop is not None:
+        scheduler.add_job(warm_roadmap_cache, 'cron', hour=ROADMAP_WARM_HOUR, args=[loop])
     scheduler.start()
 
 def check_reminders():
     print(f"[{datetime.datetime.now()}] Checking for active user reminders...")
     # SQL query to find due reminders would go here
+
+def warm_roadmap_cache(loop: asyncio.AbstractEventLoop):
+    """Pre-generates all department/level roadmaps on the app's event loop (shared LLM client)."""
+    from backend.rag.engine import rag_engine
+    print(f"[{datetime.datetime.now()}] Pre-warming roadmap cache...")
+    asyncio.run_coroutine_threadsafe(rag_engine.warm_roadmaps(), loop).result()
+    print(f"[{datetime.datetime.now()}] Roadmap cache warm.")
@@ -0,0 +1,66 @@
+import os
+import json
+import zlib
+from typing import Any, Union
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Payload format for new Redis writes: "json" (plain text, readable by older code) or "msgpack" (compact binary)
+REDIS_CODEC = os.getenv('REDIS_CODEC', 'json')
+# Payloads at least this many bytes are zlib-compressed (e.g. 1024 for long assistant replies); 0 disables
+REDIS_COMPRESS_MIN_BYTES = int(os.getenv('REDIS_COMPRESS_MIN_BYTES', 0))
+
+# Version tag: first byte of every non-legacy payload. Plain JSON ("{...") is untagged.
+TAG_MSGPACK = 0x01
+TAG_MSGPACK_ZLIB = 0x02
+TAG_JSON_ZLIB = 0x03
+
+class Codec:
+    """
+    Encodes chat message payloads as JSON or msgpack, zlib-compressing large ones. Task hashes
+    do not go through the codec: the task Lua scripts edit them in place with cjson.
+
+    Binary payloads start with a tag byte; anything else is decoded as legacy JSON, so entries
+    written before the codec (or by a JSON-configured worker) stay readable whatever the setting.
+    Binary values come back from the text-mode connection as surrogate-escaped str (see redis_client).
+    """
+    def __init__(self, fmt: str = REDIS_CODEC, compress_min_bytes: int = REDIS_COMPRESS_MIN_BYTES):
+        if fmt == "msgpack" and msgpack is None:
+            print("⚠️ REDIS_CODEC=msgpack but msgpack is not installed, falling back to JSON")
+            fmt = "json"
+        if fmt not in ("json", "msgpack"):
+            raise ValueError(f"Unknown Redis codec: {fmt}")
+        self.fmt = fmt
+        self.compress_min_bytes = compress_min_bytes
+
+    def _should_compress(self, payload: bytes) -> bool:
+        return 0 < self.compress_min_bytes <= len(payload)
+
+    def encode(self, obj: Any) -> Union[str, bytes]:
+        if self.fmt == "msgpack":
+            payload = msgpack.packb(obj, use_bin_type=True)
+            if self._should_compress(payload):
+                return bytes([TAG_MSGPACK_ZLIB]) + zlib.compress(payload)
+            return bytes([TAG_MSGPACK]) + payload
+
+        text = json.dumps(obj)
+        payload = text.encode("utf-8")
+        if self._should_compress(payload):
+            return bytes([TAG_JSON_ZLIB]) + zlib.compress(payload)
+        return text
+
+    @staticmethod
+    def decode(data: Union[str, bytes]) -> Any:
+        if isinstance(data, str):
+            data = data.encode("utf-8", "surrogateescape")
+        tag = data[0] if data else None
+        if tag == TAG_MSGPACK:
+            return msgpack.unpackb(data[1:], raw=False)
+        if tag == TAG_MSGPACK_ZLIB:
+            return msgpack.unpackb(zlib.decompress(data[1:]), raw=False)
+        if tag == TAG_JSON_ZLIB:
+            return json.loads(zlib.decompress(data[1:]))
+        return json.loads(data)
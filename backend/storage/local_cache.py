@@ -0,0 +1,236 @@
+import os
+import time
+import asyncio
+import itertools
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import redis.asyncio as redis
+
+# "tracking": coherent via Redis client-side-caching invalidations (falls back to "ttl" if unsupported)
+# "ttl": entries expire after LOCAL_CACHE_TTL, other workers' writes may be seen that late; "off": disabled
+LOCAL_CACHE_MODE = os.getenv('REDIS_LOCAL_CACHE', 'tracking')
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv('REDIS_LOCAL_CACHE_MAX_ENTRIES', 2048))
+LOCAL_CACHE_TTL = float(os.getenv('REDIS_LOCAL_CACHE_TTL', 5))
+# Upper bound on entry age even while invalidations are flowing (guards against a lost message)
+LOCAL_CACHE_MAX_AGE = float(os.getenv('REDIS_LOCAL_CACHE_MAX_AGE', 300))
+# Key prefixes the server broadcasts invalidations for (must cover every key cached by RedisClient)
+TRACKED_PREFIXES = ("chat:", "tasks:", "study:")
+
+INVALIDATION_CHANNEL = "__redis__:invalidate"
+# How long a write of ours waits for its own invalidation message before the expectation is dropped
+OWN_WRITE_WINDOW = 2.0
+
+MISSING = object()
+
+class LocalCache:
+    """
+    Size-bounded in-process LRU of decoded Redis reads (chat history, tasks, study stats).
+
+    Each entry depends on one or more Redis keys; an invalidation of any of them drops it.
+    Fills are guarded by per-key epochs: take snapshot(keys) before reading Redis and pass it to
+    set(); if an invalidation for those keys arrived in between, the (possibly stale) value is discarded.
+
+    While `coherent` (the invalidation listener is subscribed) entries live up to LOCAL_CACHE_MAX_AGE;
+    otherwise they expire after `ttl`, which bounds how stale another worker's write can be seen.
+    """
+    def __init__(self, max_entries: int = LOCAL_CACHE_MAX_ENTRIES, ttl: float = LOCAL_CACHE_TTL,
+                 max_age: float = LOCAL_CACHE_MAX_AGE, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_age = max_age
+        self.clock = clock
+        self.coherent = False
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._dependents: Dict[str, Set[str]] = {}
+        # Epoch of the last invalidation per Redis key; forgotten keys report the floor instead
+        self._epochs: "OrderedDict[str, int]" = OrderedDict()
+        self._epoch_floor = 0
+        self._counter = itertools.count(1)
+        # Bumped by clear(): fills that started before a flush are discarded too
+        self._generation = 0
+        # Redis keys we just wrote ourselves -> deadline: their next invalidation is our own echo
+        self._own_writes: Dict[str, float] = {}
+        self.hits = self.misses = self.invalidations = self.evictions = 0
+
+    def get(self, name: str) -> Any:
+        entry = self._entries.get(name)
+        if entry is None or entry[0] < self.clock():
+            if entry is not None:
+                self._drop(name)
+            self.misses += 1
+            return MISSING
+        self._entries.move_to_end(name)
+        self.hits += 1
+        return entry[1]
+
+    def snapshot(self, keys: Iterable[str]) -> Tuple[int, ...]:
+        return (self._generation,) + tuple(self._epochs.get(k, self._epoch_floor) for k in keys)
+
+    def set(self, name: str, value: Any, keys: List[str], since: Tuple[int, ...]):
+        """Caches `value` under `name` unless one of `keys` was invalidated after `since` was taken."""
+        if self.snapshot(keys) != since:
+            return
+        if name in self._entries:
+            self._drop(name)
+        expires_at = self.clock() + (self.max_age if self.coherent else self.ttl)
+        self._entries[name] = (expires_at, value, tuple(keys))
+        for key in keys:
+            self._dependents.setdefault(key, set()).add(name)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, keys: Iterable[str]):
+        """Drops every entry depending on `keys` (our own writes, or a message from Redis)."""
+        for key in keys:
+            self._epochs[key] = next(self._counter)
+            self._epochs.move_to_end(key)
+            for name in list(self._dependents.get(key, ())):
+                self._drop(name)
+                self.invalidations += 1
+        while len(self._epochs) > 4 * self.max_entries:
+            _, epoch = self._epochs.popitem(last=False)
+            self._epoch_floor = max(self._epoch_floor, epoch)
+
+    def expect_own_write(self, keys: Iterable[str]):
+        """
+        Marks keys we are about to write and then refresh in place (write-through), so the
+        broadcast echo of our own write does not drop the refreshed entry. The first invalidation
+        within OWN_WRITE_WINDOW is taken as the echo; if it was in fact another worker's write,
+        our echo follows it and drops the entry anyway.
+        """
+        if not self.coherent:
+            return
+        now = self.clock()
+        if len(self._own_writes) > self.max_entries:
+            self._own_writes = {k: d for k, d in self._own_writes.items() if d >= now}
+        for key in keys:
+            self._own_writes[key] = now + OWN_WRITE_WINDOW
+
+    def on_invalidation(self, keys: Optional[List[str]]):
+        """Handles a server invalidation message; None means the whole keyspace was flushed."""
+        if keys is None:
+            self.clear()
+            return
+        now = self.clock()
+        foreign = []
+        for key in keys:
+            deadline = self._own_writes.pop(key, None)
+            if deadline is None or deadline < now:
+                foreign.append(key)
+        self.invalidate(foreign)
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+        self._dependents.clear()
+        self._own_writes.clear()
+
+    def _drop(self, name: str):
+        _, _, keys = self._entries.pop(name)
+        for key in keys:
+            names = self._dependents.get(key)
+            if names:
+                names.discard(name)
+                if not names:
+                    del self._dependents[key]
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "mode": "tracking" if self.coherent else "ttl",
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            # Every hit is one Redis round-trip (and decode) that did not happen
+            "saved_round_trips": self.hits,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+        }
+
+class InvalidationListener:
+    """
+    Keeps a LocalCache coherent across workers with Redis client-side caching in broadcast mode:
+    one dedicated connection enables CLIENT TRACKING BCAST for TRACKED_PREFIXES, redirected to
+    itself, and subscribes to __redis__:invalidate. If tracking is unavailable or the connection
+    drops, the cache is flushed and runs in TTL mode until the subscription is re-established.
+
+    This is the RESP2 form of tracking (REDIRECT to a subscribed connection) rather than RESP3
+    invalidation pushes: redis-py's asyncio client only surfaces those through private parser
+    hooks, and REDIRECT also works with servers and proxies that speak RESP2 only. Messages are
+    read straight off the connection because a subscribed connection takes no other commands, and
+    a PubSub object would silently reconnect under a new client id, orphaning the redirect.
+    """
+    def __init__(self, cache: LocalCache, host: str, port: int, db: int = 0, retry_delay: float = 5.0):
+        self.cache = cache
+        self.host, self.port, self.db = host, port, db
+        self.retry_delay = retry_delay
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.cache.coherent = False
+
+    async def _run(self):
+        warned = False
+        while True:
+            conn = redis.Redis(host=self.host, port=self.port, db=self.db, decode_responses=True,
+                               single_connection_client=True)
+            try:
+                client_id = await conn.client_id()
+                prefixes = [arg for p in TRACKED_PREFIXES for arg in ("PREFIX", p)]
+                await conn.execute_command("CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST", *prefixes)
+                await conn.execute_command("SUBSCRIBE", INVALIDATION_CHANNEL)
+                # Anything cached before the subscription may have missed invalidations
+                self.cache.clear()
+                self.cache.coherent = True
+                warned = False
+                print("🔔 Local Redis cache: tracking invalidations")
+                while True:
+                    message = await conn.connection.read_response()
+                    if message and message[0] == "message" and message[1] == INVALIDATION_CHANNEL:
+                        self.cache.on_invalidation(message[2])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.cache.coherent:
+                    print(f"⚠️ Local Redis cache: invalidation stream lost ({e}), using TTL mode")
+                elif not warned:
+                    print(f"⚠️ Local Redis cache: tracking unavailable ({e}), using TTL mode")
+                warned = True
+                self.cache.coherent = False
+                self.cache.clear()
+            finally:
+                await conn.aclose()
+            await asyncio.sleep(self.retry_delay)
+
+local_cache = LocalCache()
+_listener: Optional[InvalidationListener] = None
+
+def get_local_cache() -> Optional[LocalCache]:
+    """The process-wide cache shared by every pooled RedisClient (None when REDIS_LOCAL_CACHE=off)."""
+    return None if LOCAL_CACHE_MODE == "off" else local_cache
+
+def start_invalidation_listener(host: str, port: int, db: int = 0):
+    """Called on app startup; in TTL mode (or off) there is nothing to listen to."""
+    global _listener
+    if LOCAL_CACHE_MODE == "tracking" and _listener is None:
+        _listener = InvalidationListener(local_cache, host, port, db)
+        _listener.start()
+
+async def stop_invalidation_listener():
+    global _listener
+    if _listener:
+        await _listener.stop()
+        _listener = None
@@ -0,0 +1,38 @@
+"""
+One-off migration for sessions created before the maintained counters existed:
+- builds study:agg:{session_id} totals for every legacy study:{session_id} list
+- rebuilds tasks:done:{session_id} (completed task ids) for every tasks:{session_id} hash
+
+Study sessions are also migrated lazily on their next log or stats read; task counters are not,
+so run this once when deploying.
+
+Usage (from repo root):
+    python -m backend.storage.migrate_counters
+"""
+from backend.storage.redis_client import SyncRedisClient
+
+def scan_sessions(redis_client, pattern: str, key_type: str):
+    """Yields the session id of every key matching `pattern` (e.g. "study:*") of the given Redis type."""
+    prefix = pattern.rstrip("*")
+    cursor = 0
+    while True:
+        cursor, keys = redis_client.run(redis_client.client.scan(cursor, match=pattern, count=500, _type=key_type))
+        for key in keys:
+            yield key[len(prefix):]
+        if cursor == 0:
+            break
+
+def migrate():
+    redis_client = SyncRedisClient()
+    studies = tasks = 0
+    for session_id in scan_sessions(redis_client, "study:*", "list"):
+        redis_client.backfill_study_aggregates(session_id)
+        studies += 1
+    for session_id in scan_sessions(redis_client, "tasks:*", "hash"):
+        redis_client.rebuild_task_counters(session_id)
+        tasks += 1
+    redis_client.close()
+    print(f"✅ Backfilled study aggregates for {studies} sessions and task counters for {tasks} sessions.")
+
+if __name__ == "__main__":
+    migrate()
@@ -1,110 +1,454 @@
-import redis
+import redis.asyncio as redis
+from redis.exceptions import NoScriptError
+import asyncio
+import datetime
 import json
 import os
-from typing import List, Dict
+from typing import List, Dict, Tuple, Optional
+from backend.storage.codec import Codec
+from backend.storage.local_cache import LocalCache, MISSING, get_local_cache
+
+# Upper bound on connections per worker; callers wait for a free one instead of failing
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
+
+_pools: Dict[Tuple[str, int, int], redis.BlockingConnectionPool] = {}
+
+# Raw timestamped study sessions older than this are dropped; day/week rollups are kept forever
+STUDY_SERIES_RETENTION_DAYS = int(os.getenv('STUDY_SERIES_RETENTION_DAYS', 400))
+
+def get_connection_pool(host: str, port: int, db: int) -> redis.BlockingConnectionPool:
+    """One shared connection pool per Redis database, reused by every RedisClient in the process."""
+    key = (host, port, db)
+    if key not in _pools:
+        _pools[key] = redis.BlockingConnectionPool(
+            host=host, port=port, db=db, decode_responses=True, max_connections=REDIS_MAX_CONNECTIONS,
+            # Lets binary codec payloads round-trip through the text-mode connection
+            encoding_errors="surrogateescape"
+        )
+    return _pools[key]
+
+# Builds study:agg from a pre-aggregate study:{session_id} list if the hash does not exist yet and the list
+# is non-empty, so reading stats of a session without history writes nothing.
+# Legacy entries carry no timestamp, so they only count towards the totals, not day/week buckets.
+_BACKFILL_STUDY_LUA = """
+if redis.call('exists', KEYS[2]) == 0 and redis.call('llen', KEYS[1]) > 0 then
+    local sessions = redis.call('lrange', KEYS[1], 0, -1)
+    local total = 0
+    for _, m in ipairs(sessions) do total = total + tonumber(m) end
+    redis.call('hset', KEYS[2], 'count', #sessions, 'total_minutes', total)
+end
+"""
+
+# KEYS: study list, study:agg, study:daily, study:weekly, study:ts
+# ARGV: minutes, day, week, epoch seconds, series member, retention cutoff (epoch seconds)
+# The legacy list is only read for backfill; new sessions go to the study:ts sorted set.
+LOG_STUDY_LUA = _BACKFILL_STUDY_LUA + """
+redis.call('hincrby', KEYS[2], 'count', 1)
+redis.call('hincrby', KEYS[2], 'total_minutes', ARGV[1])
+redis.call('hincrby', KEYS[3], ARGV[2], ARGV[1])
+redis.call('hincrby', KEYS[4], ARGV[3], ARGV[1])
+redis.call('zadd', KEYS[5], ARGV[4], ARGV[5])
+redis.call('zremrangebyscore', KEYS[5], '-inf', '(' .. ARGV[6])
+"""
+
+# KEYS: study list, study:agg | returns {count, total_minutes}
+STUDY_STATS_LUA = _BACKFILL_STUDY_LUA + """
+return redis.call('hmget', KEYS[2], 'count', 'total_minutes')
+"""
+
+# Task counters: total = HLEN tasks:{sid}, completed = SCARD tasks:done:{sid} (ids of completed tasks).
+# Every task mutation keeps the done set in step with the hash inside the same atomic call.
+
+# KEYS: tasks hash, done set | ARGV: task id, JSON patch | returns 1 if the task existed and was updated
+UPDATE_TASK_LUA = """
+local current = redis.call('hget', KEYS[1], ARGV[1])
+if not current then return 0 end
+local task = cjson.decode(current)
+for field, value in pairs(cjson.decode(ARGV[2])) do task[field] = value end
+redis.call('hset', KEYS[1], ARGV[1], cjson.encode(task))
+if task.completed == true then redis.call('sadd', KEYS[2], ARGV[1]) else redis.call('srem', KEYS[2], ARGV[1]) end
+return 1
+"""
+
+# KEYS: tasks hash, done set | ARGV: "1" to skip existing ids, then (id, payload, completed "1"/"0") triples
+# Returns one 0/1 per task: whether it was written
+ADD_TASKS_LUA = """
+local written = {}
+for i = 2, #ARGV, 3 do
+    local id = ARGV[i]
+    local ok = 1
+    if ARGV[1] == '1' then
+        ok = redis.call('hsetnx', KEYS[1], id, ARGV[i + 1])
+    else
+        redis.call('hset', KEYS[1], id, ARGV[i + 1])
+    end
+    if ok == 1 then
+        if ARGV[i + 2] == '1' then redis.call('sadd', KEYS[2], id) else redis.call('srem', KEYS[2], id) end
+    end
+    written[#written + 1] = ok
+end
+return written
+"""
+
+def task_keys(session_id: str) -> List[str]:
+    return [f"tasks:{session_id}", f"tasks:done:{session_id}"]
+
+def study_keys(session_id: str) -> List[str]:
+    return [f"study:{session_id}", f"study:agg:{session_id}", f"study:daily:{session_id}",
+            f"study:weekly:{session_id}", f"study:ts:{session_id}"]
+
+def day_bucket(when: datetime.date) -> str:
+    return when.strftime("%Y-%m-%d")
+
+def week_bucket(when: datetime.date) -> str:
+    year, week, _ = when.isocalendar()
+    return f"{year}-W{week:02d}"
+
+async def close_connection_pools():
+    """Disconnects all shared pools (called on app shutdown)."""
+    for pool in _pools.values():
+        await pool.disconnect()
+    _pools.clear()
 
 class RedisClient:
-    def __init__(self, host=os.getenv('REDIS_HOST', 'localhost'), port=int(os.getenv('REDIS_PORT', 6379)), db=0):
-        self.client = redis.Redis(host=host, port=port, db=db, decode_responses=True)
+    """
+    Async Redis storage for chat history, tasks and study sessions.
+    Operations that touch several keys or commands are sent as one pipelined
+    MULTI/EXEC transaction, i.e. one network round-trip per logical operation.
+
+    Reads of chat history, tasks and study stats are served from an in-process LocalCache
+    when one is attached: by default the shared one for pooled clients, none for an injected `client`.
+    """
+    def __init__(self, host=os.getenv('REDIS_HOST', 'localhost'), port=int(os.getenv('REDIS_PORT', 6379)), db=0,
+                 client=None, codec: Optional[Codec] = None, cache: Optional[LocalCache] = None):
+        self.cache = cache if (cache is not None or client is not None) else get_local_cache()
+        self.client = client or redis.Redis(connection_pool=get_connection_pool(host, port, db))
         self.expiry = 86400  # 24 hours
+        # Chat messages go through the configurable codec. Tasks stay plain JSON: the Lua scripts edit them with cjson.
+        self.codec = codec or Codec()
+        self._log_study = self.client.register_script(LOG_STUDY_LUA)
+        self._study_stats = self.client.register_script(STUDY_STATS_LUA)
+        self._update_task = self.client.register_script(UPDATE_TASK_LUA)
+        self._add_tasks = self.client.register_script(ADD_TASKS_LUA)
+
+    async def load_scripts(self):
+        """
+        Loads the Lua scripts into Redis' script cache (called on startup) so the first
+        EVALSHA of each succeeds instead of paying an extra NOSCRIPT + SCRIPT LOAD round-trip.
+        """
+        for script in (self._log_study, self._study_stats, self._update_task, self._add_tasks):
+            await self.client.script_load(script.script)
+
+    async def _execute_scripted(self, build) -> List:
+        """
+        Runs a non-transactional pipeline filled by build(pipe), which may EVALSHA our scripts.
+        If Redis' script cache was flushed (or never loaded), nothing ran: reload and retry once.
+        """
+        async def run():
+            async with self.client.pipeline(transaction=False) as pipe:
+                build(pipe)
+                return await pipe.execute()
+        try:
+            return await run()
+        except NoScriptError:
+            await self.load_scripts()
+            return await run()
+
+    async def _cached(self, name: str, keys: List[str], load):
+        """Returns the cached value for `name` or awaits load() and caches it (dropped when any of `keys` changes)."""
+        if self.cache is None:
+            return await load()
+        value = self.cache.get(name)
+        if value is not MISSING:
+            return value
+        since = self.cache.snapshot(keys)
+        value = await load()
+        self.cache.set(name, value, keys, since)
+        return value
 
-    def add_message(self, session_id: str, role: str, content: str):
+    def _invalidate(self, *keys: str):
+        """Called after our own writes so this worker never reads its own stale data."""
+        if self.cache is not None:
+            self.cache.invalidate(keys)
+
+    async def add_message(self, session_id: str, role: str, content: str):
         """Adds a message to the session history."""
-        if not session_id:
+        await self.add_messages(session_id, [(role, content)])
+
+    async def add_messages(self, session_id: str, messages: List[Tuple[str, str]]):
+        """
+        Appends several (role, content) messages, trims and refreshes expiry in one round-trip.
+        With a local cache the same transaction reads back the trimmed history (write-through),
+        so the next turn's get_context on this worker needs no round-trip.
+        """
+        if not session_id or not messages:
             return
-            
+
         key = f"chat:{session_id}"
-        message = json.dumps({"role": role, "content": content})
-        
-        # Push to list (Right Push)
-        self.client.rpush(key, message)
-        
-        # Trim to keep only last 20 messages (10 interactions)
-        self.client.ltrim(key, -20, -1)
-        
-        # Reset expiry on update
-        self.client.expire(key, self.expiry)
-
-    def get_context(self, session_id: str, limit: int = 10) -> List[Dict[str, str]]:
+        if self.cache is not None:
+            self.cache.expect_own_write([key])
+            since = self.cache.snapshot([key])
+        async with self.client.pipeline(transaction=True) as pipe:
+            # Push to list (Right Push)
+            pipe.rpush(key, *[self.codec.encode({"role": role, "content": content}) for role, content in messages])
+            # Trim to keep only last 20 messages (10 interactions)
+            pipe.ltrim(key, -20, -1)
+            # Reset expiry on update
+            pipe.expire(key, self.expiry)
+            if self.cache is not None:
+                pipe.lrange(key, 0, -1)
+            results = await pipe.execute()
+        if self.cache is not None:
+            self.cache.set(key, [self.codec.decode(m) for m in results[-1]], [key], since)
+
+    async def _load_chat(self, key: str) -> List[Dict[str, str]]:
+        return [self.codec.decode(m) for m in await self.client.lrange(key, 0, -1)]
+
+    async def get_context(self, session_id: str, limit: int = 10) -> List[Dict[str, str]]:
         """Retrieves the last N messages for context."""
         if not session_id:
             return []
-            
+
         key = f"chat:{session_id}"
+        if self.cache is not None:
+            # The list is capped at 20 messages, so cache it whole and slice
+            messages = await self._cached(key, [key], lambda: self._load_chat(key))
+            return [dict(m) for m in messages[-limit:]]
         # Get last 'limit' messages
-        messages = self.client.lrange(key, -limit, -1)
-        return [json.loads(m) for m in messages]
+        messages = await self.client.lrange(key, -limit, -1)
+        return [self.codec.decode(m) for m in messages]
 
-    def get_chat_history(self, session_id: str) -> List[Dict[str, str]]:
+    async def get_chat_history(self, session_id: str) -> List[Dict[str, str]]:
         """Retrieves default full history for the frontend."""
         if not session_id:
             return []
-            
+
         key = f"chat:{session_id}"
         # Get all messages
-        messages = self.client.lrange(key, 0, -1)
-        return [json.loads(m) for m in messages]
+        messages = await self._cached(key, [key], lambda: self._load_chat(key))
+        return [dict(m) for m in messages]
 
 
-    def clear_history(self, session_id: str):
+    async def clear_history(self, session_id: str):
         """Clears the session history."""
         if session_id:
-            self.client.delete(f"chat:{session_id}")
+            await self.client.delete(f"chat:{session_id}")
+            self._invalidate(f"chat:{session_id}")
 
-    def delete_session_data(self, session_id: str):
+    async def delete_session_data(self, session_id: str):
         """Wipes all data associated with a session (chat, tasks, study)."""
         if not session_id:
             return
-        keys = [f"chat:{session_id}", f"tasks:{session_id}", f"study:{session_id}"]
-        self.client.delete(*keys)
+        keys = [f"chat:{session_id}", *task_keys(session_id), *study_keys(session_id)]
+        await self.client.delete(*keys)
+        self._invalidate(*keys)
 
     # --- Productivity Features ---
-    def add_task(self, session_id: str, task: Dict) -> str:
+    async def add_task(self, session_id: str, task: Dict) -> str:
         """Adds a task to the user's list."""
         if not session_id: return ""
-        task_id = task.get("id")
-        key = f"tasks:{session_id}"
-        self.client.hset(key, task_id, json.dumps(task))
-        return task_id
+        await self.add_tasks(session_id, [task])
+        return task.get("id")
 
-    def get_tasks(self, session_id: str) -> List[Dict]:
+    async def get_tasks(self, session_id: str) -> List[Dict]:
         """Retrieves all tasks for a user."""
         if not session_id: return []
         key = f"tasks:{session_id}"
-        tasks = self.client.hgetall(key)
-        return [json.loads(t) for t in tasks.values()]
 
-    def update_task(self, session_id: str, task_id: str, data: Dict):
-        """Updates a specific task."""
-        if not session_id: return
-        key = f"tasks:{session_id}"
-        # Check if exists first
-        current = self.client.hget(key, task_id)
-        if current:
-            task = json.loads(current)
-            task.update(data)
-            self.client.hset(key, task_id, json.dumps(task))
-
-    def delete_task(self, session_id: str, task_id: str):
+        async def load():
+            return [json.loads(t) for t in (await self.client.hgetall(key)).values()]
+
+        return [dict(t) for t in await self._cached(key, [key], load)]
+
+    async def update_task(self, session_id: str, task_id: str, data: Dict) -> bool:
+        """
+        Merges `data` into a task server-side: one atomic round-trip, so concurrent
+        updates to the same task never overwrite each other. Returns False if the task does not exist.
+        """
+        if not session_id: return False
+        updated = await self._update_task(keys=task_keys(session_id), args=[task_id, json.dumps(data)])
+        self._invalidate(*task_keys(session_id))
+        return bool(updated)
+
+    async def delete_task(self, session_id: str, task_id: str):
         """Deletes a task."""
         if not session_id: return
-        key = f"tasks:{session_id}"
-        self.client.hdel(key, task_id)
+        await self.delete_tasks(session_id, [task_id])
+
+    # --- Bulk task operations: one pipelined round-trip per batch, per-item results ---
+    async def add_tasks(self, session_id: str, tasks: List[Dict], overwrite: bool = True) -> List[bool]:
+        """
+        Stores several tasks (each with an "id"). With overwrite=False existing ids are
+        left untouched (HSETNX). Returns, per task, whether it was written.
+        """
+        if not session_id or not tasks: return []
+        args = ["0" if overwrite else "1"]
+        for task in tasks:
+            args += [task["id"], json.dumps(task), "1" if task.get("completed") else "0"]
+        results = await self._add_tasks(keys=task_keys(session_id), args=args)
+        self._invalidate(*task_keys(session_id))
+        return [bool(r) for r in results]
+
+    async def update_tasks(self, session_id: str, updates: List[Tuple[str, Dict]]) -> List[bool]:
+        """Applies several (task_id, data) merges atomically per task. Returns, per update, whether the task existed."""
+        if not session_id or not updates: return []
+        keys = task_keys(session_id)
+
+        def build(pipe):
+            for task_id, data in updates:
+                pipe.evalsha(self._update_task.sha, 2, *keys, task_id, json.dumps(data))
+
+        results = await self._execute_scripted(build)
+        self._invalidate(*keys)
+        return [bool(r) for r in results]
+
+    async def delete_tasks(self, session_id: str, task_ids: List[str]) -> List[bool]:
+        """Deletes several tasks. Returns, per id, whether it existed."""
+        if not session_id or not task_ids: return []
+        key, done_key = task_keys(session_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            for task_id in task_ids:
+                pipe.hdel(key, task_id)
+                pipe.srem(done_key, task_id)
+            results = await pipe.execute()
+        self._invalidate(key, done_key)
+        return [bool(r) for r in results[::2]]
+
+    async def get_task_stats(self, session_id: str) -> Dict[str, int]:
+        """Task totals from the maintained counters, without decoding any task."""
+        return (await self.get_analytics(session_id))["task_stats"]
+
+    async def rebuild_task_counters(self, session_id: str):
+        """Recomputes the completed-task set from the task bodies (migration for pre-counter sessions)."""
+        key, done_key = task_keys(session_id)
+        tasks = await self.client.hgetall(key)
+        done = [task_id for task_id, t in tasks.items() if json.loads(t).get("completed")]
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(done_key)
+            if done:
+                pipe.sadd(done_key, *done)
+            await pipe.execute()
+        self._invalidate(done_key)
+
+    async def get_analytics(self, session_id: str) -> Dict[str, Dict[str, int]]:
+        """Study and task totals in one pipelined round-trip; constant time in history and task count."""
+        if not session_id:
+            return {"study_stats": {"total_sessions": 0, "total_minutes": 0},
+                    "task_stats": {"total": 0, "completed": 0, "pending": 0}}
+
+        def build(pipe):
+            pipe.evalsha(self._study_stats.sha, 2, *study_keys(session_id)[:2])
+            pipe.hlen(task_keys(session_id)[0])
+            pipe.scard(task_keys(session_id)[1])
+
+        async def load():
+            (sessions, minutes), total, completed = await self._execute_scripted(build)
+            return {
+                "study_stats": {"total_sessions": int(sessions or 0), "total_minutes": int(minutes or 0)},
+                "task_stats": {"total": total, "completed": completed, "pending": total - completed},
+            }
+
+        keys = [study_keys(session_id)[1], *task_keys(session_id)]
+        analytics = await self._cached(f"analytics:{session_id}", keys, load)
+        return {name: dict(stats) for name, stats in analytics.items()}
 
-    def log_study_session(self, session_id: str, minutes: int):
-        """Logs a completed study session."""
+    async def log_study_session(self, session_id: str, minutes: int, when: Optional[datetime.datetime] = None):
+        """
+        Logs a completed study session into the timestamped series and updates the running
+        aggregates (count, total minutes, per-day and per-week minutes) atomically in one round-trip.
+        """
         if not session_id: return
-        key = f"study:{session_id}"
-        # Store as simple list of durations
-        self.client.rpush(key, minutes)
+        when = when or datetime.datetime.now(datetime.timezone.utc)
+        ts = when.timestamp()
+        cutoff = ts - STUDY_SERIES_RETENTION_DAYS * 86400
+        # Member "<epoch ms>:<minutes>" keeps entries unique and self-contained
+        member = f"{int(ts * 1000)}:{int(minutes)}"
+        await self._log_study(
+            keys=study_keys(session_id),
+            args=[int(minutes), day_bucket(when), week_bucket(when), ts, member, cutoff]
+        )
+        self._invalidate(*study_keys(session_id))
 
-    def get_study_stats(self, session_id: str) -> Dict[str, int]:
-        """Calculates total study intervals."""
+    async def get_study_stats(self, session_id: str) -> Dict[str, int]:
+        """Reads the maintained study totals: constant time regardless of history length."""
         if not session_id: return {"total_sessions": 0, "total_minutes": 0}
-        key = f"study:{session_id}"
-        sessions = self.client.lrange(key, 0, -1)
-        total_minutes = sum([int(m) for m in sessions])
+
+        async def load():
+            count, total_minutes = await self._study_stats(keys=study_keys(session_id)[:2])
+            return {
+                "total_sessions": int(count or 0),
+                "total_minutes": int(total_minutes or 0)
+            }
+
+        agg_key = study_keys(session_id)[1]
+        return dict(await self._cached(agg_key, [agg_key], load))
+
+    async def backfill_study_aggregates(self, session_id: str):
+        """Builds aggregates for a session logged before they existed (no-op if already present)."""
+        await self._study_stats(keys=study_keys(session_id)[:2])
+
+    async def get_study_sessions(self, session_id: str, start: datetime.datetime, end: datetime.datetime) -> List[Dict]:
+        """Raw study sessions logged in [start, end], oldest first."""
+        if not session_id: return []
+        entries = await self.client.zrangebyscore(f"study:ts:{session_id}", start.timestamp(), end.timestamp(), withscores=True)
+        return [{"timestamp": ts, "minutes": int(member.split(":")[1])} for member, ts in entries]
+
+    async def downsample_study_sessions(self, session_id: str, start: datetime.datetime, end: datetime.datetime,
+                                        interval_seconds: int) -> List[Dict]:
+        """Sums raw sessions in [start, end] into fixed-width buckets (e.g. hourly). Empty buckets are omitted."""
+        buckets: Dict[int, int] = {}
+        origin = start.timestamp()
+        for entry in await self.get_study_sessions(session_id, start, end):
+            bucket = int(origin + (entry["timestamp"] - origin) // interval_seconds * interval_seconds)
+            buckets[bucket] = buckets.get(bucket, 0) + entry["minutes"]
+        return [{"timestamp": ts, "minutes": m} for ts, m in sorted(buckets.items())]
+
+    async def get_study_rollups(self, session_id: str, days: int = 365,
+                                today: Optional[datetime.date] = None) -> Dict[str, List[Dict]]:
+        """
+        Daily and weekly study minutes for the last `days` days, read from the maintained
+        buckets with one HMGET per granularity in a single round-trip (at most `days` fields).
+        """
+        if not session_id: return {"daily": [], "weekly": []}
+        today = today or datetime.datetime.now(datetime.timezone.utc).date()
+        dates = [today - datetime.timedelta(days=i) for i in range(days - 1, -1, -1)]
+        day_fields = [day_bucket(d) for d in dates]
+        week_fields = list(dict.fromkeys(week_bucket(d) for d in dates))
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.hmget(f"study:daily:{session_id}", day_fields)
+            pipe.hmget(f"study:weekly:{session_id}", week_fields)
+            day_values, week_values = await pipe.execute()
+
         return {
-            "total_sessions": len(sessions),
-            "total_minutes": total_minutes
+            "daily": [{"date": d, "minutes": int(m or 0)} for d, m in zip(day_fields, day_values)],
+            "weekly": [{"week": w, "minutes": int(m or 0)} for w, m in zip(week_fields, week_values)],
         }
+
+class SyncRedisClient:
+    """
+    Blocking facade over RedisClient for scripts without an event loop (ingest, maintenance).
+    Every async method is exposed as a plain method run on a private event loop and connection.
+    """
+    def __init__(self, host=os.getenv('REDIS_HOST', 'localhost'), port=int(os.getenv('REDIS_PORT', 6379)), db=0):
+        self._loop = asyncio.new_event_loop()
+        self._client = RedisClient(client=redis.Redis(host=host, port=port, db=db, decode_responses=True,
+                                                      encoding_errors="surrogateescape"))
+
+    def run(self, coro):
+        """Runs any coroutine (e.g. one using self.client) to completion."""
+        return self._loop.run_until_complete(coro)
+
+    @property
+    def client(self):
+        return self._client.client
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if asyncio.iscoroutinefunction(attr):
+            return lambda *args, **kwargs: self.run(attr(*args, **kwargs))
+        return attr
+
+    def close(self):
+        self.run(self._client.client.aclose())
+        self._loop.close()
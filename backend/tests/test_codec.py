@@ -0,0 +1,37 @@
+import json
+import pytest
+from backend.storage.codec import Codec, TAG_MSGPACK, TAG_MSGPACK_ZLIB, TAG_JSON_ZLIB
+from backend.storage.redis_client import RedisClient
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("msgpack")
+
+MESSAGE = {"role": "assistant", "content": "Cross-site scripting (XSS) lets attackers inject scripts. " * 40}
+
+@pytest.mark.parametrize("fmt,compress_min,tag", [
+    ("msgpack", 0, TAG_MSGPACK),
+    ("msgpack", 1024, TAG_MSGPACK_ZLIB),
+    ("json", 1024, TAG_JSON_ZLIB),
+])
+def test_tagged_formats_round_trip(fmt, compress_min, tag):
+    encoded = Codec(fmt, compress_min).encode(MESSAGE)
+    assert encoded[0] == tag
+    assert Codec.decode(encoded) == MESSAGE
+
+def test_default_json_stays_legacy_compatible():
+    encoded = Codec("json", 0).encode(MESSAGE)
+    assert json.loads(encoded) == MESSAGE
+    assert Codec.decode(encoded) == MESSAGE
+
+@pytest.mark.asyncio
+async def test_binary_payloads_through_text_connection_and_legacy_entries():
+    client = fakeredis.FakeAsyncRedis(decode_responses=True, encoding_errors="surrogateescape")
+    store = RedisClient(client=client, codec=Codec("msgpack", 256))
+    await client.rpush("chat:s1", json.dumps({"role": "user", "content": "old"}))
+
+    await store.add_messages("s1", [("user", "hi"), ("assistant", MESSAGE["content"])])
+
+    history = await store.get_chat_history("s1")
+    assert [m["content"] for m in history] == ["old", "hi", MESSAGE["content"]]
+    raw = await client.lrange("chat:s1", -1, -1)
+    assert len(raw[0].encode("utf-8", "surrogateescape")) < len(MESSAGE["content"]) / 4
@@ -0,0 +1,34 @@
+import asyncio
+import time
+import pytest
+from backend.rag.cpu_pool import CPUPool, CPUPoolSaturated
+from backend.rag.loop_monitor import LoopLagMonitor
+
+@pytest.mark.asyncio
+async def test_queue_depth_is_bounded():
+    pool = CPUPool("thread", workers=1, queue_depth=1)
+    running = [asyncio.create_task(pool.run(time.sleep, 0.2)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(CPUPoolSaturated):
+        await pool.run(time.sleep, 0)
+    await asyncio.gather(*running)
+    assert await pool.run(sum, [1, 2]) == 3
+    assert pool.snapshot()["rejected"] == 1
+    pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_lag_monitor_sees_blocking_work_but_not_offloaded_work():
+    monitor = LoopLagMonitor(interval=0.01)
+    pool = CPUPool("thread", workers=2)
+    monitor.start()
+
+    await asyncio.sleep(0.05)
+    await pool.run(time.sleep, 0.2)
+    assert monitor.snapshot()["max_ms"] < 100
+
+    time.sleep(0.2)  # blocking call on the loop
+    await asyncio.sleep(0.02)
+    assert monitor.snapshot()["max_ms"] >= 150
+    await monitor.stop()
+    pool.shutdown()
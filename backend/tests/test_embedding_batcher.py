@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from backend.rag.embedding_batcher import EmbeddingBatcher
+
+def make_embeddings():
+    embeddings = MagicMock()
+    embeddings.embed_documents.side_effect = lambda texts: [[float(len(t)), 1.0] for t in texts]
+    return embeddings
+
+@pytest.mark.asyncio
+async def test_concurrent_texts_are_embedded_in_one_batch():
+    embeddings = make_embeddings()
+    batcher = EmbeddingBatcher(embeddings, window=0.01, max_batch=32)
+
+    vectors = await asyncio.gather(*[batcher.embed("x" * i) for i in range(1, 9)], batcher.embed("x"))
+
+    embeddings.embed_documents.assert_called_once()
+    assert len(embeddings.embed_documents.call_args[0][0]) == 8  # duplicate "x" embedded once
+    assert [v[0] for v in vectors] == [1, 2, 3, 4, 5, 6, 7, 8, 1]
+    assert batcher.snapshot()["max_batch_size"] == 9
+    batcher.close()
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting_and_errors_propagate():
+    embeddings = make_embeddings()
+    batcher = EmbeddingBatcher(embeddings, window=10, max_batch=4)
+
+    vectors = await asyncio.wait_for(asyncio.gather(*[batcher.embed(str(i)) for i in range(8)]), timeout=1)
+    assert len(vectors) == 8
+    assert embeddings.embed_documents.call_count == 2
+
+    embeddings.embed_documents.side_effect = RuntimeError("model crashed")
+    with pytest.raises(RuntimeError):
+        await asyncio.gather(*[batcher.embed(str(i)) for i in range(4)])
+    batcher.close()
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_and_batches_run_on_the_given_pool():
+    from backend.rag.cpu_pool import CPUPool, CPUPoolSaturated
+    embeddings = make_embeddings()
+    pool = CPUPool("thread", workers=1, queue_depth=0)
+    batcher = EmbeddingBatcher(embeddings, window=10, max_batch=32, pool=pool, max_queue=2)
+
+    waiting = [asyncio.create_task(batcher.embed(str(i))) for i in range(2)]
+    await asyncio.sleep(0)
+    with pytest.raises(CPUPoolSaturated):
+        await batcher.embed("2")
+    assert batcher.snapshot()["rejected"] == 1
+
+    batcher._flush()
+    assert len(await asyncio.gather(*waiting)) == 2
+    assert pool.snapshot()["submitted"] == 1
+    batcher.close()
+    pool.shutdown()
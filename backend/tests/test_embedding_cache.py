@@ -0,0 +1,84 @@
+import asyncio
+import time
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+from backend.rag.embedding_cache import EmbeddingCache
+
+fakeredis = pytest.importorskip("fakeredis")
+
+def make_embeddings(delay: float = 0.0):
+    embeddings = MagicMock()
+    def embed_query(text):
+        time.sleep(delay)
+        return [float(len(text)), 1.0, 0.0]
+    embeddings.embed_query.side_effect = embed_query
+    return embeddings
+
+@pytest.mark.asyncio
+async def test_repeated_and_renormalized_queries_hit():
+    embeddings = make_embeddings()
+    cache = EmbeddingCache(embeddings, max_entries=2)
+
+    first = await cache.embed("What is XSS?")
+    assert np.array_equal(await cache.embed("  what is   xss? "), first)
+    assert first.dtype == np.float32
+    embeddings.embed_query.assert_called_once_with("what is xss?")
+
+    await cache.embed("b")
+    await cache.embed("c")  # evicts "what is xss?"
+    await cache.embed("What is XSS?")
+    assert embeddings.embed_query.call_count == 4
+    assert cache.snapshot()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_forward_pass():
+    embeddings = make_embeddings(delay=0.05)
+    cache = EmbeddingCache(embeddings)
+
+    vectors = await asyncio.gather(*[cache.embed("roadmap for python") for _ in range(8)])
+
+    assert embeddings.embed_query.call_count == 1
+    assert all(v is vectors[0] for v in vectors)
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_fail_other_waiters():
+    embeddings = make_embeddings(delay=0.3)
+    cache = EmbeddingCache(embeddings)
+
+    first = asyncio.create_task(asyncio.wait_for(cache.embed("what is xss"), timeout=0.1))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(asyncio.wait_for(cache.embed("what is xss"), timeout=5))
+
+    with pytest.raises(asyncio.TimeoutError):
+        await first
+    assert (await second).tolist() == [11.0, 1.0, 0.0]
+    embeddings.embed_query.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_redis_spill_is_shared_between_workers():
+    server = fakeredis.FakeServer()
+    def client():
+        return fakeredis.FakeAsyncRedis(server=server, decode_responses=True, encoding_errors="surrogateescape")
+    worker_a = EmbeddingCache(make_embeddings(), client=client())
+    embeddings_b = make_embeddings()
+    worker_b = EmbeddingCache(embeddings_b, client=client())
+
+    vector = await worker_a.embed("what is xss")
+    assert np.array_equal(await worker_b.embed("what is xss"), vector)
+    embeddings_b.embed_query.assert_not_called()
+    assert worker_b.snapshot()["redis_hits"] == 1
+
+@pytest.mark.asyncio
+async def test_unbatched_misses_run_on_the_bounded_pool():
+    from backend.rag.cpu_pool import CPUPool, CPUPoolSaturated
+    pool = CPUPool("thread", workers=1, queue_depth=0)
+    cache = EmbeddingCache(make_embeddings(delay=0.2), pool=pool)
+
+    first = asyncio.create_task(cache.embed("a"))
+    await asyncio.sleep(0.01)
+    with pytest.raises(CPUPoolSaturated):
+        await cache.embed("b")
+    await first
+    assert pool.snapshot()["submitted"] == 1
+    pool.shutdown()
@@ -0,0 +1,125 @@
+import time
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+from backend.rag.hedging import HedgeBudget, hedge_delay
+
+class SlowStream:
+    """Streaming response whose first token arrives after `delay` seconds."""
+    def __init__(self, tokens, delay):
+        self.tokens = tokens
+        self.delay = delay
+        self.closed = False
+
+    def __aiter__(self):
+        return self._gen()
+
+    async def _gen(self):
+        await asyncio.sleep(self.delay)
+        for t in self.tokens:
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = t
+            yield chunk
+
+    async def close(self):
+        self.closed = True
+
+@pytest.fixture
+def engine():
+    with patch.dict('os.environ', {'OPENROUTER_API_KEY': 'test_key'}):
+        from backend.rag.engine import RAGEngine
+        engine = RAGEngine()
+    engine.client = MagicMock()
+    return engine
+
+def test_budget_caps_hedge_rate():
+    budget = HedgeBudget(ratio=0.1, burst=1)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    for _ in range(10):
+        budget.on_request()
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+def test_hedge_delay_uses_percentile_with_floor():
+    assert hedge_delay(2.5) == 2.5
+    assert hedge_delay(0.01) >= 0.5
+    assert hedge_delay(None) > 0
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled(engine):
+    primary_model, backup_model = engine.health.candidates()[:2]
+    streams = {
+        primary_model: SlowStream(["slow"], delay=2.0),
+        backup_model: SlowStream(["fast", " reply"], delay=0.05),
+    }
+
+    async def create(model, messages, stream):
+        return streams[model]
+
+    engine.client.chat.completions.create = create
+    with patch('backend.rag.engine.LLM_HEDGING', True), patch('backend.rag.hedging.HEDGE_DEFAULT_DELAY', 0.1):
+        start = time.perf_counter()
+        reply = await engine._generate_response("sys", "prompt")
+        elapsed = time.perf_counter() - start
+
+    assert reply == "fast reply"
+    assert elapsed < 1.0
+    await asyncio.sleep(0)  # let the cancelled loser clean up
+    assert streams[primary_model].closed
+    assert engine.hedge_budget.hedge_wins == 1
+
+@pytest.mark.asyncio
+async def test_no_hedge_when_budget_exhausted(engine):
+    primary_model = engine.health.candidates()[0]
+    calls = []
+
+    async def create(model, messages, stream):
+        calls.append(model)
+        return SlowStream(["ok"], delay=0.3)
+
+    engine.client.chat.completions.create = create
+    engine.hedge_budget = HedgeBudget(ratio=0, burst=0)
+    with patch('backend.rag.engine.LLM_HEDGING', True), patch('backend.rag.hedging.HEDGE_DEFAULT_DELAY', 0.05):
+        assert await engine._generate_response("sys", "prompt") == "ok"
+
+    assert calls == [primary_model]
+
+@pytest.mark.asyncio
+async def test_no_budget_spent_without_a_backup(engine):
+    primary_model = engine.health.candidates()[0]
+
+    async def create(model, messages, stream):
+        return SlowStream(["ok"], delay=0.3)
+
+    engine.client.chat.completions.create = create
+    with patch('backend.rag.engine.LLM_HEDGING', True), patch('backend.rag.hedging.HEDGE_DEFAULT_DELAY', 0.05), \
+            patch.object(engine.health, 'candidates', return_value=[primary_model]):
+        assert await engine._generate_response("sys", "prompt") == "ok"
+
+    assert engine.hedge_budget.stats()["hedges"] == 0
+
+@pytest.mark.asyncio
+async def test_unhedged_backup_releases_its_slot_and_stays_next(engine):
+    from backend.rag.model_health import OPEN
+    primary_model, backup_model = engine.health.candidates()[:2]
+    backup = engine.health.models[backup_model]
+    backup.state, backup.opened_at = OPEN, -1e9  # cooled down: its next use is a half-open probe
+    calls, probe_held = [], []
+
+    async def create(model, messages, stream):
+        calls.append(model)
+        if model == primary_model:
+            await asyncio.sleep(0.2)
+            probe_held.append(backup.probe_in_flight)
+            raise RuntimeError("primary down")
+        return SlowStream(["ok"], delay=0)
+
+    engine.client.chat.completions.create = create
+    engine.hedge_budget = HedgeBudget(ratio=0, burst=0)
+    with patch('backend.rag.engine.LLM_HEDGING', True), patch('backend.rag.hedging.HEDGE_DEFAULT_DELAY', 0.05), \
+            patch.object(engine.health, 'candidates', return_value=[primary_model, backup_model]):
+        assert await engine._generate_response("sys", "prompt") == "ok"
+
+    assert probe_held == [False]
+    assert calls == [primary_model, backup_model]
@@ -0,0 +1,54 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from backend.rag.embedding_cache import EmbeddingCache
+from backend.rag.intent import IntentClassifier
+
+VOCAB = ["roadmap", "plan", "learn", "find", "tutorial", "link", "hello", "thanks", "how"]
+
+class KeywordEmbeddings:
+    """Deterministic stand-in for SentenceTransformer: one dimension per keyword."""
+    def embed_query(self, text):
+        words = text.lower().split()
+        return [float(sum(w.startswith(v) for w in words)) + 0.01 for v in VOCAB]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+@pytest.fixture
+def classifier(tmp_path):
+    examples = {
+        "roadmap": ["roadmap for python", "plan to learn react", "learn plan roadmap"],
+        "search": ["find a tutorial", "link to tutorial", "find link"],
+        "chat": ["hello", "thanks", "hello how"]
+    }
+    path = tmp_path / "examples.json"
+    path.write_text(json.dumps(examples))
+    return IntentClassifier(KeywordEmbeddings(), examples_path=str(path), min_similarity=0.5, min_margin=0.1)
+
+def test_classifies_clear_queries_locally(classifier):
+    assert classifier.classify("give me a roadmap and plan") == ("roadmap", True)
+    assert classifier.classify("find me a tutorial") == ("search", True)
+    assert classifier.classify("hello thanks") == ("chat", True)
+
+def test_ambiguous_query_is_not_confident(classifier):
+    label, confident = classifier.classify("roadmap tutorial")
+    assert not confident
+
+@pytest.mark.asyncio
+async def test_engine_escalates_only_ambiguous_queries(classifier):
+    with patch.dict('os.environ', {'OPENROUTER_API_KEY': 'test_key'}):
+        from backend.rag.engine import RAGEngine
+        engine = RAGEngine()
+    engine.intent_classifier = classifier
+    engine.embedding_cache = EmbeddingCache(classifier.embeddings)
+    engine.client = MagicMock()
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = "search"
+    engine.client.chat.completions.create = AsyncMock(return_value=mock_response)
+
+    assert await engine._classify_intent("give me a roadmap and plan") == "roadmap"
+    engine.client.chat.completions.create.assert_not_called()
+
+    assert await engine._classify_intent("roadmap tutorial") == "search"
+    engine.client.chat.completions.create.assert_called_once()
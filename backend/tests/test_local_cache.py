@@ -0,0 +1,143 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from backend.storage import local_cache
+from backend.storage.local_cache import LocalCache, InvalidationListener, INVALIDATION_CHANNEL, MISSING
+from backend.storage.redis_client import RedisClient
+from backend.benchmarks.redis_round_trips import RoundTripCounter
+
+fakeredis = pytest.importorskip("fakeredis")
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+class StubTrackingConnection:
+    """Stands in for the listener's Redis connection (fakeredis has no CLIENT TRACKING)."""
+    def __init__(self):
+        self.commands = []
+        self.messages = asyncio.Queue()
+        self.connection = self
+        self.closed = False
+
+    async def client_id(self):
+        return 7
+
+    async def execute_command(self, *args):
+        self.commands.append(args)
+
+    async def read_response(self):
+        message = await self.messages.get()
+        if isinstance(message, Exception):
+            raise message
+        return message
+
+    async def aclose(self):
+        self.closed = True
+
+async def until(condition):
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0)
+    raise AssertionError("condition not reached")
+
+@pytest.fixture
+def cache(clock):
+    return LocalCache(max_entries=3, ttl=5, max_age=300, clock=clock)
+
+def test_ttl_mode_expiry_and_lru_eviction(cache, clock):
+    for name in ("a", "b", "c"):
+        cache.set(name, name.upper(), [name], cache.snapshot([name]))
+    assert cache.get("a") == "A"
+    cache.set("d", "D", ["d"], cache.snapshot(["d"]))
+    assert cache.get("b") is MISSING  # least recently used
+    clock.now = 6
+    assert cache.get("a") is MISSING
+    assert cache.stats()["evictions"] == 1
+
+def test_invalidation_drops_dependents_and_rejects_racing_fills(cache):
+    cache.coherent = True
+    cache.set("analytics:s1", {"total": 1}, ["tasks:s1", "study:agg:s1"], cache.snapshot(["tasks:s1", "study:agg:s1"]))
+    cache.on_invalidation(["study:agg:s1"])
+    assert cache.get("analytics:s1") is MISSING
+
+    # A read that started before an invalidation must not be cached
+    since = cache.snapshot(["tasks:s1"])
+    cache.on_invalidation(["tasks:s1"])
+    cache.set("tasks:s1", ["stale"], ["tasks:s1"], since)
+    assert cache.get("tasks:s1") is MISSING
+
+    cache.set("tasks:s1", ["fresh"], ["tasks:s1"], cache.snapshot(["tasks:s1"]))
+    cache.on_invalidation(None)  # FLUSHALL
+    assert cache.get("tasks:s1") is MISSING
+
+def test_own_write_echo_is_ignored_but_foreign_writes_are_not(cache):
+    cache.coherent = True
+    cache.expect_own_write(["chat:s1"])
+    cache.set("chat:s1", ["mine"], ["chat:s1"], cache.snapshot(["chat:s1"]))
+    cache.on_invalidation(["chat:s1"])  # echo of our own write
+    assert cache.get("chat:s1") == ["mine"]
+    cache.on_invalidation(["chat:s1"])  # another worker
+    assert cache.get("chat:s1") is MISSING
+
+@pytest.mark.asyncio
+async def test_chat_turn_reads_history_from_write_through_cache(cache):
+    counter = RoundTripCounter()
+    store = RedisClient(client=counter.wrap(fakeredis.FakeAsyncRedis(decode_responses=True)), cache=cache)
+
+    await store.add_messages("s1", [("user", "hi"), ("assistant", "hello")])
+    before = counter.count
+    context = await store.get_context("s1", limit=1)
+    assert context == [{"role": "assistant", "content": "hello"}]
+    assert counter.count == before
+
+    context[0]["content"] = "mutated by caller"
+    assert (await store.get_chat_history("s1"))[-1]["content"] == "hello"
+    assert cache.stats()["saved_round_trips"] == 2
+
+@pytest.mark.asyncio
+async def test_task_and_analytics_reads_see_own_writes(cache):
+    store = RedisClient(client=fakeredis.FakeAsyncRedis(decode_responses=True), cache=cache)
+    await store.add_task("s1", {"id": "t1", "title": "Read", "completed": False})
+    assert (await store.get_analytics("s1"))["task_stats"]["completed"] == 0
+    assert len(await store.get_tasks("s1")) == 1
+
+    await store.update_task("s1", "t1", {"completed": True})
+    assert (await store.get_tasks("s1"))[0]["completed"] is True
+    assert (await store.get_analytics("s1"))["task_stats"]["completed"] == 1
+
+    await store.log_study_session("s1", 25)
+    assert (await store.get_study_stats("s1"))["total_minutes"] == 25
+
+@pytest.mark.asyncio
+async def test_listener_applies_invalidations_and_falls_back_when_the_stream_drops(cache):
+    conn = StubTrackingConnection()
+    listener = InvalidationListener(cache, "localhost", 6379, retry_delay=60)
+    with patch.object(local_cache.redis, "Redis", return_value=conn):
+        listener.start()
+        await until(lambda: cache.coherent)
+        assert conn.commands[0][:6] == ("CLIENT", "TRACKING", "ON", "REDIRECT", 7, "BCAST")
+        assert conn.commands[1] == ("SUBSCRIBE", INVALIDATION_CHANNEL)
+
+        for key in ("tasks:s1", "chat:s1"):
+            cache.set(key, [key], [key], cache.snapshot([key]))
+        await conn.messages.put(["message", INVALIDATION_CHANNEL, ["tasks:s1"]])
+        await until(lambda: cache.get("tasks:s1") is MISSING)
+        assert cache.get("chat:s1") == ["chat:s1"]
+
+        await conn.messages.put(["message", INVALIDATION_CHANNEL, None])  # FLUSHALL
+        await until(lambda: cache.get("chat:s1") is MISSING)
+
+        cache.set("chat:s1", ["chat:s1"], ["chat:s1"], cache.snapshot(["chat:s1"]))
+        await conn.messages.put(ConnectionError("connection reset"))
+        await until(lambda: not cache.coherent)
+        assert cache.get("chat:s1") is MISSING
+        assert conn.closed
+        await listener.stop()
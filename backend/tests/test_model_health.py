@@ -0,0 +1,125 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from backend.rag.model_health import ModelHealthRegistry, OPEN, HALF_OPEN, CLOSED
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def registry(clock):
+    return ModelHealthRegistry(["a", "b", "c"], failure_threshold=2, cooldown=30, clock=clock)
+
+def test_fastest_healthy_model_is_selected_first(registry):
+    assert registry.candidates() == ["a", "b", "c"]  # untried: priority order
+    registry.record_success("a", 2.0)
+    registry.record_success("b", 0.5)
+    registry.record_success("c", 1.0)
+    assert registry.candidates() == ["b", "c", "a"]
+
+def test_breaker_opens_after_consecutive_failures(registry):
+    registry.record_failure("a")
+    assert "a" in registry.candidates()  # one transient error does not remove it
+    registry.record_failure("a")
+    assert registry.models["a"].state == OPEN
+    assert registry.candidates() == ["b", "c"]
+    assert not registry.acquire("a")
+
+def test_half_open_allows_single_probe(registry, clock):
+    registry.record_failure("a")
+    registry.record_failure("a")
+    clock.now = 31
+
+    assert registry.candidates()[-1] == "a"  # probes go after healthy models
+    assert registry.acquire("a")
+    assert registry.models["a"].state == HALF_OPEN
+    assert not registry.acquire("a")  # only one probe at a time
+
+    registry.record_failure("a")
+    assert registry.models["a"].state == OPEN
+    assert "a" not in registry.candidates()
+
+    clock.now = 62
+    assert registry.acquire("a")
+    registry.record_success("a", 0.3)
+    assert registry.models["a"].state == CLOSED
+
+def test_cancelled_probe_is_released(registry, clock):
+    registry.record_failure("a")
+    registry.record_failure("a")
+    clock.now = 31
+    assert registry.acquire("a")
+    registry.release("a")
+    assert registry.acquire("a")
+
+@pytest.mark.asyncio
+async def test_engine_skips_dead_model_without_retrying_it():
+    with patch.dict('os.environ', {'OPENROUTER_API_KEY': 'test_key'}):
+        from backend.rag.engine import RAGEngine
+        engine = RAGEngine()
+    dead = engine.models[0]
+    ok = MagicMock()
+    ok.choices[0].message.content = "fine"
+
+    async def create(model, **kwargs):
+        if model == dead:
+            raise Exception("503")
+        return ok
+
+    engine.client = MagicMock()
+    engine.client.chat.completions.create = AsyncMock(side_effect=create)
+
+    for _ in range(5):
+        assert await engine._generate_response("sys", "prompt") == "fine"
+
+    tried = [c.kwargs["model"] for c in engine.client.chat.completions.create.call_args_list]
+    # The failing model is demoted after its first error instead of being hit on every request
+    assert tried.count(dead) == 1
+    assert engine.health.candidates()[0] != dead
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_releases_half_open_probe(clock):
+    with patch.dict('os.environ', {'OPENROUTER_API_KEY': 'test_key'}):
+        from backend.rag.engine import RAGEngine
+        engine = RAGEngine()
+    engine.health = ModelHealthRegistry(engine.models, failure_threshold=1, cooldown=30, clock=clock)
+    probed = engine.models[0]
+    for model in engine.models[1:]:
+        engine.health.record_failure(model)  # opened, still cooling down: only `probed` gets tried
+    engine.health.record_failure(probed)
+    clock.now = 31
+
+    async def chunks():
+        for token in ["a", "b", "c"]:
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = token
+            yield chunk
+
+    stream = MagicMock()
+    stream.__aiter__ = lambda self: chunks()
+    stream.close = AsyncMock()
+    engine.client = MagicMock()
+    engine.client.chat.completions.create = AsyncMock(return_value=stream)
+
+    with patch('backend.rag.engine.LLM_HEDGING', False):
+        tokens = engine._stream_tokens([{"role": "user", "content": "hi"}])
+        assert await tokens.__anext__() == "a"
+        assert engine.health.models[probed].probe_in_flight
+        await tokens.aclose()  # client disconnects during the half-open probe
+
+    stream.close.assert_awaited()
+    assert not engine.health.models[probed].probe_in_flight
+    clock.now = 62
+    assert probed in engine.health.candidates()
+
+def test_model_with_only_failures_ranks_last(registry):
+    registry.record_success("b", 1.0)
+    registry.record_failure("a")
+    assert registry.candidates() == ["c", "b", "a"]
@@ -0,0 +1,30 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from backend.api import productivity
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(productivity.router, prefix="/api")
+    return TestClient(app)
+
+def test_import_roadmap_creates_a_task_per_module(client):
+    roadmap = {"title": "Python", "modules": [{"week": 1, "topic": "Basics", "resources": []},
+                                              {"week": "2", "topic": "OOP"}]}
+    with patch.object(productivity.redis_client, "add_tasks", AsyncMock(return_value=[True, False])):
+        response = client.post("/api/tasks/import-roadmap", json={"session_id": "s1", "roadmap": roadmap})
+
+    assert response.status_code == 200
+    assert [(r["title"], r["status"]) for r in response.json()["results"]] == [
+        ("Week 1: Basics", "created"), ("Week 2: OOP", "exists")]
+
+@pytest.mark.parametrize("modules", [["Week 1"], [{"week": 1}], "not a list"])
+def test_import_roadmap_rejects_malformed_modules(client, modules):
+    with patch.object(productivity.redis_client, "add_tasks", AsyncMock()) as add_tasks:
+        response = client.post("/api/tasks/import-roadmap",
+                               json={"session_id": "s1", "roadmap": {"title": "Python", "modules": modules}})
+
+    assert response.status_code == 422
+    add_tasks.assert_not_called()
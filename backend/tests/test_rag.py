@@ -1,6 +1,10 @@
+import asyncio
+import time
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, AsyncMock, patch
 from backend.rag.engine import RAGEngine
+from backend.rag.embedding_cache import EmbeddingCache
+from backend.rag.retrievers import ChromaRetriever
 
 @pytest.fixture
 def rag_engine_mock():
@@ -8,6 +12,12 @@ def rag_engine_mock():
         engine = RAGEngine()
         # Mock the client to avoid real API calls
         engine.client = MagicMock()
+        engine.client.chat.completions.create = AsyncMock()
+        # Force the LLM classification path; the local classifier has its own tests
+        engine.intent_classifier = None
+        engine.semantic_cache = None
+        engine.roadmap_cache = AsyncMock()
+        engine.roadmap_cache.get.return_value = None
         return engine
 
 def test_search_web_success(rag_engine_mock):
@@ -36,24 +46,26 @@ def test_search_web_empty_fallback(rag_engine_mock):
         assert results[0]['title'] == "Google Search"
         assert "google.com" in results[0]['link']
 
-def test_classify_intent_roadmap(rag_engine_mock):
+@pytest.mark.asyncio
+async def test_classify_intent_roadmap(rag_engine_mock):
     """Test intent classification for roadmap."""
     mock_response = MagicMock()
     mock_response.choices[0].message.content = "roadmap"
     rag_engine_mock.client.chat.completions.create.return_value = mock_response
     
-    intent = rag_engine_mock._classify_intent("Give me a study plan for AI")
+    intent = await rag_engine_mock._classify_intent("Give me a study plan for AI")
     assert intent == "roadmap"
 
-def test_classify_intent_fallback(rag_engine_mock):
+@pytest.mark.asyncio
+async def test_classify_intent_fallback(rag_engine_mock):
     """Test fallback intent classification when API fails."""
     rag_engine_mock.client.chat.completions.create.side_effect = Exception("API Error")
     
     # Keyword fallback test
-    intent = rag_engine_mock._classify_intent("I want a roadmap for python")
+    intent = await rag_engine_mock._classify_intent("I want a roadmap for python")
     assert intent == "roadmap"
     
-    intent = rag_engine_mock._classify_intent("find me a tutorial")
+    intent = await rag_engine_mock._classify_intent("find me a tutorial")
     assert intent == "search"
 
 @pytest.mark.asyncio
@@ -82,7 +94,7 @@ async def test_process_query_search_flow(rag_engine_mock):
     # 2. Mock Search to return results
     # 3. Mock Final Response
     
-    rag_engine_mock._classify_intent = MagicMock(return_value="search")
+    rag_engine_mock._classify_intent = AsyncMock(return_value="search")
     rag_engine_mock.search_web = MagicMock(return_value=[
         {"title": "Res 1", "link": "link1", "snippet": "snip1"}
     ])
@@ -95,3 +107,274 @@ async def test_process_query_search_flow(rag_engine_mock):
     
     assert "Here are the search results." in response
     rag_engine_mock.search_web.assert_called()
+
+@pytest.mark.asyncio
+async def test_llm_calls_do_not_block_event_loop(rag_engine_mock):
+    """Concurrent roadmap requests overlap instead of running back-to-back."""
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = '{"title": "T", "modules": []}'
+
+    async def slow_create(**kwargs):
+        await asyncio.sleep(0.2)
+        return mock_response
+
+    rag_engine_mock.client.chat.completions.create.side_effect = slow_create
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[rag_engine_mock.generate_roadmap(f"Dept {i}", "Beginner") for i in range(10)])
+    elapsed = time.perf_counter() - start
+
+    assert all(r["title"] == "T" for r in results)
+    assert elapsed < 1.0
+
+class FakeStream:
+    """Async iterator standing in for an OpenAI streaming response."""
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.closed = False
+
+    def __aiter__(self):
+        return self._gen()
+
+    async def _gen(self):
+        for t in self.tokens:
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = t
+            yield chunk
+
+    async def close(self):
+        self.closed = True
+
+@pytest.mark.asyncio
+async def test_stream_query_yields_tokens_and_saves(rag_engine_mock):
+    """Tokens are forwarded as they arrive and the full reply is saved once complete."""
+    rag_engine_mock._classify_intent = AsyncMock(return_value="chat")
+    rag_engine_mock.retriever = None
+    rag_engine_mock.redis = AsyncMock()
+    rag_engine_mock.redis.get_context.return_value = []
+    stream = FakeStream(["Hel", "lo", "!"])
+    rag_engine_mock.client.chat.completions.create.return_value = stream
+
+    tokens = [t async for t in rag_engine_mock.stream_query("hi", "General", "s1")]
+
+    assert tokens == ["Hel", "lo", "!"]
+    assert stream.closed
+    rag_engine_mock.redis.add_messages.assert_awaited_once_with("s1", [("user", "hi"), ("assistant", "Hello!")])
+
+@pytest.mark.asyncio
+async def test_stream_query_cancelled_stops_upstream(rag_engine_mock):
+    """Closing the generator early closes the upstream stream and persists nothing."""
+    rag_engine_mock._classify_intent = AsyncMock(return_value="chat")
+    rag_engine_mock.retriever = None
+    rag_engine_mock.redis = AsyncMock()
+    rag_engine_mock.redis.get_context.return_value = []
+    stream = FakeStream(["a", "b", "c"])
+    rag_engine_mock.client.chat.completions.create.return_value = stream
+
+    gen = rag_engine_mock.stream_query("hi", "General", "s1")
+    assert await gen.__anext__() == "a"
+    await gen.aclose()
+
+    assert stream.closed
+    rag_engine_mock.redis.add_messages.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_concurrent_pipeline_overlaps_stages(rag_engine_mock):
+    """Classification and retrieval run side by side, so latency is max(stage), not the sum."""
+    async def slow_classify(query):
+        await asyncio.sleep(0.3)
+        return "roadmap"
+
+    def slow_search(query, k, filter=None):
+        time.sleep(0.3)
+        doc = MagicMock()
+        doc.page_content = "Week 1: Networking"
+        doc.metadata = {"source": "cyber-security"}
+        return [(doc, 0.2)]
+
+    rag_engine_mock._classify_intent = slow_classify
+    rag_engine_mock.embedding_cache = EmbeddingCache(MagicMock(**{"embed_query.return_value": [1.0, 0.0]}))
+    rag_engine_mock.retriever = ChromaRetriever(MagicMock(), "vector_db")
+    rag_engine_mock.retriever.vector_db.similarity_search_by_vector_with_relevance_scores.side_effect = slow_search
+
+    with patch('backend.rag.engine.PIPELINE_MODE', 'concurrent'):
+        start = time.perf_counter()
+        _, prompt, _ = await rag_engine_mock._build_prompt("roadmap for security", "Cyber Security")
+        elapsed = time.perf_counter() - start
+
+    assert "Week 1: Networking" in prompt
+    assert elapsed < 0.5
+
+@pytest.mark.asyncio
+async def test_cancelled_pipeline_cancels_its_stages(rag_engine_mock):
+    """A client disconnect mid-pipeline stops every stage it started instead of leaving them running."""
+    cancelled = []
+
+    def hanging(name):
+        async def stage(*args):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(name)
+                raise
+        return stage
+
+    rag_engine_mock._get_history = hanging("history")
+    rag_engine_mock._classify_intent = hanging("classify")
+    rag_engine_mock._retrieve = hanging("retrieval")
+
+    with patch('backend.rag.engine.PIPELINE_MODE', 'concurrent'):
+        task = asyncio.create_task(rag_engine_mock._gather_concurrent("what is a join", "General", "s1"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    await asyncio.sleep(0)
+
+    assert sorted(cancelled) == ["classify", "history", "retrieval"]
+
+@pytest.mark.asyncio
+async def test_pipeline_stage_timeout_falls_back(rag_engine_mock):
+    """A stage exceeding its timeout is replaced by its default instead of stalling the query."""
+    async def hung_classify(query):
+        await asyncio.sleep(5)
+
+    rag_engine_mock._classify_intent = hung_classify
+    rag_engine_mock.retriever = None
+
+    with patch.dict('backend.rag.engine.STAGE_TIMEOUTS', {'classify': 0.1}):
+        system_instruction, _, _ = await rag_engine_mock._build_prompt("I want a roadmap for python", "General")
+
+    assert "Roadmap Context" in system_instruction
+
+def test_engine_construction_defers_retrieval_loading(rag_engine_mock):
+    assert rag_engine_mock.retrieval_status == "not_loaded"
+    assert not rag_engine_mock.retrieval_ready
+    assert rag_engine_mock.retriever is None
+
+@pytest.mark.asyncio
+async def test_retrieval_loads_once_in_background(rag_engine_mock):
+    rag_engine_mock.load_retrieval = MagicMock()
+
+    task = rag_engine_mock.start_retrieval_loading()
+    assert rag_engine_mock.start_retrieval_loading() is task
+    await task
+    rag_engine_mock.load_retrieval.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_chat_turn_embeds_and_searches_once(rag_engine_mock):
+    """Semantic cache probe, classification and retrieval share one embedding and one index lookup."""
+    encoder = MagicMock(**{"embed_query.return_value": [1.0, 0.0]})
+    docs = []
+    for i in range(3):
+        doc = MagicMock()
+        doc.page_content = f"Chunk {i}"
+        docs.append((doc, 0.1 * i))
+    rag_engine_mock.embedding_cache = EmbeddingCache(encoder)
+    rag_engine_mock.retriever = ChromaRetriever(MagicMock(), "vector_db")
+    search = rag_engine_mock.retriever.vector_db.similarity_search_by_vector_with_relevance_scores
+    search.return_value = docs
+    rag_engine_mock.semantic_cache = AsyncMock()
+    rag_engine_mock.semantic_cache.lookup.return_value = None
+    rag_engine_mock.redis = AsyncMock()
+    rag_engine_mock.redis.get_context.return_value = []
+    rag_engine_mock._classify_intent = AsyncMock(return_value="chat")
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = "Answer"
+    rag_engine_mock.client.chat.completions.create.return_value = mock_response
+
+    with patch('backend.rag.engine.RETRIEVAL_K', 3), patch('backend.rag.engine.CHAT_RETRIEVAL_K', 2):
+        assert await rag_engine_mock.process_query("What is a JOIN?", "General", "s1") == "Answer"
+
+    encoder.embed_query.assert_called_once()
+    search.assert_called_once()
+    prompt = rag_engine_mock.client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+    assert "Chunk 1" in prompt and "Chunk 2" not in prompt
+
+    # A follow-up turn repeating the question reuses the session's retrieval
+    await rag_engine_mock.process_query("what is a  join?", "General", "s1")
+    search.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_retrieval_is_scoped_to_department(rag_engine_mock):
+    """Known departments search only their roadmaps; anything else searches the whole collection."""
+    rag_engine_mock.embedding_cache = EmbeddingCache(MagicMock(**{"embed_query.return_value": [1.0, 0.0]}))
+    rag_engine_mock.retriever = ChromaRetriever(MagicMock(), "vector_db")
+    search = rag_engine_mock.retriever.vector_db.similarity_search_by_vector_with_relevance_scores
+    search.return_value = []
+
+    await rag_engine_mock._retrieve("what is xss", "s1", "Cyber Security")
+    assert search.call_args.kwargs["filter"] == {"source": {"$in": ["cyber-security", "devops", "backend"]}}
+
+    await rag_engine_mock._retrieve("what is xss", "s1", "General")
+    assert search.call_args.kwargs["filter"] is None
+    assert search.call_count == 2  # different scopes are cached separately
+
+    # With a department collection, its (smaller) index is searched without a filter
+    dept_db = MagicMock()
+    dept_db.similarity_search_by_vector_with_relevance_scores.return_value = []
+    rag_engine_mock.retriever.department_dbs = {"Data Science": dept_db}
+    await rag_engine_mock._retrieve("what is xss", "s1", "Data Science")
+    assert dept_db.similarity_search_by_vector_with_relevance_scores.call_args.kwargs["filter"] is None
+    assert search.call_count == 2
+
+@pytest.mark.asyncio
+async def test_semantic_cache_miss_does_not_serialize_retrieval(rag_engine_mock):
+    """Retrieval starts next to the cache probe, so a miss still costs max(classify, retrieval)."""
+    async def slow_classify(query):
+        await asyncio.sleep(0.3)
+        return "chat"
+
+    def slow_search(vector, k, filter=None):
+        time.sleep(0.3)
+        return []
+
+    rag_engine_mock._classify_intent = slow_classify
+    rag_engine_mock.embedding_cache = EmbeddingCache(MagicMock(**{"embed_query.return_value": [1.0, 0.0]}))
+    rag_engine_mock.retriever = ChromaRetriever(MagicMock(), "vector_db")
+    search = rag_engine_mock.retriever.vector_db.similarity_search_by_vector_with_relevance_scores
+    search.side_effect = slow_search
+    rag_engine_mock.semantic_cache = AsyncMock()
+    rag_engine_mock.semantic_cache.lookup.return_value = None
+    rag_engine_mock.redis = AsyncMock()
+    rag_engine_mock.redis.get_context.return_value = []
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = "Answer"
+    rag_engine_mock.client.chat.completions.create.return_value = mock_response
+
+    with patch('backend.rag.engine.PIPELINE_MODE', 'concurrent'), patch('backend.rag.engine.LLM_HEDGING', False):
+        start = time.perf_counter()
+        assert await rag_engine_mock.process_query("what is a join", "General", "s1") == "Answer"
+        elapsed = time.perf_counter() - start
+
+    search.assert_called_once()
+    assert elapsed < 0.5
+
+@pytest.mark.asyncio
+async def test_cancelled_cache_probe_cancels_early_retrieval(rag_engine_mock):
+    """A client leaving during the semantic cache probe also stops the retrieval started next to it."""
+    cancelled = []
+
+    async def hanging(*args):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(args[0] if args else None)
+            raise
+
+    rag_engine_mock.semantic_cache = AsyncMock()
+    async def slow_probe(*args):
+        await asyncio.sleep(5)
+
+    rag_engine_mock._semantic_cache_probe = slow_probe
+    rag_engine_mock._retrieve = hanging
+
+    with patch('backend.rag.engine.PIPELINE_MODE', 'concurrent'):
+        task = asyncio.create_task(rag_engine_mock.process_query("what is a join", "General", "s1"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    await asyncio.sleep(0)
+
+    assert cancelled == ["what is a join"]
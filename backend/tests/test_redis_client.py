@@ -0,0 +1,171 @@
+import pytest
+from backend.storage.redis_client import RedisClient
+from backend.benchmarks.redis_round_trips import RoundTripCounter
+
+fakeredis = pytest.importorskip("fakeredis")
+
+@pytest.fixture
+def counter():
+    return RoundTripCounter()
+
+@pytest.fixture
+def store(counter):
+    return RedisClient(client=counter.wrap(fakeredis.FakeAsyncRedis(decode_responses=True)))
+
+@pytest.mark.asyncio
+async def test_chat_turn_is_written_in_one_round_trip(store, counter):
+    await store.add_messages("s1", [("user", "hi"), ("assistant", "hello")])
+
+    assert counter.count == 1
+    assert await store.get_context("s1") == [
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "hello"},
+    ]
+    assert 0 < await store.client.ttl("chat:s1") <= store.expiry
+
+@pytest.mark.asyncio
+async def test_history_is_trimmed_to_last_20_messages(store):
+    for i in range(15):
+        await store.add_messages("s1", [("user", f"q{i}"), ("assistant", f"a{i}")])
+
+    history = await store.get_chat_history("s1")
+    assert len(history) == 20
+    assert history[-1]["content"] == "a14"
+    assert len(await store.get_context("s1")) == 10
+
+@pytest.mark.asyncio
+async def test_delete_session_data(store):
+    await store.add_message("s1", "user", "hi")
+    await store.add_task("s1", {"id": "t1", "title": "Read", "completed": False})
+    await store.delete_session_data("s1")
+    assert await store.get_chat_history("s1") == []
+    assert await store.get_tasks("s1") == []
+
+@pytest.mark.asyncio
+async def test_study_stats_are_maintained_incrementally(store, counter):
+    import datetime
+    monday = datetime.datetime(2026, 10, 12, 9, 0)
+    await store.log_study_session("s1", 25, when=monday)  # first call also loads the script
+    before = counter.count
+    await store.log_study_session("s1", 50, when=monday + datetime.timedelta(days=1))
+    assert counter.count - before == 1
+
+    assert await store.get_study_stats("s1") == {"total_sessions": 2, "total_minutes": 75}
+    assert await store.client.hgetall("study:daily:s1") == {"2026-10-12": "25", "2026-10-13": "50"}
+    assert await store.client.hgetall("study:weekly:s1") == {"2026-W42": "75"}
+
+@pytest.mark.asyncio
+async def test_legacy_study_list_is_backfilled(store):
+    # Written by the old log_study_session: bare minutes, no aggregates
+    await store.client.rpush("study:old", 25, 25, 10)
+
+    assert await store.get_study_stats("old") == {"total_sessions": 3, "total_minutes": 60}
+    await store.log_study_session("old", 5)
+    assert await store.get_study_stats("old") == {"total_sessions": 4, "total_minutes": 65}
+
+@pytest.mark.asyncio
+async def test_reading_study_stats_does_not_create_keys(store):
+    assert await store.get_study_stats("nobody") == {"total_sessions": 0, "total_minutes": 0}
+    assert await store.client.exists("study:agg:nobody") == 0
+
+@pytest.mark.asyncio
+async def test_study_time_series_range_and_rollups(store, counter):
+    import datetime
+    utc = datetime.timezone.utc
+    monday = datetime.datetime(2026, 10, 12, 9, 0, tzinfo=utc)
+    await store.log_study_session("s1", 25, when=monday)
+    await store.log_study_session("s1", 25, when=monday + datetime.timedelta(minutes=30))
+    await store.log_study_session("s1", 50, when=monday + datetime.timedelta(days=7))
+
+    sessions = await store.get_study_sessions("s1", monday, monday + datetime.timedelta(days=1))
+    assert [s["minutes"] for s in sessions] == [25, 25]
+    assert sessions[0]["timestamp"] == monday.timestamp()
+
+    hourly = await store.downsample_study_sessions("s1", monday, monday + datetime.timedelta(days=8), 3600)
+    assert [b["minutes"] for b in hourly] == [50, 50]
+
+    before = counter.count
+    rollups = await store.get_study_rollups("s1", days=14, today=datetime.date(2026, 10, 19))
+    assert counter.count - before == 1
+    assert len(rollups["daily"]) == 14
+    assert {d["date"]: d["minutes"] for d in rollups["daily"] if d["minutes"]} == {"2026-10-12": 50, "2026-10-19": 50}
+    assert rollups["weekly"] == [
+        {"week": "2026-W41", "minutes": 0},
+        {"week": "2026-W42", "minutes": 50},
+        {"week": "2026-W43", "minutes": 50},
+    ]
+
+@pytest.mark.asyncio
+async def test_update_task_is_one_atomic_round_trip(store, counter):
+    await store.add_task("s1", {"id": "t1", "title": "Read", "completed": False})
+    await store.load_scripts()
+
+    before = counter.count
+    assert await store.update_task("s1", "t1", {"completed": True})
+    assert counter.count - before == 1
+    assert await store.get_tasks("s1") == [{"id": "t1", "title": "Read", "completed": True}]
+    assert not await store.update_task("s1", "missing", {"completed": True})
+    assert await store.client.hlen("tasks:s1") == 1
+
+@pytest.mark.asyncio
+async def test_concurrent_task_updates_are_not_lost(store):
+    import asyncio
+    await store.add_task("s1", {"id": "t1", "title": "Read", "completed": False})
+
+    # Each coroutine sets a different field; a read-modify-write race would drop most of them
+    await asyncio.gather(*[store.update_task("s1", "t1", {f"field{i}": i}) for i in range(100)])
+
+    task = (await store.get_tasks("s1"))[0]
+    assert all(task[f"field{i}"] == i for i in range(100))
+    assert task["title"] == "Read"
+
+@pytest.mark.asyncio
+async def test_bulk_task_operations_use_one_round_trip_each(store, counter):
+    tasks = [{"id": f"t{i}", "title": f"Task {i}", "completed": False} for i in range(100)]
+    await store.load_scripts()
+
+    before = counter.count
+    assert await store.add_tasks("s1", tasks) == [True] * 100
+    assert counter.count - before == 1
+
+    # Flushed script cache: the batch reloads the scripts once and retries
+    await store.client.script_flush()
+    results = await store.update_tasks("s1", [("t0", {"completed": True}), ("missing", {"completed": True})])
+    assert results == [True, False]
+
+    before = counter.count
+    assert await store.update_tasks("s1", [(f"t{i}", {"completed": True}) for i in range(100)]) == [True] * 100
+    assert counter.count - before == 1
+
+    assert await store.add_tasks("s1", [{"id": "t0", "title": "Reset"}, {"id": "new", "title": "New"}], overwrite=False) == [False, True]
+    assert await store.delete_tasks("s1", ["t0", "missing"]) == [True, False]
+    assert len(await store.get_tasks("s1")) == 100
+
+@pytest.mark.asyncio
+async def test_analytics_come_from_counters_in_one_round_trip(store, counter):
+    await store.add_tasks("s1", [{"id": f"t{i}", "title": f"Task {i}", "completed": i < 2} for i in range(5)])
+    await store.update_task("s1", "t4", {"completed": True})
+    await store.update_task("s1", "t0", {"completed": False})
+    await store.add_task("s1", {"id": "t1", "title": "Rewritten", "completed": False})
+    await store.add_tasks("s1", [{"id": "t2", "title": "Dup", "completed": True}], overwrite=False)
+    await store.delete_tasks("s1", ["t4", "t3"])
+    await store.log_study_session("s1", 25)
+    await store.load_scripts()
+
+    before = counter.count
+    analytics = await store.get_analytics("s1")
+    assert counter.count - before == 1
+    assert analytics == {
+        "study_stats": {"total_sessions": 1, "total_minutes": 25},
+        "task_stats": {"total": 3, "completed": 0, "pending": 3},
+    }
+
+@pytest.mark.asyncio
+async def test_rebuild_task_counters_for_legacy_sessions(store):
+    import json
+    await store.client.hset("tasks:old", mapping={
+        "a": json.dumps({"id": "a", "completed": True}),
+        "b": json.dumps({"id": "b", "completed": False}),
+    })
+    await store.rebuild_task_counters("old")
+    assert await store.get_task_stats("old") == {"total": 2, "completed": 1, "pending": 1}
@@ -0,0 +1,114 @@
+import os
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from backend.rag.retrievers import NumpyRetriever
+
+def make_corpus(n=200, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    sources = [["python", "react", "cyber-security", "devops"][i % 4] for i in range(n)]
+    documents = [SimpleNamespace(page_content=f"chunk {i}", metadata={"source": s}) for i, s in enumerate(sources)]
+    return vectors, documents, sources
+
+def test_numpy_top_k_matches_brute_force():
+    vectors, documents, sources = make_corpus()
+    retriever = NumpyRetriever(vectors, documents, sources)
+    query = np.random.default_rng(1).standard_normal(16).astype(np.float32)
+
+    results = retriever.search(query, 5)
+
+    distances = ((vectors - query) ** 2).sum(axis=1)
+    expected = np.argsort(distances)[:5]
+    assert [d.page_content for d, _ in results] == [f"chunk {i}" for i in expected]
+    assert np.allclose([score for _, score in results], distances[expected], rtol=1e-4)
+
+def test_numpy_department_search_only_scans_its_roadmaps():
+    vectors, documents, sources = make_corpus()
+    retriever = NumpyRetriever(vectors, documents, sources)
+    query = np.random.default_rng(2).standard_normal(16).astype(np.float32)
+
+    # Cyber Security covers cyber-security, devops and backend (absent here)
+    results = retriever.search(query, 10, "Cyber Security")
+
+    in_scope = [i for i, s in enumerate(sources) if s in ("cyber-security", "devops")]
+    distances = ((vectors[in_scope] - query) ** 2).sum(axis=1)
+    expected = [in_scope[i] for i in np.argsort(distances)[:10]]
+    assert [d.page_content for d, _ in results] == [f"chunk {i}" for i in expected]
+    assert retriever.scope("Cyber Security") == "Cyber Security"
+    assert retriever.scope("General") == ""
+
+def test_numpy_retriever_loads_from_chroma_and_agrees_with_it():
+    chromadb = pytest.importorskip("chromadb")
+    from langchain_community.vectorstores import Chroma
+    vectors, documents, sources = make_corpus(n=60)
+    store = Chroma(collection_name="retriever-test", client=chromadb.EphemeralClient())
+    store._collection.add(ids=[str(i) for i in range(60)], embeddings=vectors,
+                          documents=[d.page_content for d in documents], metadatas=[d.metadata for d in documents])
+    query = vectors[7] + 0.01
+
+    retriever = NumpyRetriever.from_chroma(store)
+    ours = retriever.search(query, 3)
+    theirs = store.similarity_search_by_vector_with_relevance_scores(query.tolist(), k=3)
+
+    assert [d.page_content for d, _ in ours] == [d.page_content for d, _ in theirs]
+    assert np.allclose([s for _, s in ours], [s for _, s in theirs], rtol=1e-3)
+    store.delete_collection()
+
+def test_empty_store_searches_return_nothing():
+    chromadb = pytest.importorskip("chromadb")
+    from langchain_community.vectorstores import Chroma
+    store = Chroma(collection_name="retriever-empty", client=chromadb.EphemeralClient())
+
+    retriever = NumpyRetriever.from_chroma(store)
+
+    query = np.ones(16, dtype=np.float32)
+    assert retriever.search(query, 3) == []
+    assert retriever.search(query, 3, "Cyber Security") == []
+    store.delete_collection()
+
+def test_mmap_index_round_trip_is_memory_mapped(tmp_path):
+    from langchain_core.documents import Document
+    from backend.rag.mmap_index import write_mmap_index
+    from backend.rag.retrievers import MmapRetriever
+    vectors, _, sources = make_corpus()
+    documents = [Document(page_content=f"chunk {i}", metadata={"source": s}) for i, s in enumerate(sources)]
+    in_memory = NumpyRetriever(vectors, documents, sources)
+    path = write_mmap_index(str(tmp_path / "mmap_index"), in_memory)
+    query = np.random.default_rng(3).standard_normal(16).astype(np.float32)
+
+    mapped = MmapRetriever(path)
+
+    assert isinstance(mapped.vectors, np.memmap)
+    for department in (None, "Cyber Security"):
+        expected = in_memory.search(query, 5, department)
+        actual = mapped.search(query, 5, department)
+        assert [(d.page_content, d.metadata) for d, _ in actual] == [(d.page_content, d.metadata) for d, _ in expected]
+        assert np.allclose([s for _, s in actual], [s for _, s in expected])
+
+    # Rewriting swaps the link to a new version; an already-open retriever keeps its mapping
+    first = os.path.realpath(path)
+    write_mmap_index(path, NumpyRetriever(vectors[:10], documents[:10], sources[:10]))
+    assert os.path.islink(path) and os.path.realpath(path) != first
+    assert len(MmapRetriever(path).documents) == 10
+    assert mapped.search(query, 5)[0][0].page_content == in_memory.search(query, 5)[0][0].page_content
+
+    # Only the current version and the one it replaced are kept
+    second = os.path.realpath(path)
+    write_mmap_index(path, NumpyRetriever(vectors[:5], documents[:5], sources[:5]))
+    assert len(MmapRetriever(path).documents) == 5
+    versions = {os.path.basename(second), os.readlink(path)}
+    assert sorted(os.listdir(tmp_path)) == sorted(versions | {"mmap_index"})
+
+def test_mmap_index_replaces_a_legacy_directory(tmp_path):
+    from backend.rag.mmap_index import write_mmap_index
+    from backend.rag.retrievers import MmapRetriever
+    vectors, documents, sources = make_corpus()
+    path = tmp_path / "mmap_index"
+    path.mkdir()
+    (path / "index.json").write_text("{}")
+
+    write_mmap_index(str(path), NumpyRetriever(vectors, documents, sources))
+
+    assert path.is_symlink()
+    assert len(MmapRetriever(str(path)).documents) == len(documents)
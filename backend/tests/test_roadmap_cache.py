@@ -0,0 +1,63 @@
+import json
+import time
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from backend.rag.roadmap_cache import RoadmapCache
+
+fakeredis = pytest.importorskip("fakeredis")
+
+ROADMAP = {"title": "Cyber Security", "modules": [{"week": 1, "topic": "Networking", "description": "", "resources": []}]}
+
+@pytest.fixture
+def engine():
+    with patch.dict('os.environ', {'OPENROUTER_API_KEY': 'test_key'}):
+        from backend.rag.engine import RAGEngine
+        engine = RAGEngine()
+    engine.roadmap_cache = RoadmapCache(fakeredis.FakeAsyncRedis(decode_responses=True), fresh_ttl=60)
+    engine.client = MagicMock()
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = json.dumps(ROADMAP)
+    engine.client.chat.completions.create = AsyncMock(return_value=mock_response)
+    return engine
+
+def test_key_depends_on_goals():
+    assert RoadmapCache.key("AI", "Beginner") == RoadmapCache.key("AI", "Beginner", "  ")
+    assert RoadmapCache.key("AI", "Beginner", "Get a job") == RoadmapCache.key("AI", "Beginner", "get a  JOB")
+    assert RoadmapCache.key("AI", "Beginner", "Get a job") != RoadmapCache.key("AI", "Beginner")
+
+@pytest.mark.asyncio
+async def test_second_request_is_served_from_cache(engine):
+    first = await engine.generate_roadmap("Cyber Security", "Beginner")
+
+    start = time.perf_counter()
+    second = await engine.generate_roadmap("Cyber Security", "Beginner")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    assert first == second == ROADMAP
+    assert engine.client.chat.completions.create.call_count == 1
+    assert elapsed_ms < 5
+
+@pytest.mark.asyncio
+async def test_failed_generation_is_not_cached(engine):
+    engine.client.chat.completions.create.side_effect = Exception("down")
+    roadmap = await engine.generate_roadmap("Cyber Security", "Beginner")
+    assert "Fallback" in roadmap["title"]
+    assert await engine.roadmap_cache.get("Cyber Security", "Beginner") is None
+
+@pytest.mark.asyncio
+async def test_stale_entry_served_then_revalidated(engine):
+    old = {"title": "Old", "modules": []}
+    await engine.roadmap_cache.set("Cyber Security", "Beginner", None, old)
+    engine.roadmap_cache.fresh_ttl = -1  # everything is stale
+
+    assert await engine.generate_roadmap("Cyber Security", "Beginner") == old
+    await asyncio.gather(*engine._roadmap_refreshes.values())
+
+    assert (await engine.roadmap_cache.get("Cyber Security", "Beginner"))[0] == ROADMAP
+
+@pytest.mark.asyncio
+async def test_warm_roadmaps_fills_every_combination(engine):
+    await engine.warm_roadmaps()
+    await engine.warm_roadmaps()  # second pass finds everything fresh
+    assert engine.client.chat.completions.create.call_count == 18
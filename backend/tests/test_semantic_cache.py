@@ -0,0 +1,82 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from backend.rag.semantic_cache import SemanticCache, decode_vector
+from backend.rag.embedding_cache import EmbeddingCache
+
+fakeredis = pytest.importorskip("fakeredis")
+
+@pytest.fixture
+def cache():
+    client = fakeredis.FakeAsyncRedis(decode_responses=True, encoding_errors="surrogateescape")
+    return SemanticCache(client, threshold=0.9, max_entries=2)
+
+@pytest.mark.asyncio
+async def test_similar_query_hits_and_dissimilar_misses(cache):
+    await cache.store("Cyber Security", "search", "what is xss", [1.0, 0.0, 0.0], "XSS is ...")
+
+    hit = await cache.lookup("Cyber Security", "search", [0.98, 0.1, 0.0])
+    assert hit[0] == "XSS is ..."
+    assert await cache.lookup("Cyber Security", "search", [0.0, 1.0, 0.0]) is None
+    # Buckets are scoped by department and intent
+    assert await cache.lookup("Data Science", "search", [1.0, 0.0, 0.0]) is None
+
+    stats = await cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+@pytest.mark.asyncio
+async def test_least_recently_used_entry_is_evicted(cache):
+    await cache.store("CS", "chat", "a", [1.0, 0.0, 0.0], "A")
+    await cache.store("CS", "chat", "b", [0.0, 1.0, 0.0], "B")
+    await cache.lookup("CS", "chat", [1.0, 0.0, 0.0])  # touch "a"
+    await cache.store("CS", "chat", "c", [0.0, 0.0, 1.0], "C")
+
+    assert (await cache.lookup("CS", "chat", [1.0, 0.0, 0.0]))[0] == "A"
+    assert await cache.lookup("CS", "chat", [0.0, 1.0, 0.0]) is None
+    assert (await cache.stats())["evictions"] == 1
+
+@pytest.mark.asyncio
+async def test_lookup_reads_vectors_only_and_fetches_the_winner(cache):
+    await cache.store("CS", "chat", "a", [1.0, 0.0, 0.0], "A" * 10_000)
+    await cache.store("CS", "chat", "b", [0.0, 1.0, 0.0], "B" * 10_000)
+    cache.client.mget = AsyncMock(side_effect=AssertionError("answers must not be bulk-fetched"))
+
+    assert (await cache.lookup("CS", "chat", [0.0, 1.0, 0.0]))[0] == "B" * 10_000
+
+    # An answer that expired before its vector is dropped and counted as a miss
+    prefix = await cache._prefix()
+    vectors = await cache.client.hgetall(f"{prefix}:vectors:CS:chat")
+    entry_id = next(e for e, v in vectors.items() if decode_vector(v)[0] == 1.0)
+    await cache.client.delete(f"{prefix}:entry:{entry_id}")
+    assert await cache.lookup("CS", "chat", [1.0, 0.0, 0.0]) is None
+    assert await cache.client.hlen(f"{prefix}:vectors:CS:chat") == 1
+    assert (await cache.stats())["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_all_entries(cache):
+    await cache.store("CS", "chat", "a", [1.0, 0.0, 0.0], "A")
+    await cache.invalidate()
+    assert await cache.lookup("CS", "chat", [1.0, 0.0, 0.0]) is None
+
+@pytest.mark.asyncio
+async def test_process_query_serves_cached_answer_without_llm(cache):
+    with patch.dict('os.environ', {'OPENROUTER_API_KEY': 'test_key'}):
+        from backend.rag.engine import RAGEngine
+        engine = RAGEngine()
+    engine.client = MagicMock()
+    engine.client.chat.completions.create = AsyncMock()
+    engine.embeddings = MagicMock()
+    engine.embeddings.embed_query.return_value = [1.0, 0.0, 0.0]
+    engine.embedding_cache = EmbeddingCache(engine.embeddings)
+    engine._classify_intent = AsyncMock(return_value="search")
+    engine.semantic_cache = cache
+    await cache.store("General", "search", "what is xss", [1.0, 0.0, 0.0], "Cached XSS answer")
+
+    assert await engine.process_query("what is XSS?", "General") == "Cached XSS answer"
+    engine.client.chat.completions.create.assert_not_called()
+
+    # Bypassing the cache goes back to the full pipeline
+    engine.search_web = MagicMock(return_value=[])
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = "Fresh answer"
+    engine.client.chat.completions.create.return_value = mock_response
+    assert await engine.process_query("what is XSS?", "General", use_cache=False) == "Fresh answer"
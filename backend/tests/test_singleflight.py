@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from backend.rag.singleflight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_execution():
+    sf = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return {"title": "Roadmap"}
+
+    results = await asyncio.gather(*[sf.do("roadmap:cyber", work) for _ in range(50)])
+
+    assert calls == 1
+    assert all(r == {"title": "Roadmap"} for r in results)
+    assert sf.stats == {"executed": 1, "shared": 49, "remote": 0}
+    assert not sf._inflight
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_work():
+    sf = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.1)
+        return "done"
+
+    first = asyncio.create_task(sf.do("k", work))
+    second = asyncio.create_task(sf.do("k", work))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == "done"
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_all_callers():
+    sf = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("model down")
+
+    results = await asyncio.gather(sf.do("k", work), sf.do("k", work), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+@pytest.mark.asyncio
+async def test_distributed_workers_share_result_through_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    worker_a = SingleFlight(client, distributed=True)
+    worker_b = SingleFlight(client, distributed=True)
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.3)
+        return {"title": "Shared"}
+
+    a, b = await asyncio.gather(worker_a.do("k", work), worker_b.do("k", work))
+
+    assert a == b == {"title": "Shared"}
+    assert calls == 1
+    assert worker_a.stats["remote"] + worker_b.stats["remote"] == 1
+    assert not await client.exists("sf:lock:k")
@@ -19,6 +19,42 @@ export const chatWithAI = async (message, department, session_id) => {
     }
 };
 
+// Streams the reply over SSE, calling onToken for every chunk as it arrives.
+// Resolves with the timing info from the final "done" event.
+export const streamChatWithAI = async (message, department, session_id, onToken, signal) => {
+    const response = await fetch(`${API_BASE_URL}/chat/stream`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ message, department, session_id }),
+        signal,
+    });
+    if (!response.ok || !response.body) throw new Error(`Stream failed: ${response.status}`);
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let stats = null;
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const events = buffer.split("\n\n");
+        buffer = events.pop();
+        for (const raw of events) {
+            const event = raw.match(/^event: (.*)$/m)?.[1];
+            const data = raw.match(/^data: (.*)$/m)?.[1];
+            if (!data) continue;
+            const payload = JSON.parse(data);
+            if (event === "token") onToken(payload.token);
+            else if (event === "done") stats = payload;
+            else if (event === "error") throw new Error(payload.detail);
+        }
+    }
+    return stats;
+};
+
 export const getChatHistory = async (session_id) => {
     try {
         const response = await api.get(`/chat/history/${session_id}`);
@@ -1,6 +1,6 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { Send, User, Bot, Loader2 } from 'lucide-react';
-import { chatWithAI, getChatHistory } from '../api';
+import { streamChatWithAI, getChatHistory } from '../api';
 
 import ReactMarkdown from 'react-markdown';
 import remarkGfm from 'remark-gfm';
@@ -47,8 +47,20 @@ const ChatInterface = ({ department, setDepartment, sessionId }) => {
         setLoading(true);
 
         try {
-            const data = await chatWithAI(userMsg.content, department, sessionId);
-            setMessages(prev => [...prev, { role: 'ai', content: data.response }]);
+            let started = false;
+            await streamChatWithAI(userMsg.content, department, sessionId, (token) => {
+                if (!started) {
+                    // First token: swap the spinner for the growing reply
+                    started = true;
+                    setLoading(false);
+                    setMessages(prev => [...prev, { role: 'ai', content: token }]);
+                } else {
+                    setMessages(prev => {
+                        const last = prev[prev.length - 1];
+                        return [...prev.slice(0, -1), { ...last, content: last.content + token }];
+                    });
+                }
+            });
         } catch (err) {
             setMessages(prev => [...prev, { role: 'ai', content: "Sorry, I couldn't reach the server." }]);
         } finally {